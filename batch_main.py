@@ -0,0 +1,67 @@
+"""Command line entry point: process directories or globs of .bin logs without the GUI.
+
+usage: python batch_main.py LOGS_DIR_OR_GLOB [...] --output OUT_DIR [--workers N] [--engine dataflash|pymavlink]
+                            [--format npz|parquet|arrow|geojson|kml]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from src.business_logic.src.batch_processor import (
+    NPZ_FORMAT,
+    OUTPUT_FORMATS,
+    collect_log_paths,
+    process_logs,
+    write_summary,
+)
+from src.utils.configurations import DATAFLASH_ENGINE, PYMAVLINK_ENGINE, READER_ENGINE
+
+
+def parse_args(argv: list) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Extract the GPS tracks of many .bin logs.")
+    parser.add_argument("inputs", nargs="+", help=".bin files, directories (searched recursively) or glob patterns")
+    parser.add_argument("-o", "--output", required=True, help="directory for the track files and the summary")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument("--engine", choices=[DATAFLASH_ENGINE, PYMAVLINK_ENGINE], default=READER_ENGINE)
+    parser.add_argument(
+        "--format",
+        choices=OUTPUT_FORMATS,
+        default=NPZ_FORMAT,
+        help="track file format, parquet and arrow need pyarrow",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list = None) -> int:
+    """Runs the batch and prints the totals, the exit code is 1 if any log failed."""
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+
+    log_paths = collect_log_paths(args.inputs)
+    if not log_paths:
+        print("No .bin files found")
+        return 1
+
+    start_time = time.perf_counter()
+    summaries = process_logs(
+        log_paths, args.output, workers=args.workers, engine=args.engine, output_format=args.format
+    )
+    elapsed = time.perf_counter() - start_time
+    json_path, csv_path = write_summary(summaries, args.output)
+
+    failed = [summary for summary in summaries if summary["error"]]
+    # logs that fail before their size is read have no size_mb
+    total_mb = sum(summary["size_mb"] or 0 for summary in summaries)
+    total_points = sum(summary["points"] or 0 for summary in summaries)
+    print(
+        f"Processed {len(summaries) - len(failed)}/{len(summaries)} logs, {total_points} points, "
+        f"{total_mb:.1f} MB in {elapsed:.1f}s ({total_mb / elapsed:.1f} MB/s) with {args.workers} workers"
+    )
+    print(f"Summary written to {json_path} and {csv_path}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,247 @@
+"""Benchmarks of startup, log parsing and map building on synthetic DataFlash logs.
+
+usage: python -m benchmarks.run_benchmarks [--sizes-mb 10 100] [--engines dataflash pymavlink]
+                                           [--gps-rate 5] [--noise-per-gps 20] [--corrupt-blocks 0]
+                                           [--repeat 3] [--compare benchmarks/results/<older>.json]
+
+Every run writes a JSON file to benchmarks/results/ with the throughput and peak Python memory of each step,
+compare two of them with --compare to spot regressions between versions.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+from src.business_logic.src.dataflash_reader import DataFlashReader
+from src.business_logic.src.message_index import MessageIndex
+from src.business_logic.src.read_bin_file import ReadeBinFile
+from src.utils.configurations import DATAFLASH_ENGINE, PYMAVLINK_ENGINE
+from tests.synthetic_log import generate_log, gps_points_for_size
+
+RESULTS_DIR = Path(__file__).parent / "results"
+REPO_DIR = Path(__file__).parent.parent
+
+# entry point -> module it imports first, each is imported by a fresh interpreter
+STARTUP_MODULES = {
+    "library": "src.business_logic.src.read_bin_file",
+    "batch": "batch_main",
+    "gui": "src.gui.flight_route_app",
+}
+# dependencies only the first parse (pymavlink) or the first map (flet_map) should import
+LAZY_MODULES = ["pymavlink", "flet_map", "src.business_logic.src.read_bin_file"]
+
+
+def measure(step: Callable, repeat: int) -> tuple:
+    """best wall time of `repeat` runs, then one extra run under tracemalloc for the peak memory
+    :return (seconds, peak_memory_bytes, result of the last run)"""
+    best_seconds = float("inf")
+    result = None
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        result = step()
+        best_seconds = min(best_seconds, time.perf_counter() - start_time)
+
+    tracemalloc.start()
+    try:
+        step()
+        _, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return best_seconds, peak_bytes, result
+
+
+def _row(name: str, log_name: str, size_mb: float, points: int, seconds: float, peak_bytes: int) -> dict:
+    return {
+        "name": name,
+        "log": log_name,
+        "size_mb": round(size_mb, 3),
+        "points": points,
+        "seconds": round(seconds, 6),
+        "throughput_mb_s": round(size_mb / seconds, 3) if seconds else None,
+        "points_per_s": round(points / seconds) if seconds else None,
+        "peak_memory_mb": round(peak_bytes / 1e6, 3),
+    }
+
+
+def measure_import(module: str) -> tuple:
+    """import a module in a fresh interpreter
+    :return (seconds the import took, the LAZY_MODULES it imported)"""
+    code = (
+        "import sys, time\n"
+        "start_time = time.perf_counter()\n"
+        f"import {module}\n"
+        "seconds = time.perf_counter() - start_time\n"
+        f"print(seconds, *[name for name in {LAZY_MODULES!r} if name in sys.modules])\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=REPO_DIR
+    ).stdout
+    # the last line, the import itself may log to stdout
+    seconds, *loaded = output.strip().splitlines()[-1].split()
+    return float(seconds), loaded
+
+
+def run_startup_benchmarks(repeat: int, gui: bool = True) -> list:
+    """import time of every entry point, the best of `repeat` fresh interpreters"""
+    rows: list = []
+    for entry_point, module in STARTUP_MODULES.items():
+        if entry_point == "gui" and not gui:
+            continue
+        seconds = min(measure_import(module)[0] for _ in range(repeat))
+        rows.append(_row(f"startup[{entry_point}]", module, 0.0, 0, seconds, 0))
+    return rows
+
+
+def run_parse_benchmarks(log_path: str, log_name: str, size_mb: float, engines: list, repeat: int) -> tuple:
+    """process_bin_file with every engine, then the message index build on its own row, returns the rows and the
+    parsed track; the parse rows never use the index so its build cost isn't hidden in a warm read"""
+    rows: list = []
+    for engine in engines:
+        seconds, peak_bytes, points = measure(
+            lambda: ReadeBinFile(log_path, engine=engine, use_cache=False, use_index=False).process_bin_file(),
+            repeat,
+        )
+        rows.append(_row(f"process_bin_file[{engine}]", log_name, size_mb, len(points), seconds, peak_bytes))
+
+    track = ReadeBinFile(log_path, use_cache=False, use_index=False).read_track()
+    seconds, peak_bytes, _ = measure(
+        lambda: ReadeBinFile(log_path, use_cache=False, use_index=False).read_track(), repeat
+    )
+    rows.append(_row("read_track", log_name, size_mb, len(track), seconds, peak_bytes))
+
+    def build_index() -> MessageIndex:
+        with DataFlashReader(log_path) as reader:
+            return MessageIndex.build(reader)
+
+    seconds, peak_bytes, index = measure(build_index, repeat)
+    records = sum(len(type_offsets) for type_offsets in index.offsets.values())
+    rows.append(_row("MessageIndex.build", log_name, size_mb, records, seconds, peak_bytes))
+    return rows, track
+
+
+def run_map_benchmarks(track, log_name: str, size_mb: float, repeat: int) -> list:
+    """marker placement, viewport culling and polyline building on the parsed track"""
+    # flet is only needed for this part
+    from src.gui.map.map_builder import MapRouteBuilder
+
+    map_builder = MapRouteBuilder()
+    map_builder.current_center = (float(track.lat[0]), float(track.lng[0]))
+
+    def add_waypoints() -> None:
+        map_builder._reset_waypoints()
+        map_builder._add_waypoints(track, 0)
+
+    rows: list = []
+    for name, step in (
+        ("_add_waypoints", add_waypoints),
+        ("_visible_markers", map_builder._visible_markers),
+        ("_create_route_polyline", lambda: map_builder._create_route_polyline(track)),
+    ):
+        seconds, peak_bytes, _ = measure(step, repeat)
+        rows.append(_row(name, log_name, size_mb, len(track), seconds, peak_bytes))
+    return rows
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(results: dict, baseline_path: str) -> None:
+    """print the time change of every benchmark against an older results file"""
+    with open(baseline_path, encoding="utf-8") as baseline_file:
+        baseline = json.load(baseline_file)
+
+    baseline_rows = {(row["name"], row["log"]): row for row in baseline["results"]}
+    print(f"\nCompared with {baseline_path} ({baseline['git_revision']}):")
+    for row in results["results"]:
+        old_row = baseline_rows.get((row["name"], row["log"]))
+        if old_row is None or not old_row["seconds"]:
+            continue
+        change = 100 * (row["seconds"] - old_row["seconds"]) / old_row["seconds"]
+        print(
+            f"  {row['name']:<36} {row['size_mb']:>9.1f} MB  "
+            f"{old_row['seconds']:.4f}s -> {row['seconds']:.4f}s  ({change:+.1f}%)"
+        )
+
+
+def parse_args(argv: list) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes-mb", type=float, nargs="+", default=[10.0, 100.0], help="synthetic log sizes")
+    parser.add_argument(
+        "--engines", nargs="+", choices=[DATAFLASH_ENGINE, PYMAVLINK_ENGINE], default=[DATAFLASH_ENGINE]
+    )
+    parser.add_argument("--gps-rate", type=float, default=5.0, help="GPS fixes per second")
+    parser.add_argument("--noise-per-gps", type=int, default=20, help="IMU/ATT/BAT records between two fixes")
+    parser.add_argument("--corrupt-blocks", type=int, default=0, help="runs of garbage bytes in the log")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per benchmark, the best one is kept")
+    parser.add_argument(
+        "--skip-map", action="store_true", help="don't benchmark the map builder and the GUI startup (need flet)"
+    )
+    parser.add_argument("--output", default=None, help="results file, defaults to benchmarks/results/<time>.json")
+    parser.add_argument("--compare", default=None, help="older results file to compare with")
+    return parser.parse_args(argv)
+
+
+def main(argv: list = None) -> dict:
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    rows: list = run_startup_benchmarks(args.repeat, gui=not args.skip_map)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for size_mb in args.sizes_mb:
+            log_name = f"synthetic_{size_mb:g}mb"
+            log_path = os.path.join(temp_dir, f"{log_name}.bin")
+            gps_points = gps_points_for_size(int(size_mb * 1e6), args.noise_per_gps)
+            generate_log(log_path, gps_points, args.gps_rate, args.noise_per_gps, args.corrupt_blocks)
+            actual_size_mb = os.path.getsize(log_path) / 1e6
+
+            parse_rows, track = run_parse_benchmarks(
+                log_path, log_name, actual_size_mb, args.engines, args.repeat
+            )
+            rows.extend(parse_rows)
+            if not args.skip_map:
+                rows.extend(run_map_benchmarks(track, log_name, actual_size_mb, args.repeat))
+
+    results = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "results": rows,
+    }
+
+    output_path = args.output or str(RESULTS_DIR / f"bench_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as output_file:
+        json.dump(results, output_file, indent=2)
+
+    for row in rows:
+        print(
+            f"{row['name']:<36} {row['size_mb']:>9.1f} MB  {row['seconds']:>9.4f}s  "
+            f"{row['throughput_mb_s'] or 0:>9.1f} MB/s  {row['peak_memory_mb']:>9.1f} MB peak"
+        )
+    print(f"Results written to {output_path}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -9,4 +9,6 @@ def main(page: ft.Page) -> None:
     app.build()
 
 
-ft.app(target=main)
+# guarded so worker processes started by the parser don't open the app again
+if __name__ == "__main__":
+    ft.app(target=main)
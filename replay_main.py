@@ -0,0 +1,47 @@
+"""Command line entry point: replay the GPS track of a .bin log as a MAVLink stream, to try the live mode.
+
+usage: python replay_main.py LOG.bin [--address udpout:127.0.0.1:14550] [--rate HZ] [--loop]
+"""
+
+import argparse
+import sys
+
+from src.business_logic.src.live_feed import replay_track
+from src.business_logic.src.read_bin_file import ReadeBinFile
+from src.utils.configurations import LIVE_REPLAY_RATE_HZ
+
+
+def parse_args(argv: list) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Send the GPS track of a .bin log as GLOBAL_POSITION_INT messages.")
+    parser.add_argument("log", help=".bin log to replay")
+    parser.add_argument(
+        "-a", "--address", default="udpout:127.0.0.1:14550", help="MAVLink endpoint the live mode listens on"
+    )
+    parser.add_argument("-r", "--rate", type=float, default=LIVE_REPLAY_RATE_HZ, help="fixes sent per second")
+    parser.add_argument("--loop", action="store_true", help="start over at the end of the track, until Ctrl+C")
+    return parser.parse_args(argv)
+
+
+def main(argv: list = None) -> int:
+    """Replays the track, the exit code is 1 if the log has no GPS fixes."""
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+
+    track = ReadeBinFile(args.log).read_track()
+    if not len(track):
+        print(f"No GPS found in {args.log}")
+        return 1
+
+    print(f"Sending {len(track)} points to {args.address} at {args.rate:g} Hz")
+    try:
+        while True:
+            replay_track(track, args.address, args.rate)
+            if not args.loop:
+                break
+    except KeyboardInterrupt:
+        pass
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,204 @@
+"""headless processing of many .bin logs at once, for unattended pipelines"""
+
+import csv
+import glob
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+
+from src.business_logic.src.flight_track import FlightTrack
+from src.business_logic.src.geo_math import cumulative_distances, haversine_distances
+from src.business_logic.src.read_bin_file import ReadeBinFile
+from src.business_logic.src.track_export import TRACK_WRITERS, export_track
+from src.utils.configurations import BATCH_SUMMARY_NAME, EXPORT_BATCH_SIZE, READER_ENGINE
+from src.utils.logger_factory import get_module_logger
+
+logger = get_module_logger(__name__)
+
+NPZ_FORMAT = "npz"  # FlightTrack.save, the whole track in memory
+OUTPUT_FORMATS = [NPZ_FORMAT, *TRACK_WRITERS]
+
+SUMMARY_FIELDS = [
+    "log",
+    "output",
+    "points",
+    "distance_km",
+    "duration_s",
+    "parse_time_s",
+    "size_mb",
+    "throughput_mb_s",
+    "error",
+]
+
+
+def collect_log_paths(inputs: list) -> list:
+    """expand directories (searched recursively) and glob patterns into a sorted list of .bin files"""
+    paths: set = set()
+    for entry in inputs:
+        if os.path.isdir(entry):
+            # is_file drops directories named *.bin and broken symlinks
+            paths.update(str(path) for path in Path(entry).rglob("*.bin") if path.is_file())
+        elif os.path.isfile(entry):
+            paths.add(entry)
+        else:
+            paths.update(path for path in glob.glob(entry, recursive=True) if os.path.isfile(path))
+    return sorted(paths)
+
+
+def _output_names(log_paths: list, output_format: str = NPZ_FORMAT) -> list:
+    """one output file name per log, logs sharing a name get a numeric suffix"""
+    extension = TRACK_WRITERS[output_format].extension if output_format in TRACK_WRITERS else f".{NPZ_FORMAT}"
+    names: list = []
+    used: set = set()
+    for log_path in log_paths:
+        stem = Path(log_path).stem
+        name = f"{stem}{extension}"
+        suffix = 1
+        while name in used:
+            name = f"{stem}_{suffix}{extension}"
+            suffix += 1
+        used.add(name)
+        names.append(name)
+    return names
+
+
+class _StreamSummary:
+    """points, distance and duration of a track streamed batch by batch"""
+
+    def __init__(self):
+        self.points = 0
+        self.distance_km = 0.0
+        self.first_time_us = None
+        self.last_time_us = None
+        self._last_point = None
+
+    def follow(self, batches) -> Iterator[FlightTrack]:
+        """pass the batches through, measuring them on the way"""
+        for batch in batches:
+            if len(batch):
+                lat, lng = batch.lat, batch.lng
+                if self._last_point is not None:
+                    # the segment joining two batches
+                    lat, lng = np.r_[self._last_point[0], lat], np.r_[self._last_point[1], lng]
+                self.distance_km += float(haversine_distances(lat, lng).sum())
+                self._last_point = (batch.lat[-1], batch.lng[-1])
+                self.points += len(batch)
+                if batch.time_us is not None:
+                    if self.first_time_us is None:
+                        self.first_time_us = int(batch.time_us[0])
+                    self.last_time_us = int(batch.time_us[-1])
+            yield batch
+
+
+def process_log(
+    log_path: str, output_path: str, engine: str = READER_ENGINE, output_format: str = NPZ_FORMAT
+) -> dict:
+    """parse one log, save its track to output_path and return its summary row
+    the formats of track_export are streamed, the track is never held in memory as a whole"""
+    if output_format != NPZ_FORMAT:
+        return _export_log(log_path, output_path, engine, output_format)
+
+    summary: dict = {field: None for field in SUMMARY_FIELDS}
+    summary["log"] = log_path
+
+    try:
+        size_mb = os.path.getsize(log_path) / 1e6
+        summary["size_mb"] = round(size_mb, 3)
+
+        start_time = time.perf_counter()
+        # one process per log already, so no nested worker pool
+        track = ReadeBinFile(log_path, engine=engine, workers=1, raise_errors=True).read_track()
+        parse_time = time.perf_counter() - start_time
+
+        track.save(output_path)
+
+        summary["output"] = output_path
+        summary["points"] = len(track)
+        summary["distance_km"] = round(float(cumulative_distances(track.lat, track.lng)[-1]), 3) if len(track) else 0.0
+        if track.time_us is not None and len(track) > 1:
+            summary["duration_s"] = round(float(track.time_us[-1] - track.time_us[0]) / 1e6, 3)
+        summary["parse_time_s"] = round(parse_time, 3)
+        summary["throughput_mb_s"] = round(size_mb / parse_time, 3) if parse_time > 0 else None
+
+    except Exception as e:
+        logger.error(f"Failed to process {log_path}: {e}")
+        summary["error"] = str(e)
+
+    return summary
+
+
+def _export_log(log_path: str, output_path: str, engine: str, output_format: str) -> dict:
+    """process_log for the streamed formats"""
+    summary: dict = {field: None for field in SUMMARY_FIELDS}
+    summary["log"] = log_path
+
+    try:
+        size_mb = os.path.getsize(log_path) / 1e6
+        summary["size_mb"] = round(size_mb, 3)
+
+        start_time = time.perf_counter()
+        stream_summary = _StreamSummary()
+        reader = ReadeBinFile(log_path, engine=engine, workers=1, raise_errors=True)
+        batches = reader.iter_points(EXPORT_BATCH_SIZE)
+        export_track(stream_summary.follow(batches), output_path, output_format, Path(log_path).name)
+        parse_time = time.perf_counter() - start_time
+
+        summary["output"] = output_path
+        summary["points"] = stream_summary.points
+        summary["distance_km"] = round(stream_summary.distance_km, 3)
+        if stream_summary.points > 1 and stream_summary.first_time_us is not None:
+            summary["duration_s"] = round((stream_summary.last_time_us - stream_summary.first_time_us) / 1e6, 3)
+        summary["parse_time_s"] = round(parse_time, 3)
+        summary["throughput_mb_s"] = round(size_mb / parse_time, 3) if parse_time > 0 else None
+
+    except Exception as e:
+        logger.error(f"Failed to process {log_path}: {e}")
+        summary["error"] = str(e)
+
+    return summary
+
+
+def process_logs(
+    log_paths: list,
+    output_dir: str,
+    workers: int = 1,
+    engine: str = READER_ENGINE,
+    output_format: str = NPZ_FORMAT,
+) -> list:
+    """process every log with a pool of worker processes, returns the summary rows in the input order"""
+    os.makedirs(output_dir, exist_ok=True)
+    output_paths = [os.path.join(output_dir, name) for name in _output_names(log_paths, output_format)]
+
+    if workers <= 1:
+        return [
+            process_log(log_path, output_path, engine, output_format)
+            for log_path, output_path in zip(log_paths, output_paths)
+        ]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(process_log, log_path, output_path, engine, output_format)
+            for log_path, output_path in zip(log_paths, output_paths)
+        ]
+        return [future.result() for future in futures]
+
+
+def write_summary(summaries: list, output_dir: str) -> tuple:
+    """write the summary rows as JSON and CSV, returns both paths"""
+    json_path = os.path.join(output_dir, f"{BATCH_SUMMARY_NAME}.json")
+    csv_path = os.path.join(output_dir, f"{BATCH_SUMMARY_NAME}.csv")
+
+    with open(json_path, "w", encoding="utf-8") as json_file:
+        json.dump(summaries, json_file, indent=2)
+
+    with open(csv_path, "w", newline="", encoding="utf-8") as csv_file:
+        writer = csv.DictWriter(csv_file, fieldnames=SUMMARY_FIELDS)
+        writer.writeheader()
+        writer.writerows(summaries)
+
+    return json_path, csv_path
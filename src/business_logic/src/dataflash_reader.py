@@ -0,0 +1,431 @@
+"""module to read GPS records straight out of ArduPilot DataFlash (.bin) logs"""
+
+import heapq
+import mmap
+import struct
+from typing import Iterator, NamedTuple, Optional
+
+import numpy as np
+
+from src.utils.configurations import COLUMN_GATHER_BYTES, GPS_MESSAGE_TYPES, USE_MMAP
+from src.utils.instrumentation import profiler
+from src.utils.logger_factory import get_module_logger
+
+logger = get_module_logger(__name__)
+
+# every DataFlash record starts with these two bytes followed by the message id
+HEAD1 = 0xA3
+HEAD2 = 0x95
+HEADER = bytes([HEAD1, HEAD2])
+HEADER_LENGTH = 3
+
+# the FMT record describes every other record and always has the same layout
+FMT_MSG_ID = 0x80
+FMT_STRUCT = struct.Struct("<BB4s16s64s")
+FMT_LENGTH = HEADER_LENGTH + FMT_STRUCT.size
+
+# DataFlash format characters -> (struct code, multiplier), same table pymavlink uses
+FORMAT_TO_STRUCT = {
+    "a": ("64s", None),
+    "b": ("b", None),
+    "B": ("B", None),
+    "g": ("e", None),
+    "h": ("h", None),
+    "H": ("H", None),
+    "i": ("i", None),
+    "I": ("I", None),
+    "f": ("f", None),
+    "n": ("4s", None),
+    "N": ("16s", None),
+    "Z": ("64s", None),
+    "c": ("h", 0.01),
+    "C": ("H", 0.01),
+    "e": ("i", 0.01),
+    "E": ("I", 0.01),
+    "L": ("i", 1.0e-7),
+    "d": ("d", None),
+    "M": ("b", None),
+    "q": ("q", None),
+    "Q": ("Q", None),
+}
+
+
+# struct codes -> little endian numpy types, to decode many records of a type at once
+STRUCT_TO_NUMPY = {
+    "b": "i1",
+    "B": "u1",
+    "e": "<f2",
+    "h": "<i2",
+    "H": "<u2",
+    "i": "<i4",
+    "I": "<u4",
+    "f": "<f4",
+    "d": "<f8",
+    "q": "<i8",
+    "Q": "<u8",
+    "4s": "S4",
+    "16s": "S16",
+    "64s": "S64",
+}
+
+
+def _null_term(raw: bytes) -> str:
+    """decode a fixed size, null padded string field"""
+    return raw.split(b"\0", 1)[0].decode("ascii", errors="ignore")
+
+
+class DataFlashFormat:
+    """layout of a single DataFlash message type, as described by its FMT record"""
+
+    def __init__(self, msg_id: int, name: str, length: int, format_chars: str, columns: list):
+        self.msg_id = msg_id
+        self.name = name
+        self.length = length
+        self.format_chars = format_chars
+        self.columns = columns
+
+        # precompiled struct for the payload (the bytes after the 3 byte header)
+        self.struct = struct.Struct("<" + "".join(FORMAT_TO_STRUCT[char][0] for char in format_chars))
+        # the same payload as a packed numpy record, field f<i> is column i (column names may repeat)
+        self.numpy_dtype = np.dtype(
+            [(f"f{index}", STRUCT_TO_NUMPY[FORMAT_TO_STRUCT[char][0]]) for index, char in enumerate(format_chars)]
+        )
+
+    def __reduce__(self):
+        # struct.Struct can't be pickled, rebuild it when formats are sent to worker processes
+        return DataFlashFormat, (self.msg_id, self.name, self.length, self.format_chars, self.columns)
+
+    def field_index(self, column: str) -> Optional[int]:
+        """position of a column in the unpacked payload, None if the type has no such column"""
+        try:
+            return self.columns.index(column)
+        except ValueError:
+            return None
+
+    def field_divisor(self, column: str) -> float:
+        """divisor that scales a raw column to its unit (e.g. 1e7 for 'L' lat/lng)
+        dividing rather than multiplying by 1e-7 gives the same floats pymavlink returns"""
+        index = self.field_index(column)
+        multiplier = FORMAT_TO_STRUCT[self.format_chars[index]][1] if index is not None else None
+        if multiplier is None:
+            return 1.0
+        return 1 / multiplier
+
+
+class DataFlashReader:
+    """decode only the GPS records of a DataFlash log, without building a message object per record"""
+
+    def __init__(self, path: str, use_mmap: bool = USE_MMAP, formats: Optional[dict] = None):
+        self.path = path
+        # formats already read by another reader of the same file can be handed in to skip the FMT scan
+        self.formats: dict = formats or {}
+        # a MessageIndex of the log, when set the record offsets come from it instead of a search of the file
+        self.index = None
+        self._mmap = None
+        self.position = 0  # offset of the last record handed out, for progress reporting
+
+        with open(self.path, "rb") as bin_file:
+            if use_mmap:
+                try:
+                    # the mapping stays valid after the file object is closed
+                    self._mmap = mmap.mmap(bin_file.fileno(), 0, access=mmap.ACCESS_READ)
+                except ValueError:
+                    # empty files can't be mapped
+                    self._mmap = None
+            self.data = self._mmap if self._mmap is not None else bin_file.read()
+
+        if self._mmap is not None and hasattr(self._mmap, "madvise"):
+            self._mmap.madvise(mmap.MADV_SEQUENTIAL)
+
+        # payloads are unpacked straight out of this view, no per record bytes copies
+        self.view = memoryview(self.data)
+        self.data_len = len(self.data)
+
+    def close(self) -> None:
+        """release the view and unmap the file"""
+        self.view.release()
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def __enter__(self) -> "DataFlashReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _is_record_at(self, offset: int, length: int) -> bool:
+        """a header match is only trusted if the record fits and is followed by another header (or EOF)"""
+        end = offset + length
+        if end > self.data_len:
+            return False
+        if end + HEADER_LENGTH > self.data_len:
+            # not enough bytes left for another record
+            return True
+        return self.data[end] == HEAD1 and self.data[end + 1] == HEAD2
+
+    def read_formats(self) -> dict:
+        """collect every FMT record in the log, keyed by message id"""
+        pattern = HEADER + bytes([FMT_MSG_ID])
+        offset = self.data.find(pattern)
+
+        while offset != -1:
+            if self._is_record_at(offset, FMT_LENGTH):
+                msg_id, length, name, format_chars, columns = FMT_STRUCT.unpack_from(
+                    self.view, offset + HEADER_LENGTH
+                )
+                try:
+                    self.formats[msg_id] = DataFlashFormat(
+                        msg_id,
+                        _null_term(name),
+                        length,
+                        _null_term(format_chars),
+                        _null_term(columns).split(","),
+                    )
+                except KeyError:
+                    logger.warning(f"Unknown format character in FMT record at offset {offset}")
+                offset = self.data.find(pattern, offset + FMT_LENGTH)
+            else:
+                offset = self.data.find(pattern, offset + 1)
+
+        return self.formats
+
+    def find_formats(self, names: list) -> list:
+        """return the formats whose message name is one of `names`"""
+        if not self.formats:
+            self.read_formats()
+        return [fmt for fmt in self.formats.values() if fmt.name in names]
+
+    def _iter_record_offsets(self, fmt: DataFlashFormat, start: int = 0, end: Optional[int] = None) -> Iterator[tuple]:
+        """(offset, format) of every record of a single message type starting in [start, end), in file order
+        a range may begin in the middle of a record, the header search resynchronises on the next real record"""
+        if self.index is not None:
+            for offset in self.index.offsets_for(fmt.msg_id, start, end).tolist():
+                yield offset, fmt
+            return
+
+        pattern = HEADER + bytes([fmt.msg_id])
+        # let the search see a header that starts right before `end` but runs past it
+        search_end = self.data_len if end is None else min(end + HEADER_LENGTH - 1, self.data_len)
+        offset = self.data.find(pattern, start, search_end)
+
+        while offset != -1:
+            if self._is_record_at(offset, fmt.length):
+                yield offset, fmt
+                offset = self.data.find(pattern, offset + fmt.length, search_end)
+            else:
+                offset = self.data.find(pattern, offset + 1, search_end)
+
+    def iter_gps_fixes(
+        self, message_types: list = GPS_MESSAGE_TYPES, byte_range: Optional[tuple] = None
+    ) -> Iterator[tuple]:
+        """yield raw (lat, lng, time_us, alt) tuples of the GPS records in file order
+        time_us/alt are None when the message type has no TimeUS/Alt column
+        records whose GPS instance field `I` is present and not 1 are skipped, like the pymavlink engine
+        :param byte_range: (start, end) to only read the records whose header starts in that part of the file"""
+        gps_formats = [
+            fmt
+            for fmt in self.find_formats(message_types)
+            if fmt.field_index("Lat") is not None and fmt.field_index("Lng") is not None
+        ]
+        if not gps_formats:
+            return
+
+        # column positions are resolved once per message type, not once per record
+        layouts = {fmt.msg_id: _GpsLayout.from_format(fmt) for fmt in gps_formats}
+
+        # merge the per-type offset streams so records come out in file order
+        start, end = byte_range or (0, self.data_len)
+        offsets = heapq.merge(*(self._iter_record_offsets(fmt, start, end) for fmt in gps_formats))
+
+        # counted locally and handed to the profiler once, the loop below is the hot path
+        scanned = dict.fromkeys(layouts, 0)
+        skipped_instance = 0
+        try:
+            for offset, fmt in offsets:
+                self.position = offset
+                layout = layouts[fmt.msg_id]
+                values = layout.payload_struct.unpack_from(self.view, offset + HEADER_LENGTH)
+                scanned[fmt.msg_id] += 1
+
+                # choose the right GPS source
+                if layout.instance_index is not None and values[layout.instance_index] != 1:
+                    skipped_instance += 1
+                    continue
+
+                yield layout.fix(values)
+
+        finally:
+            for fmt in gps_formats:
+                profiler.count(f"messages_scanned.{fmt.name}", scanned[fmt.msg_id])
+            profiler.count("messages_skipped.gps_instance", skipped_instance)
+
+
+    def read_columns(self, fields: dict, byte_range: Optional[tuple] = None) -> dict:
+        """decode some columns of several message types, every record of a type at once
+        :param fields: message name -> column names, e.g. {"ATT": ["Roll"], "BAT": ["Volt"]}
+        :param byte_range: (start, end) to only read the records whose header starts in that part of the file
+        :return message name -> column name -> numpy array with one value per record, in file order;
+            columns are scaled like pymavlink does (e.g. 'L' to degrees), types or columns missing from the log are
+            left out"""
+        start, end = byte_range or (0, self.data_len)
+        data = np.frombuffer(self.data, dtype=np.uint8)
+        columns: dict = {}
+        try:
+            for fmt in self.find_formats(list(fields)):
+                if self.index is not None:
+                    offsets = self.index.offsets_for(fmt.msg_id, start, end)
+                else:
+                    offsets = np.fromiter(
+                        (offset for offset, _ in self._iter_record_offsets(fmt, start, end)), dtype=np.int64
+                    )
+                profiler.count(f"messages_scanned.{fmt.name}", len(offsets))
+
+                type_columns: dict = {}
+                for column in fields[fmt.name]:
+                    index = fmt.field_index(column)
+                    if index is None:
+                        logger.warning(f"{fmt.name} messages of {self.path} have no {column} column")
+                        continue
+                    type_columns[column] = np.empty(len(offsets), dtype=fmt.numpy_dtype[f"f{index}"])
+
+                # gather the payloads chunk by chunk into packed records and keep only the requested columns,
+                # the byte index array of a chunk is 8x the payloads it gathers
+                payload_positions = np.arange(HEADER_LENGTH, HEADER_LENGTH + fmt.struct.size)
+                chunk_records = max(COLUMN_GATHER_BYTES // fmt.struct.size, 1)
+                for first in range(0, len(offsets), chunk_records):
+                    chunk_offsets = offsets[first : first + chunk_records].astype(np.int64)
+                    payloads = data[chunk_offsets[:, None] + payload_positions]
+                    records = payloads.view(fmt.numpy_dtype).ravel()
+                    for column, values in type_columns.items():
+                        values[first : first + len(records)] = records[f"f{fmt.field_index(column)}"]
+
+                columns[fmt.name] = {
+                    column: _scale_column(fmt, column, values) for column, values in type_columns.items()
+                }
+        finally:
+            # the mmap can't be closed while numpy still holds a view of it
+            del data
+
+        return columns
+
+
+class DataFlashStreamParser:
+    """decode the GPS records of a DataFlash log handed over piece by piece, e.g. a log still being written
+    same rules as DataFlashReader: a record counts once the header of the next one has arrived, and records whose
+    GPS instance field `I` is present and not 1 are skipped"""
+
+    def __init__(self, message_types: list = GPS_MESSAGE_TYPES):
+        self.message_types = message_types
+        self.formats: dict = {}
+        self.layouts: dict = {}  # msg id -> _GpsLayout of the GPS message types
+        self.buffer = bytearray()  # bytes not decoded yet, the tail of an unfinished record
+
+    def _add_format(self, offset: int) -> None:
+        msg_id, length, name, format_chars, columns = FMT_STRUCT.unpack_from(self.buffer, offset + HEADER_LENGTH)
+        try:
+            fmt = DataFlashFormat(
+                msg_id, _null_term(name), length, _null_term(format_chars), _null_term(columns).split(",")
+            )
+        except KeyError:
+            logger.warning("Unknown format character in a streamed FMT record")
+            return
+
+        self.formats[msg_id] = fmt
+        if fmt.name in self.message_types and fmt.field_index("Lat") is not None and fmt.field_index("Lng") is not None:
+            self.layouts[msg_id] = _GpsLayout.from_format(fmt)
+
+    def feed(self, data: bytes) -> list:
+        """append the next bytes of the log
+        :return raw (lat, lng, time_us, alt) tuples of the GPS records completed by these bytes, in file order"""
+        self.buffer += data
+        buffer = self.buffer
+        buffer_len = len(buffer)
+        fixes: list = []
+        offset = 0
+
+        while True:
+            offset = buffer.find(HEADER, offset)
+            if offset == -1:
+                # a trailing HEAD1 may be the start of the next header
+                offset = buffer_len - 1 if buffer_len and buffer[-1] == HEAD1 else buffer_len
+                break
+            if offset + HEADER_LENGTH > buffer_len:
+                break
+
+            msg_id = buffer[offset + 2]
+            if msg_id == FMT_MSG_ID:
+                length = FMT_LENGTH
+            elif msg_id in self.formats:
+                length = self.formats[msg_id].length
+            else:
+                offset += 1
+                continue
+
+            end = offset + length
+            if end + 2 > buffer_len:
+                # wait for the rest of the record and the header after it
+                break
+            if buffer[end] != HEAD1 or buffer[end + 1] != HEAD2:
+                offset += 1
+                continue
+
+            if msg_id == FMT_MSG_ID:
+                self._add_format(offset)
+            elif msg_id in self.layouts:
+                layout = self.layouts[msg_id]
+                values = layout.payload_struct.unpack_from(buffer, offset + HEADER_LENGTH)
+                if layout.instance_index is None or values[layout.instance_index] == 1:
+                    fixes.append(layout.fix(values))
+            offset = end
+
+        del buffer[:offset]
+        return fixes
+
+
+def _scale_column(fmt: DataFlashFormat, column: str, values: np.ndarray) -> np.ndarray:
+    """raw record values of a column -> the values pymavlink returns (scaled numbers, decoded strings)"""
+    if values.dtype.kind == "S":
+        return np.array([_null_term(value) for value in values.tolist()], dtype=object)
+
+    divisor = fmt.field_divisor(column)
+    if divisor != 1.0:
+        return values / divisor
+    return values
+
+
+class _GpsLayout(NamedTuple):
+    """column positions and scaling of a GPS message type"""
+
+    payload_struct: struct.Struct
+    lat_index: int
+    lng_index: int
+    instance_index: Optional[int]
+    time_index: Optional[int]
+    alt_index: Optional[int]
+    lat_divisor: float
+    lng_divisor: float
+    alt_divisor: float
+
+    @classmethod
+    def from_format(cls, fmt: DataFlashFormat) -> "_GpsLayout":
+        return cls(
+            fmt.struct,
+            fmt.field_index("Lat"),
+            fmt.field_index("Lng"),
+            fmt.field_index("I"),
+            fmt.field_index("TimeUS"),
+            fmt.field_index("Alt"),
+            fmt.field_divisor("Lat"),
+            fmt.field_divisor("Lng"),
+            fmt.field_divisor("Alt"),
+        )
+
+    def fix(self, values: tuple) -> tuple:
+        """(lat, lng, time_us, alt) out of an unpacked payload"""
+        return (
+            values[self.lat_index] / self.lat_divisor,
+            values[self.lng_index] / self.lng_divisor,
+            None if self.time_index is None else values[self.time_index],
+            None if self.alt_index is None else values[self.alt_index] / self.alt_divisor,
+        )
@@ -0,0 +1,170 @@
+"""columnar representation of a flight track"""
+
+from array import array
+from typing import Iterator, Optional
+
+import numpy as np
+
+from src.utils.configurations import LATITUDE_FIELD, LONGITUDE_FIELD
+
+
+class FlightTrack:
+    """GPS track stored as contiguous NumPy columns (lat/lng in degrees, optional TimeUS and altitude)
+    indexing with an int returns a {"Lat": ..., "Lng": ...} dict, so code written for the list of dicts keeps working
+    """
+
+    def __init__(
+        self,
+        lat: np.ndarray,
+        lng: np.ndarray,
+        time_us: Optional[np.ndarray] = None,
+        alt: Optional[np.ndarray] = None,
+    ):
+        self.lat = np.ascontiguousarray(lat, dtype=np.float64)
+        self.lng = np.ascontiguousarray(lng, dtype=np.float64)
+        self.time_us = None if time_us is None else np.ascontiguousarray(time_us, dtype=np.int64)
+        self.alt = None if alt is None else np.ascontiguousarray(alt, dtype=np.float64)
+
+        if len(self.lat) != len(self.lng):
+            raise ValueError("lat and lng columns must have the same length")
+
+    @classmethod
+    def empty(cls) -> "FlightTrack":
+        """track without any points"""
+        return cls(np.empty(0), np.empty(0))
+
+    @classmethod
+    def from_dict_list(cls, points: list) -> "FlightTrack":
+        """build a track from the legacy list of {"Lat": ..., "Lng": ...} dicts"""
+        return cls(
+            np.fromiter((point[LATITUDE_FIELD] for point in points), dtype=np.float64, count=len(points)),
+            np.fromiter((point[LONGITUDE_FIELD] for point in points), dtype=np.float64, count=len(points)),
+        )
+
+    @classmethod
+    def concatenate(cls, tracks: list) -> "FlightTrack":
+        """join tracks end to end, optional columns are kept only if every track has them"""
+        if not tracks:
+            return cls.empty()
+
+        def join(column: str) -> Optional[np.ndarray]:
+            columns = [getattr(track, column) for track in tracks]
+            if any(values is None for values in columns):
+                return None
+            return np.concatenate(columns)
+
+        return cls(join("lat"), join("lng"), join("time_us"), join("alt"))
+
+    def __len__(self) -> int:
+        return len(self.lat)
+
+    def __getitem__(self, index):
+        # slices and index arrays select a sub-track
+        if isinstance(index, (slice, np.ndarray)):
+            return FlightTrack(
+                self.lat[index],
+                self.lng[index],
+                None if self.time_us is None else self.time_us[index],
+                None if self.alt is None else self.alt[index],
+            )
+        return {LATITUDE_FIELD: float(self.lat[index]), LONGITUDE_FIELD: float(self.lng[index])}
+
+    def __iter__(self) -> Iterator[dict]:
+        for lat, lng in zip(self.lat.tolist(), self.lng.tolist()):
+            yield {LATITUDE_FIELD: lat, LONGITUDE_FIELD: lng}
+
+    def window(self, time_range: Optional[tuple] = None, bbox: Optional[tuple] = None) -> "FlightTrack":
+        """the points inside a TimeUS range and/or a bounding box, same rules as ReadeBinFile.read_track:
+        the track ends at the first point after the end of the time range, points without TimeUS never match
+        a time range, and points repeating the previous kept point are dropped
+        :param time_range: (start_us, end_us), either side may be None
+        :param bbox: (min_lat, min_lng, max_lat, max_lng) in degrees"""
+        keep = np.ones(len(self), dtype=bool)
+
+        if time_range is not None:
+            if self.time_us is None:
+                return self[:0]
+            start_us, end_us = time_range
+            if start_us is not None:
+                keep &= self.time_us >= start_us
+            if end_us is not None:
+                after_end = np.flatnonzero(self.time_us > end_us)
+                if len(after_end):
+                    keep[after_end[0] :] = False
+
+        if bbox is not None:
+            min_lat, min_lng, max_lat, max_lng = bbox
+            keep &= (self.lat >= min_lat) & (self.lat <= max_lat) & (self.lng >= min_lng) & (self.lng <= max_lng)
+
+        track = self[np.flatnonzero(keep)]
+        # removed points can leave two equal points next to each other
+        repeated = np.zeros(len(track), dtype=bool)
+        repeated[1:] = (track.lat[1:] == track.lat[:-1]) & (track.lng[1:] == track.lng[:-1])
+        return track[np.flatnonzero(~repeated)] if repeated.any() else track
+
+    def to_dict_list(self) -> list:
+        """the legacy list of dicts view of the track"""
+        return list(self)
+
+    def save(self, file) -> None:
+        """write the columns to an uncompressed .npz (path or binary file object)"""
+        columns = {"lat": self.lat, "lng": self.lng}
+        if self.time_us is not None:
+            columns["time_us"] = self.time_us
+        if self.alt is not None:
+            columns["alt"] = self.alt
+        np.savez(file, **columns)
+
+    @classmethod
+    def load(cls, file) -> "FlightTrack":
+        """read a track written by save()"""
+        with np.load(file) as columns:
+            return cls(
+                columns["lat"],
+                columns["lng"],
+                columns["time_us"] if "time_us" in columns else None,
+                columns["alt"] if "alt" in columns else None,
+            )
+
+    @property
+    def nbytes(self) -> int:
+        """memory used by the columns"""
+        return sum(column.nbytes for column in (self.lat, self.lng, self.time_us, self.alt) if column is not None)
+
+
+class FlightTrackBuilder:
+    """append points one by one into compact typed buffers, then freeze them into a FlightTrack"""
+
+    def __init__(self):
+        self._lat = array("d")
+        self._lng = array("d")
+        self._time_us = array("q")
+        self._alt = array("d")
+        # optional columns are only kept if every point provides them
+        self._has_time = True
+        self._has_alt = True
+
+    def __len__(self) -> int:
+        return len(self._lat)
+
+    def append(self, lat: float, lng: float, time_us: Optional[int] = None, alt: Optional[float] = None) -> None:
+        self._lat.append(lat)
+        self._lng.append(lng)
+
+        if time_us is None:
+            self._has_time = False
+        elif self._has_time:
+            self._time_us.append(time_us)
+
+        if alt is None:
+            self._has_alt = False
+        elif self._has_alt:
+            self._alt.append(alt)
+
+    def build(self) -> FlightTrack:
+        return FlightTrack(
+            np.frombuffer(self._lat, dtype=np.float64),
+            np.frombuffer(self._lng, dtype=np.float64),
+            np.frombuffer(self._time_us, dtype=np.int64) if self._has_time and len(self) else None,
+            np.frombuffer(self._alt, dtype=np.float64) if self._has_alt and len(self) else None,
+        )
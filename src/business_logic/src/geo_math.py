@@ -0,0 +1,106 @@
+"""vectorized geometry helpers for flight tracks"""
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371
+
+
+def haversine_distances(lat: np.ndarray, lng: np.ndarray) -> np.ndarray:
+    """length in kilometers of every segment of a track, in one NumPy pass
+    :return array with len(lat) - 1 distances, segment i goes from point i to point i + 1"""
+    lat_rad = np.radians(lat)
+    lng_rad = np.radians(lng)
+
+    dlat = np.diff(lat_rad)
+    dlng = np.diff(lng_rad)
+    cos_lat = np.cos(lat_rad)
+
+    a = np.sin(dlat / 2) ** 2 + cos_lat[:-1] * cos_lat[1:] * np.sin(dlng / 2) ** 2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+    return EARTH_RADIUS_KM * c
+
+
+def cumulative_distances(lat: np.ndarray, lng: np.ndarray) -> np.ndarray:
+    """distance in kilometers from the first point to every point of the track (starts with 0)"""
+    distances = np.zeros(len(lat), dtype=np.float64)
+    if len(lat) > 1:
+        np.cumsum(haversine_distances(lat, lng), out=distances[1:])
+    return distances
+
+
+def marker_indices(lat: np.ndarray, lng: np.ndarray, marker_distance_km: float) -> np.ndarray:
+    """indices of the points where a marker is placed every `marker_distance_km` along the track
+    a marker goes on the first point at least `marker_distance_km` past the previous marker (or the start)"""
+    if len(lat) < 2:
+        return np.empty(0, dtype=np.intp)
+    if marker_distance_km <= 0:
+        return np.arange(1, len(lat), dtype=np.intp)
+
+    distances = cumulative_distances(lat, lng)
+    indices: list = []
+    last_marker = 0
+
+    # one binary search per marker instead of one Python iteration per point
+    while True:
+        index = int(np.searchsorted(distances, distances[last_marker] + marker_distance_km, side="left"))
+        if index >= len(distances):
+            break
+        indices.append(index)
+        last_marker = index
+
+    return np.asarray(indices, dtype=np.intp)
+
+
+def _project_to_meters(lat: np.ndarray, lng: np.ndarray) -> tuple:
+    """equirectangular projection around the track's mean latitude, good enough for tolerances of meters"""
+    lat_rad = np.radians(lat)
+    lng_rad = np.radians(lng)
+    earth_radius_m = EARTH_RADIUS_KM * 1000
+    x = earth_radius_m * lng_rad * np.cos(np.mean(lat_rad))
+    y = earth_radius_m * lat_rad
+    return x, y
+
+
+def _segment_distances(x: np.ndarray, y: np.ndarray, start: int, end: int) -> np.ndarray:
+    """distance of the points strictly between start and end to the segment start-end"""
+    px = x[start + 1 : end] - x[start]
+    py = y[start + 1 : end] - y[start]
+    dx = x[end] - x[start]
+    dy = y[end] - y[start]
+    length_squared = dx * dx + dy * dy
+
+    if length_squared == 0:
+        return np.hypot(px, py)
+
+    t = np.clip((px * dx + py * dy) / length_squared, 0, 1)
+    return np.hypot(px - t * dx, py - t * dy)
+
+
+def simplify_indices(lat: np.ndarray, lng: np.ndarray, tolerance_m: float) -> np.ndarray:
+    """Douglas-Peucker simplification of a track
+    uses an explicit stack instead of recursion so tracks of millions of points can't hit the recursion limit
+    :return sorted indices of the points to keep, always including the first and the last point"""
+    point_count = len(lat)
+    if point_count < 3 or tolerance_m <= 0:
+        return np.arange(point_count, dtype=np.intp)
+
+    x, y = _project_to_meters(lat, lng)
+    keep = np.zeros(point_count, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, point_count - 1)]
+
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+
+        distances = _segment_distances(x, y, start, end)
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance_m:
+            split = start + 1 + farthest
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+
+    return np.flatnonzero(keep)
@@ -0,0 +1,233 @@
+"""live flight tracks: the fixes of a log still being written or of a MAVLink UDP stream, batched for the map"""
+
+import threading
+import time
+from typing import Callable, Optional
+
+import numpy as np
+
+from src.business_logic.src.dataflash_reader import DataFlashStreamParser
+from src.business_logic.src.flight_track import FlightTrack
+from src.utils.configurations import (
+    LIVE_BUFFER_SIZE,
+    LIVE_MAVLINK_MESSAGE_TYPES,
+    LIVE_POLL_INTERVAL_S,
+    LIVE_READ_BYTES,
+    LIVE_REPLAY_RATE_HZ,
+    LIVE_UPDATE_INTERVAL_S,
+)
+from src.utils.instrumentation import profiler
+from src.utils.logger_factory import get_module_logger
+
+logger = get_module_logger(__name__)
+
+GPS_NO_FIX = 2  # GPS_RAW_INT fix_type below this has no position
+
+
+class FixRingBuffer:
+    """the newest `capacity` fixes as NumPy columns, older fixes are overwritten"""
+
+    def __init__(self, capacity: int = LIVE_BUFFER_SIZE):
+        self.capacity = capacity
+        self._lat = np.zeros(capacity)
+        self._lng = np.zeros(capacity)
+        self._time_us = np.zeros(capacity, dtype=np.int64)
+        self._alt = np.zeros(capacity)
+        self._lock = threading.Lock()
+        self.total = 0  # fixes appended since the start, including the overwritten ones
+
+    def __len__(self) -> int:
+        return min(self.total, self.capacity)
+
+    def extend(self, track: FlightTrack) -> None:
+        """append the fixes of a track, missing TimeUS/altitude are stored as 0 / NaN"""
+        # only the newest `capacity` fixes of a longer track would survive
+        skipped = max(len(track) - self.capacity, 0)
+        track = track[skipped:]
+        with self._lock:
+            self.total += skipped
+            positions = (self.total + np.arange(len(track))) % self.capacity
+            self._lat[positions] = track.lat
+            self._lng[positions] = track.lng
+            self._time_us[positions] = 0 if track.time_us is None else track.time_us
+            self._alt[positions] = np.nan if track.alt is None else track.alt
+            self.total += len(track)
+
+    def track(self) -> FlightTrack:
+        """the buffered fixes, oldest first"""
+        with self._lock:
+            positions = (self.total - len(self) + np.arange(len(self))) % self.capacity
+            return FlightTrack(self._lat[positions], self._lng[positions], self._time_us[positions], self._alt[positions])
+
+
+class DataFlashTailSource:
+    """the GPS fixes appended to a DataFlash (.bin) log while the autopilot or a logger writes it"""
+
+    def __init__(self, path: str, poll_interval_s: float = LIVE_POLL_INTERVAL_S):
+        self.path = path
+        self.poll_interval_s = poll_interval_s
+        self.parser = DataFlashStreamParser()
+        self.file = open(path, "rb")
+
+    def read_new_fixes(self) -> list:
+        """raw (lat, lng, time_us, alt) fixes written since the last call, waits a poll interval if there are none"""
+        data = self.file.read(LIVE_READ_BYTES)
+        if not data:
+            time.sleep(self.poll_interval_s)
+            return []
+        return self.parser.feed(data)
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class MavlinkSource:
+    """the position messages of a MAVLink stream: a UDP endpoint ("udpin:127.0.0.1:14550") or a .tlog being written"""
+
+    def __init__(
+        self,
+        address: str,
+        message_types: list = LIVE_MAVLINK_MESSAGE_TYPES,
+        poll_interval_s: float = LIVE_POLL_INTERVAL_S,
+    ):
+        from pymavlink import mavutil
+
+        self.address = address
+        self.message_types = message_types
+        self.poll_interval_s = poll_interval_s
+        self.connection = mavutil.mavlink_connection(address, robust_parsing=True)
+
+    def read_new_fixes(self) -> list:
+        """raw (lat, lng, time_us, alt) fixes received since the last call, waits up to a poll interval for one"""
+        fixes: list = []
+        msg = self.connection.recv_match(type=self.message_types, blocking=True, timeout=self.poll_interval_s)
+        while msg is not None:
+            fix = _mavlink_fix(msg)
+            if fix is not None:
+                fixes.append(fix)
+            msg = self.connection.recv_match(type=self.message_types, blocking=False)
+        return fixes
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+def _mavlink_fix(msg) -> Optional[tuple]:
+    """(lat, lng, time_us, alt) of a GLOBAL_POSITION_INT or GPS_RAW_INT message, in degrees and meters"""
+    if msg.get_type() == "GPS_RAW_INT":
+        if msg.fix_type < GPS_NO_FIX:
+            return None
+        time_us = msg.time_usec
+    else:
+        time_us = msg.time_boot_ms * 1000
+    return msg.lat / 10000000.0, msg.lon / 10000000.0, time_us, msg.alt / 1000.0
+
+
+def open_live_source(source: str):
+    """DataFlashTailSource for a .bin log, MavlinkSource for anything else (.tlog, udpin:, tcp:, serial ports)"""
+    if source.lower().endswith(".bin"):
+        return DataFlashTailSource(source)
+    return MavlinkSource(source)
+
+
+class LiveTrackFeed:
+    """reads a live source on a background thread into a FixRingBuffer
+    new fixes are handed to on_fixes as one FlightTrack batch at most every update_interval_s, so the map gets a few
+    batched updates per second whatever the fix rate; consecutive repeated positions are dropped like read_track"""
+
+    def __init__(
+        self,
+        source,
+        on_fixes: Callable[[FlightTrack], None],
+        buffer: Optional[FixRingBuffer] = None,
+        update_interval_s: float = LIVE_UPDATE_INTERVAL_S,
+    ):
+        self.source = source
+        self.on_fixes = on_fixes
+        self.buffer = buffer if buffer is not None else FixRingBuffer()
+        self.update_interval_s = update_interval_s
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def start(self) -> "LiveTrackFeed":
+        self.thread = threading.Thread(target=self._run, name="live-feed", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        """stop reading and close the source, the fixes not handed over yet are dropped"""
+        self.stop_event.set()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join()
+
+    @property
+    def running(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def _run(self) -> None:
+        pending: list = []
+        previous_point = None
+        last_update = 0.0
+        try:
+            while not self.stop_event.is_set():
+                for fix in self.source.read_new_fixes():
+                    point = (fix[0], fix[1])
+                    if point != previous_point:
+                        pending.append(fix)
+                        previous_point = point
+
+                now = time.monotonic()
+                if pending and now - last_update >= self.update_interval_s:
+                    self._hand_over(pending)
+                    pending = []
+                    last_update = now
+
+        except Exception as e:
+            logger.error(f"Live feed stopped: {e}")
+
+        finally:
+            self.source.close()
+
+    def _hand_over(self, fixes: list) -> None:
+        lat, lng, time_us, alt = zip(*fixes)
+        has_time = all(value is not None for value in time_us)
+        has_alt = all(value is not None for value in alt)
+        track = FlightTrack(
+            np.array(lat), np.array(lng), np.array(time_us) if has_time else None, np.array(alt) if has_alt else None
+        )
+
+        self.buffer.extend(track)
+        profiler.count("live.fixes", len(track))
+        with profiler.span("live.update"):
+            self.on_fixes(track)
+
+
+def replay_track(
+    track: FlightTrack,
+    address: str,
+    rate_hz: float = LIVE_REPLAY_RATE_HZ,
+    stop_event: Optional[threading.Event] = None,
+) -> int:
+    """send a track as GLOBAL_POSITION_INT messages to a MAVLink endpoint (e.g. "udpout:127.0.0.1:14550"),
+    rate_hz fixes per second, to try the live mode without an aircraft
+    :return the number of fixes sent"""
+    from pymavlink import mavutil
+
+    connection = mavutil.mavlink_connection(address, source_system=1)
+    sent = 0
+    try:
+        time_us = track.time_us if track.time_us is not None else np.arange(len(track)) * int(1e6 / rate_hz)
+        alt = track.alt if track.alt is not None else np.zeros(len(track))
+        for lat, lng, fix_time_us, fix_alt in zip(track.lat.tolist(), track.lng.tolist(), time_us.tolist(), alt.tolist()):
+            if stop_event is not None and stop_event.is_set():
+                break
+            connection.mav.global_position_int_send(
+                int(fix_time_us // 1000) % 2**32, round(lat * 1e7), round(lng * 1e7), round(fix_alt * 1000), 0, 0, 0, 0, 0
+            )
+            sent += 1
+            if rate_hz > 0:
+                time.sleep(1 / rate_hz)
+    finally:
+        connection.close()
+
+    return sent
@@ -0,0 +1,268 @@
+"""index of the record offsets of a DataFlash log per message type, persisted next to the log"""
+
+import os
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from src.business_logic.src.dataflash_reader import FMT_LENGTH, FMT_MSG_ID, HEAD1, HEAD2, HEADER_LENGTH
+from src.utils.configurations import INDEX_CHECKPOINT_BYTES, INDEX_SCAN_BLOCK_BYTES, MESSAGE_INDEX_SUFFIX
+from src.utils.instrumentation import profiler
+from src.utils.logger_factory import get_module_logger
+
+logger = get_module_logger(__name__)
+
+# bump when the index layout or the record validation changes so stale sidecars are rebuilt
+INDEX_VERSION = 2
+
+
+def index_path_for(log_path: str) -> Path:
+    """the sidecar file of a log, e.g. flight.bin -> flight.bin.idx.npz"""
+    return Path(f"{log_path}{MESSAGE_INDEX_SUFFIX}")
+
+
+def _offset_dtype(file_size: int) -> np.dtype:
+    """4 bytes per record offset unless the log is too big for them"""
+    return np.dtype(np.uint32) if file_size < 2**32 else np.dtype(np.int64)
+
+
+class MessageIndex:
+    """offsets of every record of a log per message id, plus (offset, TimeUS) checkpoints every
+    INDEX_CHECKPOINT_BYTES. Built with one vectorised pass over the log, later reads of any message type or
+    time window seek straight to their records instead of searching the whole file.
+    A record is indexed under the same rules as DataFlashReader: its header must be followed by another
+    header (or EOF), and records of one type never overlap."""
+
+    def __init__(
+        self,
+        offsets: dict,
+        checkpoint_offsets: np.ndarray,
+        checkpoint_time_us: np.ndarray,
+        file_size: int,
+        file_mtime_ns: int,
+    ):
+        self.offsets = offsets  # message id -> sorted array of record offsets (uint32 for logs under 4 GB)
+        self.checkpoint_offsets = checkpoint_offsets
+        self.checkpoint_time_us = checkpoint_time_us
+        self.file_size = file_size
+        self.file_mtime_ns = file_mtime_ns
+
+    @classmethod
+    def build(cls, reader, block_bytes: int = INDEX_SCAN_BLOCK_BYTES) -> "MessageIndex":
+        """scan the log of a DataFlashReader once"""
+        formats = reader.formats or reader.read_formats()
+        stat = os.stat(reader.path)
+
+        lengths_by_id = np.zeros(256, dtype=np.int64)
+        timed_ids = np.zeros(256, dtype=bool)
+        for fmt in formats.values():
+            lengths_by_id[fmt.msg_id] = fmt.length
+            # the checkpoints need a TimeUS stored as the first (uint64) column
+            timed_ids[fmt.msg_id] = bool(fmt.columns) and fmt.columns[0] == "TimeUS" and fmt.format_chars[0] == "Q"
+        lengths_by_id[FMT_MSG_ID] = FMT_LENGTH
+
+        data = np.frombuffer(reader.data, dtype=np.uint8)
+        try:
+            offsets = cls._scan(data, lengths_by_id, block_bytes, _offset_dtype(len(data)))
+            checkpoint_offsets, checkpoint_time_us = cls._checkpoints(data, offsets, timed_ids)
+        finally:
+            # the mmap can't be closed while numpy still holds a view of it
+            del data
+
+        profiler.count("index.records", sum(len(type_offsets) for type_offsets in offsets.values()))
+        return cls(offsets, checkpoint_offsets, checkpoint_time_us, stat.st_size, stat.st_mtime_ns)
+
+    @staticmethod
+    def _scan(data: np.ndarray, lengths_by_id: np.ndarray, block_bytes: int, offset_dtype: np.dtype) -> dict:
+        """offsets of the valid records per message id
+        the header candidates are validated block by block, so the temporary arrays are bounded by the block size
+        and only the (compact) offsets of the whole log are kept"""
+        data_len = len(data)
+        if data_len < HEADER_LENGTH:
+            return {}
+
+        type_blocks: dict = {}  # message id -> offset arrays of every block
+        for block_start in range(0, data_len - 2, block_bytes):
+            block_end = min(block_start + block_bytes, data_len - 2)
+            block = data[block_start : block_end + 1]
+            candidates = np.flatnonzero((block[:-1] == HEAD1) & (block[1:] == HEAD2)) + block_start
+
+            msg_ids = data[candidates + 2]
+            lengths = lengths_by_id[msg_ids]
+            ends = candidates + lengths
+
+            # same check as DataFlashReader._is_record_at: fits in the file and is followed by a header or EOF
+            valid = (lengths > 0) & (ends <= data_len)
+            followed = valid & (ends + HEADER_LENGTH <= data_len)
+            followed_ends = ends[followed]
+            valid[followed] = (data[followed_ends] == HEAD1) & (data[followed_ends + 1] == HEAD2)
+
+            candidates, msg_ids = candidates[valid], msg_ids[valid]
+            order = np.argsort(msg_ids, kind="stable")
+            type_ids, type_starts = np.unique(msg_ids[order], return_index=True)
+            for msg_id, type_offsets in zip(type_ids.tolist(), np.split(candidates[order], type_starts[1:])):
+                type_blocks.setdefault(msg_id, []).append(type_offsets.astype(offset_dtype))
+
+        return {
+            msg_id: _drop_overlapping(np.concatenate(blocks), int(lengths_by_id[msg_id]))
+            for msg_id, blocks in type_blocks.items()
+        }
+
+    @staticmethod
+    def _checkpoints(data: np.ndarray, offsets: dict, timed_ids: np.ndarray) -> tuple:
+        """the first timed record of every INDEX_CHECKPOINT_BYTES block and its TimeUS"""
+        # the first record of each type per block, then the first of those per block
+        firsts = [
+            type_offsets[np.unique(type_offsets // INDEX_CHECKPOINT_BYTES, return_index=True)[1]].astype(np.int64)
+            for msg_id, type_offsets in offsets.items()
+            if timed_ids[msg_id]
+        ]
+        if not firsts:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.uint64)
+
+        timed = np.sort(np.concatenate(firsts))
+        _, first_in_block = np.unique(timed // INDEX_CHECKPOINT_BYTES, return_index=True)
+        checkpoint_offsets = timed[first_in_block]
+        time_bytes = data[checkpoint_offsets[:, None] + np.arange(HEADER_LENGTH, HEADER_LENGTH + 8)]
+        checkpoint_time_us = np.ascontiguousarray(time_bytes).view("<u8").ravel()
+        return checkpoint_offsets, checkpoint_time_us
+
+    def subset(self, msg_ids: list, start: int = 0, end: Optional[int] = None) -> "MessageIndex":
+        """the offsets of some message types inside [start, end), e.g. for a worker reading one chunk of the log"""
+        offsets = {msg_id: self.offsets_for(msg_id, start, end) for msg_id in msg_ids if msg_id in self.offsets}
+        return MessageIndex(
+            offsets, self.checkpoint_offsets, self.checkpoint_time_us, self.file_size, self.file_mtime_ns
+        )
+
+    @classmethod
+    def load(cls, log_path: str) -> Optional["MessageIndex"]:
+        """the sidecar index of a log, None if missing, unreadable or built for another version of the log"""
+        index_path = index_path_for(log_path)
+        if not index_path.exists():
+            return None
+
+        try:
+            with np.load(index_path) as index_file:
+                version, file_size, file_mtime_ns = index_file["meta"].tolist()
+                stat = os.stat(log_path)
+                if (version, file_size, file_mtime_ns) != (INDEX_VERSION, stat.st_size, stat.st_mtime_ns):
+                    return None
+
+                offset_dtype = _offset_dtype(file_size)
+                offsets = {
+                    msg_id: _offsets_from_deltas(first, index_file[f"deltas_{msg_id}"], offset_dtype)
+                    for msg_id, first in index_file["first_offsets"].tolist()
+                }
+                return cls(
+                    offsets,
+                    index_file["checkpoint_offsets"],
+                    index_file["checkpoint_time_us"],
+                    file_size,
+                    file_mtime_ns,
+                )
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable message index {index_path}: {e}")
+            return None
+
+    def save(self, log_path: str) -> None:
+        """write the sidecar next to the log"""
+        index_path = index_path_for(log_path)
+        # the first offset of every type, then the gaps between its records
+        first_offsets = np.array(
+            [(msg_id, type_offsets[0]) for msg_id, type_offsets in self.offsets.items()], dtype=np.int64
+        ).reshape(-1, 2)
+        arrays = {f"deltas_{msg_id}": _offset_deltas(type_offsets) for msg_id, type_offsets in self.offsets.items()}
+
+        # write to a temporary file first so a concurrent reader never sees a half written index
+        temp_path = index_path.with_name(f"{index_path.name}.{os.getpid()}.tmp")
+        with open(temp_path, "wb") as index_file:
+            np.savez(
+                index_file,
+                meta=np.array([INDEX_VERSION, self.file_size, self.file_mtime_ns], dtype=np.int64),
+                checkpoint_offsets=self.checkpoint_offsets,
+                checkpoint_time_us=self.checkpoint_time_us,
+                first_offsets=first_offsets,
+                **arrays,
+            )
+        os.replace(temp_path, index_path)
+
+    @classmethod
+    def load_or_build(cls, reader) -> "MessageIndex":
+        """the sidecar index of the reader's log, built and saved on the first read"""
+        with profiler.span("index.load"):
+            index = cls.load(reader.path)
+        if index is not None:
+            return index
+
+        with profiler.span("index.build"):
+            index = cls.build(reader)
+        try:
+            index.save(reader.path)
+        except OSError as e:
+            # e.g. a log on a read-only share, the index is still used for this read
+            logger.warning(f"Could not save the message index of {reader.path}: {e}")
+
+        logger.info(f"Indexed {sum(map(len, index.offsets.values()))} records of {reader.path}")
+        return index
+
+    def offsets_for(self, msg_id: int, start: int = 0, end: Optional[int] = None) -> np.ndarray:
+        """offsets of the records of a message type whose header starts in [start, end)"""
+        type_offsets = self.offsets.get(msg_id)
+        if type_offsets is None:
+            return np.zeros(0, dtype=_offset_dtype(self.file_size))
+        first = np.searchsorted(type_offsets, start, side="left")
+        last = len(type_offsets) if end is None else np.searchsorted(type_offsets, end, side="left")
+        return type_offsets[first:last]
+
+    def count(self, msg_id: int) -> int:
+        """number of records of a message type"""
+        return len(self.offsets.get(msg_id, ()))
+
+    def byte_range_for_time(self, start_us: Optional[int] = None, end_us: Optional[int] = None) -> tuple:
+        """(start, end) byte range holding every record with start_us <= TimeUS <= end_us
+        the range is a superset (it is bounded by checkpoints), and assumes TimeUS grows through the log"""
+        start = 0
+        end = self.file_size
+        if start_us is not None:
+            # the last checkpoint before start_us: records at start_us may also sit before a checkpoint equal to it
+            checkpoint = np.searchsorted(self.checkpoint_time_us, start_us, side="left") - 1
+            if checkpoint >= 0:
+                start = int(self.checkpoint_offsets[checkpoint])
+        if end_us is not None:
+            checkpoint = np.searchsorted(self.checkpoint_time_us, end_us, side="right")
+            if checkpoint < len(self.checkpoint_offsets):
+                end = int(self.checkpoint_offsets[checkpoint])
+        return start, max(start, end)
+
+
+def _drop_overlapping(type_offsets: np.ndarray, length: int) -> np.ndarray:
+    """keep the records of one type that don't start inside the previous kept one, first come first kept
+    (a header look-alike inside a payload that is also followed by a header)"""
+    if len(type_offsets) < 2 or np.all(np.diff(type_offsets) >= length):
+        return type_offsets
+
+    kept = []
+    next_free = -1
+    for offset in type_offsets.tolist():
+        if offset >= next_free:
+            kept.append(offset)
+            next_free = offset + length
+    return np.array(kept, dtype=type_offsets.dtype)
+
+
+def _offset_deltas(type_offsets: np.ndarray) -> np.ndarray:
+    """gaps between the records of a type, 2 bytes each when they all fit (records of a type are rarely far apart)"""
+    deltas = np.diff(type_offsets.astype(np.int64))
+    for dtype in (np.uint16, np.uint32):
+        if not len(deltas) or deltas.max() <= np.iinfo(dtype).max:
+            return deltas.astype(dtype)
+    return deltas
+
+
+def _offsets_from_deltas(first: int, deltas: np.ndarray, offset_dtype: np.dtype) -> np.ndarray:
+    offsets = np.empty(len(deltas) + 1, dtype=np.int64)
+    offsets[0] = first
+    np.cumsum(deltas, dtype=np.int64, out=offsets[1:])
+    offsets[1:] += first
+    return offsets.astype(offset_dtype)
@@ -1,63 +1,382 @@
 """module to read .bin files and extract GPS coordinates"""
 
+import os
+import threading
+import time
 import traceback
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterator, NamedTuple, Optional
 
-from pymavlink import mavutil
+import numpy as np
 
-from src.utils.configurations import MSG_NUMBER_TO_SHOW
-from src.utils.logger_factory import logger
+from src.business_logic.src.dataflash_reader import DataFlashReader
+from src.business_logic.src.flight_track import FlightTrack, FlightTrackBuilder
+from src.business_logic.src.message_index import MessageIndex
+from src.business_logic.src.telemetry import Telemetry, parse_telemetry_spec
+from src.business_logic.src.track_cache import TrackCache
+from src.utils.configurations import (
+    DATAFLASH_ENGINE,
+    GPS_MESSAGE_TYPES,
+    MESSAGE_INDEX_ENABLED,
+    MSG_NUMBER_TO_SHOW,
+    PARALLEL_CHUNKS_PER_WORKER,
+    PARALLEL_MIN_BYTES,
+    PARSE_WORKERS,
+    POINT_BATCH_SIZE,
+    PYMAVLINK_ENGINE,
+    READER_ENGINE,
+    READ_TRACK_BATCH_SIZE,
+    TRACK_CACHE_ENABLED,
+    USE_MMAP,
+)
+from src.utils import configurations
+from src.utils.instrumentation import profiler
+from src.utils.logger_factory import get_module_logger
+
+logger = get_module_logger(__name__)
+
+
+class ParseProgress(NamedTuple):
+    """snapshot of a running parse, handed to the progress callback of ReadeBinFile.read_track"""
+
+    bytes_read: int
+    total_bytes: int
+    points: int
+    elapsed_s: float
+
+    @property
+    def fraction(self) -> float:
+        return self.bytes_read / self.total_bytes if self.total_bytes else 0.0
+
+    @property
+    def eta_s(self) -> Optional[float]:
+        """estimated seconds left, None until something was read"""
+        if not self.bytes_read:
+            return None
+        return self.elapsed_s * (self.total_bytes - self.bytes_read) / self.bytes_read
 
 
 class ReadeBinFile:
     """read file in .bin format and extract GPS coordinates"""
 
-    def __init__(self, path: str):
+    def __init__(
+        self,
+        path: str,
+        engine: str = READER_ENGINE,
+        use_mmap: bool = USE_MMAP,
+        workers: int = PARSE_WORKERS,
+        use_cache: bool = TRACK_CACHE_ENABLED,
+        use_index: bool = MESSAGE_INDEX_ENABLED,
+        raise_errors: bool = False,
+    ):
+        """:param raise_errors: re-raise the errors of opening and reading the log instead of logging them and
+            returning an empty result, for callers that must tell a broken log from one without GPS"""
         self.path = path
+        self.engine = engine
+        self.use_mmap = use_mmap
+        self.workers = workers
+        self.use_index = use_index
+        self.raise_errors = raise_errors
+        self.track_cache = TrackCache() if use_cache else None
+        self.mavlink_connection = None
+        self.dataflash_reader = None
+        self.formats: dict = {}  # FMT records read by the dataflash engine, kept when the log is reopened
 
-        try:
-            self.mavlink_connection = mavutil.mavlink_connection(self.path, robust_parsing=True)
-        except Exception as e:
-            print(f"error connect mavlink: {e}")
+        if self.engine not in (DATAFLASH_ENGINE, PYMAVLINK_ENGINE):
+            raise ValueError(f"Unknown reader engine: {self.engine}")
+        self._open()
+
+    def _open(self) -> None:
+        """open the log with the selected engine, errors are logged and leave the engine closed"""
+        if self.engine == DATAFLASH_ENGINE:
+            try:
+                self.dataflash_reader = DataFlashReader(self.path, use_mmap=self.use_mmap, formats=self.formats)
+            except Exception as e:
+                logger.error(f"error open dataflash reader: {e}")
+                if self.raise_errors:
+                    raise
+
+        else:
+            try:
+                # pymavlink takes longer to import than the dataflash engine takes to read a small log
+                from pymavlink import mavutil
+
+                self.mavlink_connection = mavutil.mavlink_connection(self.path, robust_parsing=True)
+            except Exception as e:
+                logger.error(f"error connect mavlink: {e}")
+                if self.raise_errors:
+                    raise
+
+    def _reopen(self) -> None:
+        """every read method closes the log when it is done, the next read opens it again from the start"""
+        if self.dataflash_reader is None and self.mavlink_connection is None:
+            self._open()
+
+    def close(self) -> None:
+        """release the file mapping of the dataflash engine or the log file of pymavlink"""
+        if self.dataflash_reader is not None:
+            self.formats = self.dataflash_reader.formats
+            self.dataflash_reader.close()
+            self.dataflash_reader = None
+        if self.mavlink_connection is not None:
+            # a pymavlink log can't be read twice, it is reopened by the next read
+            if hasattr(self.mavlink_connection, "close"):
+                self.mavlink_connection.close()
             self.mavlink_connection = None
 
-    def process_bin_file(self, msg_number_to_show: int = MSG_NUMBER_TO_SHOW) -> list:
-        """get path to .bin file
-        :return list of dictionaries for each flight"""
+    def __enter__(self) -> "ReadeBinFile":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _bytes_read(self) -> int:
+        """how far into the file the selected engine got"""
+        if self.dataflash_reader is not None:
+            return self.dataflash_reader.position
+        return getattr(self.mavlink_connection, "offset", 0)
 
-        if self.mavlink_connection is None:
-            print("No mavlink connection available")
-            return []
+    def _ensure_index(self) -> None:
+        """load (or build on the first read) the message index of the log, dataflash engine only"""
+        if self.use_index and self.dataflash_reader is not None and self.dataflash_reader.index is None:
+            self.dataflash_reader.index = MessageIndex.load_or_build(self.dataflash_reader)
 
+    def _load_cached_track(self) -> Optional[FlightTrack]:
+        """the cached track of the log, None on a miss or when the cache can't be read"""
         try:
-            lat_lng_list: list = []
-            previous_point = None
-            msg_count = 0
-            run = True
+            return self.track_cache.load(self.path)
+        except OSError as e:
+            logger.warning(f"Could not read the track cache for {self.path}: {e}")
+            return None
 
+    def _store_cached_track(self, track: FlightTrack) -> None:
+        """cache the parsed track, a cache that can't be written (read-only or full disk) doesn't fail the read"""
+        try:
+            self.track_cache.store(self.path, track)
+        except OSError as e:
+            logger.warning(f"Could not store the track of {self.path} in the track cache: {e}")
+
+    def _iter_gps_fixes(self, byte_range: Optional[tuple] = None) -> Iterator[tuple]:
+        """yield raw (lat, lng, time_us, alt) tuples from the selected engine"""
+        if self.dataflash_reader is not None:
+            self._ensure_index()
+            yield from self.dataflash_reader.iter_gps_fixes(GPS_MESSAGE_TYPES, byte_range)
+            return
+
+        scanned: dict = {}
+        skipped = {"no_lat_lng": 0, "gps_instance": 0}
+        try:
             # loop to read all GPS messages
-            while run:
+            while True:
                 # reading all GPS messages
-                msg = self.mavlink_connection.recv_match(
-                    type=["GPS", "GPS_RAW_INT", "GLOBAL_POSITION_INT"], blocking=False
-                )
+                msg = self.mavlink_connection.recv_match(type=GPS_MESSAGE_TYPES, blocking=False)
 
                 # if no more messages, exit loop
                 if msg is None:
-                    print(f"Finished reading. Total points: {len(lat_lng_list)}")
-                    run = False
+                    return
+
+                msg_type = msg.get_type()
+                scanned[msg_type] = scanned.get(msg_type, 0) + 1
 
                 # check if message has Lat and Lng attributes
                 if not hasattr(msg, "Lat") or not hasattr(msg, "Lng"):
+                    skipped["no_lat_lng"] += 1
                     continue
 
                 # choose the right GPS source
                 if hasattr(msg, "I"):
                     if getattr(msg, "I") != 1:
+                        skipped["gps_instance"] += 1
                         continue
 
-                # get latitude and longitude for each message
-                lat: float = getattr(msg, "Lat")
-                lng: float = getattr(msg, "Lng")
+                yield getattr(msg, "Lat"), getattr(msg, "Lng"), getattr(msg, "TimeUS", None), getattr(msg, "Alt", None)
+
+        finally:
+            for msg_type, count in scanned.items():
+                profiler.count(f"messages_scanned.{msg_type}", count)
+            for reason, count in skipped.items():
+                profiler.count(f"messages_skipped.{reason}", count)
+
+    def _iter_window_fixes(
+        self,
+        byte_range: Optional[tuple] = None,
+        time_range: Optional[tuple] = None,
+        bbox: Optional[tuple] = None,
+    ) -> Iterator[tuple]:
+        """the raw fixes of _iter_gps_fixes inside a TimeUS range and/or a bounding box
+        with the dataflash engine and its index, only the part of the file holding the time range is read;
+        the read stops at the first fix after the end of the range (TimeUS is assumed to grow through the log)"""
+        if time_range is None and bbox is None:
+            yield from self._iter_gps_fixes(byte_range)
+            return
+
+        start_us, end_us = time_range or (None, None)
+        if time_range is not None and self.dataflash_reader is not None:
+            self._ensure_index()
+            if self.dataflash_reader.index is not None:
+                window_range = self.dataflash_reader.index.byte_range_for_time(start_us, end_us)
+                if byte_range is not None:
+                    window_range = (max(byte_range[0], window_range[0]), min(byte_range[1], window_range[1]))
+                byte_range = window_range
+                profiler.count("window.bytes_skipped", self.dataflash_reader.data_len - (byte_range[1] - byte_range[0]))
+
+        skipped = 0
+        try:
+            for lat, lng, time_us, alt in self._iter_gps_fixes(byte_range):
+                if time_range is not None:
+                    if time_us is None or (start_us is not None and time_us < start_us):
+                        skipped += 1
+                        continue
+                    if end_us is not None and time_us > end_us:
+                        return
+
+                if bbox is not None:
+                    # same degrees/microdegrees check as _iter_point_batches
+                    lat_deg = lat / 10000000.0 if abs(lat) > 180 else lat
+                    lng_deg = lng / 10000000.0 if abs(lng) > 180 else lng
+                    if not (bbox[0] <= lat_deg <= bbox[2] and bbox[1] <= lng_deg <= bbox[3]):
+                        skipped += 1
+                        continue
+
+                yield lat, lng, time_us, alt
+
+        finally:
+            profiler.count("window.fixes_skipped", skipped)
+
+    def read_track(
+        self,
+        msg_number_to_show: int = MSG_NUMBER_TO_SHOW,
+        progress_callback: Optional[Callable[[ParseProgress], None]] = None,
+        cancel_event: Optional[threading.Event] = None,
+        time_range: Optional[tuple] = None,
+        bbox: Optional[tuple] = None,
+    ) -> FlightTrack:
+        """get path to .bin file
+        :param progress_callback: called every msg_number_to_show GPS fixes with a ParseProgress
+        :param cancel_event: stop reading (and return an empty track) once this event is set
+        :param time_range: (start_us, end_us) to only keep the fixes with start_us <= TimeUS <= end_us,
+            either side may be None
+        :param bbox: (min_lat, min_lng, max_lat, max_lng) in degrees to only keep the fixes inside it
+        :return the flight track as a columnar FlightTrack"""
+
+        self._reopen()
+        if self.mavlink_connection is None and self.dataflash_reader is None:
+            logger.warning("No mavlink connection available")
+            return FlightTrack.empty()
+
+        try:
+            total_bytes = os.path.getsize(self.path)
+            start_time = time.monotonic()
+
+            if self.track_cache is not None:
+                with profiler.span("parse.cache_load"):
+                    cached_track = self._load_cached_track()
+                if cached_track is not None:
+                    profiler.count("parse.cache_hits")
+                    return cached_track.window(time_range, bbox)
+
+            windowed = time_range is not None or bbox is not None
+            with profiler.span("parse.read_track"):
+                if self._use_parallel_parsing(total_bytes) and not windowed:
+                    track = self._read_track_parallel(total_bytes, start_time, progress_callback, cancel_event)
+                else:
+                    track = self._read_track_serial(
+                        msg_number_to_show,
+                        total_bytes,
+                        start_time,
+                        progress_callback,
+                        cancel_event,
+                        time_range=time_range,
+                        bbox=bbox,
+                    )
+            parse_time = time.monotonic() - start_time
+            profiler.count("parse.bytes", total_bytes)
+            if parse_time > 0:
+                profiler.count("parse.bytes_per_s", int(total_bytes / parse_time))
+
+            if cancel_event is not None and cancel_event.is_set():
+                logger.info(f"Reading {self.path} cancelled")
+                return FlightTrack.empty()
+
+            if progress_callback is not None:
+                progress_callback(ParseProgress(total_bytes, total_bytes, len(track), time.monotonic() - start_time))
+
+            logger.info(f"Final result: {len(track)} points found")
+
+            # the cache only holds whole tracks
+            if self.track_cache is not None and not windowed:
+                with profiler.span("parse.cache_store"):
+                    self._store_cached_track(track)
+            return track
+
+        except Exception as e:
+            logger.error(f"error from read_bin_file(): {e}")
+            if self.raise_errors:
+                raise
+
+            traceback.print_exc()
+            return FlightTrack.empty()
+
+        finally:
+            self.close()
+
+    def _read_track_serial(
+        self,
+        msg_number_to_show: int = MSG_NUMBER_TO_SHOW,
+        total_bytes: int = 0,
+        start_time: float = 0.0,
+        progress_callback: Optional[Callable[[ParseProgress], None]] = None,
+        cancel_event: Optional[threading.Event] = None,
+        byte_range: Optional[tuple] = None,
+        time_range: Optional[tuple] = None,
+        bbox: Optional[tuple] = None,
+    ) -> FlightTrack:
+        """read the GPS fixes in one pass, dropping consecutive duplicates"""
+        batches = self._iter_point_batches(
+            READ_TRACK_BATCH_SIZE,
+            msg_number_to_show,
+            total_bytes,
+            start_time,
+            progress_callback,
+            cancel_event,
+            byte_range,
+            time_range,
+            bbox,
+        )
+        return FlightTrack.concatenate(list(batches))
+
+    def _iter_point_batches(
+        self,
+        batch_size: int,
+        msg_number_to_show: int = MSG_NUMBER_TO_SHOW,
+        total_bytes: int = 0,
+        start_time: float = 0.0,
+        progress_callback: Optional[Callable[[ParseProgress], None]] = None,
+        cancel_event: Optional[threading.Event] = None,
+        byte_range: Optional[tuple] = None,
+        time_range: Optional[tuple] = None,
+        bbox: Optional[tuple] = None,
+    ) -> Iterator[FlightTrack]:
+        """yield the deduplicated points as FlightTrack batches of up to batch_size points
+        stops early (without error) once cancel_event is set"""
+        track_builder = FlightTrackBuilder()
+        previous_point = None
+        points_yielded = 0
+        fix_count = 0
+        try:
+            for fix_count, (lat, lng, time_us, alt) in enumerate(
+                self._iter_window_fixes(byte_range, time_range, bbox), start=1
+            ):
+
+                if fix_count % msg_number_to_show == 0:
+                    if cancel_event is not None and cancel_event.is_set():
+                        return
+
+                    if progress_callback is not None:
+                        points = points_yielded + len(track_builder)
+                        progress_callback(
+                            ParseProgress(self._bytes_read(), total_bytes, points, time.monotonic() - start_time)
+                        )
 
                 # check if lat and lng are in degrees or microdegrees
                 if abs(lat) > 180:
@@ -65,28 +384,205 @@ class ReadeBinFile:
                 if abs(lng) > 180:
                     lng = lng / 10000000.0
 
-                # build point dictionary
-                point: dict = {"Lat": lat, "Lng": lng}
+                point: tuple = (lat, lng)
 
                 # check for duplicates
                 if point != previous_point:
-                    lat_lng_list.append(point)
+                    track_builder.append(lat, lng, time_us, alt)
                     previous_point = point
-                    msg_count += 1
 
                     # log progress every msg_number_to_show messages
-                    if msg_count % msg_number_to_show == 0:
-                        print(f"Processed {msg_count} points")
+                    if (points_yielded + len(track_builder)) % msg_number_to_show == 0:
+                        logger.info(f"Processed {points_yielded + len(track_builder)} points")
+
+                    if len(track_builder) >= batch_size:
+                        points_yielded += len(track_builder)
+                        yield track_builder.build()
+                        track_builder = FlightTrackBuilder()
+
+            if len(track_builder):
+                points_yielded += len(track_builder)
+                yield track_builder.build()
+                track_builder = FlightTrackBuilder()
+
+        finally:
+            points_kept = points_yielded + len(track_builder)
+            profiler.count("points_kept", points_kept)
+            profiler.count("duplicates_dropped", fix_count - points_kept)
+
+    def iter_points(
+        self, batch_size: int = POINT_BATCH_SIZE, time_range: Optional[tuple] = None, bbox: Optional[tuple] = None
+    ) -> Iterator[FlightTrack]:
+        """stream the flight track as FlightTrack batches of up to batch_size points
+        the first batch is available as soon as it is parsed and memory is bounded by the batch size;
+        joining all the batches gives the same track as read_track() with the same time_range/bbox"""
+        try:
+            if self.track_cache is not None:
+                cached_track = self._load_cached_track()
+                if cached_track is not None:
+                    cached_track = cached_track.window(time_range, bbox)
+                    for start in range(0, len(cached_track), batch_size):
+                        yield cached_track[start : start + batch_size]
+                    return
+
+            self._reopen()
+            if self.mavlink_connection is None and self.dataflash_reader is None:
+                logger.warning("No mavlink connection available")
+                return
+
+            yield from self._iter_point_batches(batch_size, time_range=time_range, bbox=bbox)
+
+        finally:
+            self.close()
+
+    def read_telemetry(self, spec=None, time_range: Optional[tuple] = None) -> Telemetry:
+        """read several message types and columns of the log in one pass
+        :param spec: {"GPS": ["Alt", "Spd"], "ATT": ["Roll"]} or ["GPS.Alt", "GPS.Spd", "ATT.Roll"],
+            the configured TELEMETRY_SPEC when None
+        :param time_range: (start_us, end_us) to only keep the records with start_us <= TimeUS <= end_us,
+            either side may be None
+        :return the columns of every message type, each with its own TimeUS column;
+            records of every instance are kept (add "I" / "Inst" to the spec to tell them apart)"""
+        self._reopen()
+        if self.mavlink_connection is None and self.dataflash_reader is None:
+            logger.warning("No mavlink connection available")
+            return Telemetry.empty()
 
-            print(f"Final result: {len(lat_lng_list)} points")
-            logger.info(f"Final result: {len(lat_lng_list)} points found")
-            return lat_lng_list
+        fields = parse_telemetry_spec(spec if spec is not None else configurations.TELEMETRY_SPEC)
+        try:
+            with profiler.span("parse.read_telemetry"):
+                if self.dataflash_reader is not None:
+                    self._ensure_index()
+                    byte_range = None
+                    if time_range is not None and self.dataflash_reader.index is not None:
+                        byte_range = self.dataflash_reader.index.byte_range_for_time(*time_range)
+                    telemetry = Telemetry(self.dataflash_reader.read_columns(fields, byte_range))
+                else:
+                    telemetry = self._read_telemetry_mavlink(fields)
+
+            telemetry = telemetry.window(time_range)
+            logger.info(f"Read {len(telemetry)} telemetry records of {', '.join(telemetry.columns)}")
+            return telemetry
 
         except Exception as e:
-            logger.error(f"error from read_bin_file(): {e}")
+            logger.error(f"error from read_telemetry(): {e}")
+            if self.raise_errors:
+                raise
 
             traceback.print_exc()
-            return []
+            return Telemetry.empty()
+
+        finally:
+            self.close()
+
+    def _read_telemetry_mavlink(self, fields: dict) -> Telemetry:
+        """read_telemetry with the pymavlink engine: one message object per record"""
+        values: dict = {}
+        while True:
+            msg = self.mavlink_connection.recv_match(type=list(fields), blocking=False)
+            if msg is None:
+                break
+
+            msg_type = msg.get_type()
+            type_values = values.setdefault(msg_type, {})
+            for column in fields[msg_type]:
+                if hasattr(msg, column):
+                    type_values.setdefault(column, []).append(getattr(msg, column))
+
+        for msg_type, type_values in values.items():
+            profiler.count(f"messages_scanned.{msg_type}", len(next(iter(type_values.values()), ())))
+        return Telemetry(
+            {
+                msg_type: {column: np.array(column_values) for column, column_values in type_values.items()}
+                for msg_type, type_values in values.items()
+            }
+        )
+
+    def _use_parallel_parsing(self, total_bytes: int) -> bool:
+        """worker processes only pay off for the dataflash engine on big files"""
+        return self.dataflash_reader is not None and self.workers > 1 and total_bytes >= PARALLEL_MIN_BYTES
+
+    def _read_track_parallel(
+        self,
+        total_bytes: int,
+        start_time: float,
+        progress_callback: Optional[Callable[[ParseProgress], None]] = None,
+        cancel_event: Optional[threading.Event] = None,
+    ) -> FlightTrack:
+        """split the file into byte ranges, read them in worker processes and stitch the tracks in file order"""
+        # the FMT records are read once here instead of once per worker, and each worker only gets the GPS
+        # offsets of its own chunk rather than loading the whole index
+        formats = self.dataflash_reader.read_formats()
+        self._ensure_index()
+        index = self.dataflash_reader.index
+        gps_ids = [fmt.msg_id for fmt in self.dataflash_reader.find_formats(GPS_MESSAGE_TYPES)]
+
+        chunk_count = max(self.workers * PARALLEL_CHUNKS_PER_WORKER, 1)
+        chunk_size = -(-total_bytes // chunk_count)
+        byte_ranges = [(start, min(start + chunk_size, total_bytes)) for start in range(0, total_bytes, chunk_size)]
+
+        chunk_tracks: list = []
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            futures = [
+                executor.submit(
+                    _read_track_chunk,
+                    self.path,
+                    self.use_mmap,
+                    formats,
+                    byte_range,
+                    None if index is None else index.subset(gps_ids, *byte_range),
+                )
+                for byte_range in byte_ranges
+            ]
+
+            for (_, chunk_end), future in zip(byte_ranges, futures):
+                if cancel_event is not None and cancel_event.is_set():
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    return FlightTrack.empty()
+
+                chunk_track = future.result()
+                # consecutive duplicates that straddle two chunks: the first point of the chunk repeats the last one
+                if chunk_tracks and len(chunk_track) and chunk_tracks[-1][-1] == chunk_track[0]:
+                    chunk_track = chunk_track[1:]
+                if len(chunk_track):
+                    chunk_tracks.append(chunk_track)
+
+                if progress_callback is not None:
+                    points = sum(len(track) for track in chunk_tracks)
+                    progress_callback(ParseProgress(chunk_end, total_bytes, points, time.monotonic() - start_time))
+
+        logger.info(f"Read {self.path} in {len(byte_ranges)} chunks with {self.workers} worker processes")
+        # the workers count in their own process, only the stitched result is counted here
+        track = FlightTrack.concatenate(chunk_tracks)
+        profiler.count("parse.chunks", len(byte_ranges))
+        profiler.count("points_kept", len(track))
+        return track
+
+    def process_bin_file(
+        self,
+        msg_number_to_show: int = MSG_NUMBER_TO_SHOW,
+        time_range: Optional[tuple] = None,
+        bbox: Optional[tuple] = None,
+    ) -> list:
+        """get path to .bin file
+        :param time_range: (start_us, end_us) TimeUS window, see read_track
+        :param bbox: (min_lat, min_lng, max_lat, max_lng) in degrees, see read_track
+        :return list of dictionaries for each flight"""
+        return self.read_track(msg_number_to_show, time_range=time_range, bbox=bbox).to_dict_list()
+
+
+def _read_track_chunk(
+    path: str, use_mmap: bool, formats: dict, byte_range: tuple, index: Optional[MessageIndex] = None
+) -> FlightTrack:
+    """worker process of ReadeBinFile._read_track_parallel: read the GPS fixes of one byte range
+    :param index: the GPS offsets of the chunk when the log is indexed"""
+    reader = ReadeBinFile(path, DATAFLASH_ENGINE, use_mmap, workers=1, use_cache=False, use_index=False)
+    try:
+        reader.dataflash_reader.formats = formats
+        reader.dataflash_reader.index = index
+        return reader._read_track_serial(byte_range=byte_range)
+    finally:
+        reader.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,107 @@
+"""columns of several message types of a log, read together in one pass"""
+
+from typing import Iterator, Optional
+
+import numpy as np
+
+TIME_FIELD = "TimeUS"
+
+
+def parse_telemetry_spec(spec) -> dict:
+    """normalise an extraction spec to message name -> column names, with TimeUS first
+    :param spec: {"GPS": ["Alt", "Spd"], "ATT": ["Roll"]} or ["GPS.Alt", "GPS.Spd", "ATT.Roll"]"""
+    if isinstance(spec, dict):
+        items = [(msg_type, column) for msg_type, columns in spec.items() for column in columns]
+    else:
+        items = []
+        for key in spec:
+            msg_type, separator, column = key.partition(".")
+            if not separator or not column:
+                raise ValueError(f"Telemetry fields are written TYPE.Column, got {key!r}")
+            items.append((msg_type, column))
+
+    fields: dict = {}
+    for msg_type, column in items:
+        columns = fields.setdefault(msg_type, [TIME_FIELD])
+        if column not in columns:
+            columns.append(column)
+    return fields
+
+
+class Telemetry:
+    """message name -> column name -> numpy array, one row per record in file order
+    every message type keeps its own TimeUS column, align() samples them on a common time axis"""
+
+    def __init__(self, columns: dict):
+        self.columns = columns
+
+    @classmethod
+    def empty(cls) -> "Telemetry":
+        return cls({})
+
+    def __getitem__(self, key: str) -> np.ndarray:
+        """the values of a "TYPE.Column" field, e.g. telemetry["ATT.Roll"]"""
+        msg_type, _, column = key.partition(".")
+        try:
+            return self.columns[msg_type][column]
+        except KeyError:
+            raise KeyError(key) from None
+
+    def __contains__(self, key: str) -> bool:
+        msg_type, _, column = key.partition(".")
+        return column in self.columns.get(msg_type, {})
+
+    def __len__(self) -> int:
+        """number of records, all message types together"""
+        return sum(len(next(iter(columns.values()), ())) for columns in self.columns.values())
+
+    def keys(self) -> Iterator[str]:
+        """every "TYPE.Column" field, TimeUS columns included"""
+        for msg_type, columns in self.columns.items():
+            for column in columns:
+                yield f"{msg_type}.{column}"
+
+    def window(self, time_range: Optional[tuple] = None) -> "Telemetry":
+        """the records with start_us <= TimeUS <= end_us, either side may be None
+        message types without a TimeUS column are dropped from a windowed result"""
+        if time_range is None:
+            return self
+
+        start_us, end_us = time_range
+        columns: dict = {}
+        for msg_type, type_columns in self.columns.items():
+            time_us = type_columns.get(TIME_FIELD)
+            if time_us is None:
+                continue
+            mask = np.ones(len(time_us), dtype=bool)
+            if start_us is not None:
+                mask &= time_us >= start_us
+            if end_us is not None:
+                mask &= time_us <= end_us
+            columns[msg_type] = {column: values[mask] for column, values in type_columns.items()}
+        return Telemetry(columns)
+
+    def align(self, time_us: np.ndarray, keys: Optional[list] = None) -> dict:
+        """sample fields on a common time axis, e.g. the TimeUS of a FlightTrack
+        each field takes the value of the last record of its type at or before the time, NaN before the first one
+        :param keys: "TYPE.Column" fields to align, every numeric field when None
+        :return "TYPE.Column" -> float64 array as long as time_us"""
+        time_us = np.asarray(time_us)
+        if keys is None:
+            keys = [
+                key
+                for key in self.keys()
+                if not key.endswith(f".{TIME_FIELD}") and self[key].dtype.kind in "biuf"
+            ]
+
+        aligned: dict = {}
+        for key in keys:
+            msg_type = key.partition(".")[0]
+            type_time_us = self.columns[msg_type][TIME_FIELD]
+            # TimeUS grows through the log, the record before each time is found by bisection
+            positions = np.searchsorted(type_time_us, time_us, side="right") - 1
+            values = np.full(len(time_us), np.nan)
+            valid = positions >= 0
+            values[valid] = self[key][positions[valid]]
+            aligned[key] = values
+        return aligned
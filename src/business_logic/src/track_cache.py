@@ -0,0 +1,78 @@
+"""on-disk cache of parsed flight tracks, so reopening a log doesn't parse it again"""
+
+import hashlib
+import os
+from pathlib import Path
+from typing import Optional
+
+from src.business_logic.src.flight_track import FlightTrack
+from src.utils import configurations
+from src.utils.configurations import TRACK_CACHE_HASH_BYTES, TRACK_CACHE_MAX_BYTES
+from src.utils.disk_cache import evict_least_recently_used, mark_used, write_atomically
+from src.utils.logger_factory import get_module_logger
+
+logger = get_module_logger(__name__)
+
+# bump when the parsed output changes so stale entries are never served
+CACHE_VERSION = 1
+CACHE_SUFFIX = ".npz"
+
+
+class TrackCache:
+    """tracks stored as .npz files named after a key of the log file
+    the key is made of the size, the mtime and a hash of the head and tail of the log, so a log that
+    changes gets a new key. Entries are evicted least recently used first once the cache grows past max_bytes.
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = None, max_bytes: int = TRACK_CACHE_MAX_BYTES):
+        """:param cache_dir: defaults to the configured TRACK_CACHE_DIR"""
+        self.cache_dir = Path(cache_dir if cache_dir is not None else configurations.TRACK_CACHE_DIR)
+        self.max_bytes = max_bytes
+
+    def key_for(self, path: str) -> str:
+        """fast key of a log: size + mtime + hash of its first and last TRACK_CACHE_HASH_BYTES"""
+        stat = os.stat(path)
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{CACHE_VERSION}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+
+        with open(path, "rb") as bin_file:
+            digest.update(bin_file.read(TRACK_CACHE_HASH_BYTES))
+            if stat.st_size > TRACK_CACHE_HASH_BYTES:
+                bin_file.seek(max(stat.st_size - TRACK_CACHE_HASH_BYTES, TRACK_CACHE_HASH_BYTES))
+                digest.update(bin_file.read())
+
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}{CACHE_SUFFIX}"
+
+    def load(self, path: str) -> Optional[FlightTrack]:
+        """the cached track of a log, None on a miss"""
+        entry_path = self._entry_path(self.key_for(path))
+        if not entry_path.exists():
+            return None
+
+        try:
+            track = FlightTrack.load(entry_path)
+        except Exception as e:
+            logger.warning(f"Dropping unreadable cache entry {entry_path}: {e}")
+            entry_path.unlink(missing_ok=True)
+            return None
+
+        mark_used(entry_path)
+        logger.info(f"Loaded {len(track)} points of {path} from the track cache")
+        return track
+
+    def store(self, path: str, track: FlightTrack) -> None:
+        """cache the track of a log, then evict old entries if the cache is too big"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        entry_path = self._entry_path(self.key_for(path))
+
+        write_atomically(entry_path, track.save)
+        self.evict()
+
+    def evict(self) -> None:
+        """delete the least recently used entries until the cache fits in max_bytes"""
+        _, evicted = evict_least_recently_used(self.cache_dir.glob(f"*{CACHE_SUFFIX}"), self.max_bytes)
+        for entry in evicted:
+            logger.info(f"Evicted {entry.name} from the track cache")
@@ -0,0 +1,271 @@
+"""streaming writers of flight tracks: Parquet and Arrow (needs pyarrow), GeoJSON and KML
+a writer takes the track batch by batch (e.g. from ReadeBinFile.iter_points), so memory stays bounded by the batch
+size whatever the length of the track, and the whole document is never built in memory"""
+
+import json
+import os
+from typing import Iterable, Optional
+from xml.sax.saxutils import escape
+
+import numpy as np
+
+from src.business_logic.src.flight_track import FlightTrack
+from src.business_logic.src.read_bin_file import ReadeBinFile
+from src.utils.configurations import EXPORT_ARROW_COMPRESSION, EXPORT_BATCH_SIZE, EXPORT_PARQUET_COMPRESSION
+from src.utils.logger_factory import get_module_logger
+
+logger = get_module_logger(__name__)
+
+PARQUET_FORMAT = "parquet"
+ARROW_FORMAT = "arrow"
+GEOJSON_FORMAT = "geojson"
+KML_FORMAT = "kml"
+
+
+def _import_pyarrow():
+    """pyarrow is only needed for the columnar formats, it is imported on their first use"""
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Parquet and Arrow export need pyarrow: pip install pyarrow") from e
+    return pyarrow
+
+
+class TrackWriter:
+    """base of the streaming writers: write() every FlightTrack batch in order, then close()
+    used as a context manager, an error while writing aborts the export instead of closing it"""
+
+    extension = ""
+
+    def __init__(self, path: str, name: str = ""):
+        self.path = path
+        self.name = name
+        self.points = 0
+
+    def __enter__(self) -> "TrackWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def write(self, track: FlightTrack) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        raise NotImplementedError
+
+    def abort(self) -> None:
+        """delete the output after an error, so a truncated export never passes for a complete one
+        subclasses release their file first"""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        logger.warning(f"Export to {self.path} aborted after {self.points} points")
+
+
+class _ArrowTableWriter(TrackWriter):
+    """batches -> arrow record batches, the columns of the file are the columns of the first batch
+    (an optional column missing from a later batch is written as nulls)"""
+
+    def __init__(self, path: str, name: str = ""):
+        super().__init__(path, name)
+        self.pyarrow = _import_pyarrow()
+        self.schema = None
+        self.writer = None
+
+    def _open(self, schema):
+        raise NotImplementedError
+
+    def write(self, track: FlightTrack) -> None:
+        pyarrow = self.pyarrow
+        columns = {"lat": track.lat, "lng": track.lng, "time_us": track.time_us, "alt": track.alt}
+
+        if self.schema is None:
+            types = {
+                "lat": pyarrow.float64(),
+                "lng": pyarrow.float64(),
+                "time_us": pyarrow.int64(),
+                "alt": pyarrow.float64(),
+            }
+            fields = [pyarrow.field(column, types[column]) for column, values in columns.items() if values is not None]
+            self.schema = pyarrow.schema(fields, metadata={"name": self.name})
+            self.writer = self._open(self.schema)
+
+        arrays = [
+            pyarrow.array(columns[field.name], type=field.type)
+            if columns[field.name] is not None
+            else pyarrow.nulls(len(track), type=field.type)
+            for field in self.schema
+        ]
+        self.writer.write_batch(pyarrow.record_batch(arrays, schema=self.schema))
+        self.points += len(track)
+
+    def close(self) -> None:
+        if self.writer is None:
+            # an empty track still gives a readable file
+            self.write(FlightTrack.empty())
+        self.writer.close()
+
+    def abort(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+        super().abort()
+
+
+class ParquetTrackWriter(_ArrowTableWriter):
+    """columnar, compressed Parquet file, one row group per batch"""
+
+    extension = ".parquet"
+
+    def _open(self, schema):
+        return self.pyarrow.parquet.ParquetWriter(self.path, schema, compression=EXPORT_PARQUET_COMPRESSION)
+
+
+class ArrowTrackWriter(_ArrowTableWriter):
+    """Arrow IPC (Feather v2) file, memory mappable by the reader"""
+
+    extension = ".arrow"
+
+    def _open(self, schema):
+        options = self.pyarrow.ipc.IpcWriteOptions(compression=EXPORT_ARROW_COMPRESSION)
+        return self.pyarrow.ipc.new_file(self.path, schema, options=options)
+
+
+class _TextTrackWriter(TrackWriter):
+    """text formats holding the track as one line: a header, the coordinates batch by batch, a footer
+    the positions are 2D or 3D for the whole file, as decided by the first batch"""
+
+    def __init__(self, path: str, name: str = ""):
+        super().__init__(path, name)
+        self.with_alt: Optional[bool] = None  # set by the first batch
+        self.last_alt = 0.0
+        self.file = open(path, "w", encoding="utf-8")
+        self.file.write(self._header())
+
+    def _header(self) -> str:
+        raise NotImplementedError
+
+    def _footer(self) -> str:
+        raise NotImplementedError
+
+    def _coordinates(self, positions: tuple) -> str:
+        """:param positions: the lng, lat (and alt) lists of a batch"""
+        raise NotImplementedError
+
+    def _positions(self, track: FlightTrack) -> tuple:
+        """(lng, lat) or (lng, lat, alt) lists of a batch, 3D when the first batch has every altitude
+        altitudes missing from a later batch repeat the last known one"""
+        if self.with_alt is None:
+            self.with_alt = track.alt is not None and not np.isnan(track.alt).any()
+        if not self.with_alt:
+            return track.lng.tolist(), track.lat.tolist()
+
+        alt = track.alt if track.alt is not None else np.full(len(track), np.nan)
+        known = ~np.isnan(alt)
+        if not known.all():
+            # index of the last known altitude at or before each point, -1 before the first one
+            last_known = np.maximum.accumulate(np.where(known, np.arange(len(alt)), -1))
+            alt = np.where(last_known >= 0, alt[np.maximum(last_known, 0)], self.last_alt)
+        self.last_alt = float(alt[-1])
+        return track.lng.tolist(), track.lat.tolist(), alt.tolist()
+
+    def write(self, track: FlightTrack) -> None:
+        if not len(track):
+            return
+        self.file.write(self._coordinates(self._positions(track)))
+        self.points += len(track)
+
+    def close(self) -> None:
+        if self.file.closed:
+            return
+        self.file.write(self._footer())
+        self.file.close()
+
+    def abort(self) -> None:
+        # no footer: the partial document must not parse as a whole track
+        self.file.close()
+        super().abort()
+
+
+class GeoJsonTrackWriter(_TextTrackWriter):
+    """FeatureCollection with a single LineString feature, [lng, lat(, alt)] positions as GeoJSON orders them"""
+
+    extension = ".geojson"
+
+    def _header(self) -> str:
+        properties = json.dumps({"name": self.name})
+        return (
+            '{"type": "FeatureCollection", "features": [{"type": "Feature", '
+            f'"properties": {properties}, "geometry": {{"type": "LineString", "coordinates": ['
+        )
+
+    def _footer(self) -> str:
+        return "]}}]}\n"
+
+    def _coordinates(self, positions: tuple) -> str:
+        separator = "," if self.points else ""
+        if self.with_alt:
+            return separator + ",".join(f"[{lng!r},{lat!r},{alt!r}]" for lng, lat, alt in zip(*positions))
+        return separator + ",".join(f"[{lng!r},{lat!r}]" for lng, lat in zip(*positions))
+
+
+class KmlTrackWriter(_TextTrackWriter):
+    """KML document with the track as one LineString placemark, "lng,lat(,alt)" tuples"""
+
+    extension = ".kml"
+
+    def _header(self) -> str:
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<kml xmlns="http://www.opengis.net/kml/2.2"><Document>'
+            f"<name>{escape(self.name)}</name><Placemark><name>{escape(self.name)}</name>"
+            "<LineString><tessellate>1</tessellate><coordinates>\n"
+        )
+
+    def _footer(self) -> str:
+        return "</coordinates></LineString></Placemark></Document></kml>\n"
+
+    def _coordinates(self, positions: tuple) -> str:
+        if self.with_alt:
+            return "".join(f"{lng!r},{lat!r},{alt!r}\n" for lng, lat, alt in zip(*positions))
+        return "".join(f"{lng!r},{lat!r}\n" for lng, lat in zip(*positions))
+
+
+TRACK_WRITERS = {
+    PARQUET_FORMAT: ParquetTrackWriter,
+    ARROW_FORMAT: ArrowTrackWriter,
+    GEOJSON_FORMAT: GeoJsonTrackWriter,
+    KML_FORMAT: KmlTrackWriter,
+}
+
+
+def export_track(batches: Iterable[FlightTrack], path: str, output_format: str, name: str = "") -> int:
+    """write FlightTrack batches (or a whole FlightTrack) to a file of output_format
+    :return the number of points written"""
+    if output_format not in TRACK_WRITERS:
+        raise ValueError(f"Unknown export format {output_format!r}, expected one of {', '.join(TRACK_WRITERS)}")
+    if isinstance(batches, FlightTrack):
+        batches = [batches]
+
+    with TRACK_WRITERS[output_format](path, name) as writer:
+        for batch in batches:
+            writer.write(batch)
+
+    logger.info(f"Exported {writer.points} points to {path}")
+    return writer.points
+
+
+def export_bin_file(
+    log_path: str, output_path: str, output_format: str, batch_size: int = EXPORT_BATCH_SIZE, **reader_options
+) -> int:
+    """stream the track of a .bin log to a file without holding the whole track in memory
+    :param reader_options: passed to ReadeBinFile, e.g. engine
+    :return the number of points written"""
+    batches = ReadeBinFile(log_path, **reader_options).iter_points(batch_size)
+    return export_track(batches, output_path, output_format, os.path.basename(log_path))
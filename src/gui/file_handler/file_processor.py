@@ -1,12 +1,20 @@
+import threading
+import time
 import traceback
-from typing import Callable
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Optional
 
 import flet as ft
 
-from src.utils.logger_factory import logger
-from src.business_logic.src.read_bin_file import ReadeBinFile
+from src.business_logic.src.flight_track import FlightTrack
+from src.business_logic.src.live_feed import LiveTrackFeed, open_live_source
+from src.utils.configurations import MULTI_FILE_WORKERS, PROGRESS_UPDATE_INTERVAL_S
+from src.utils.instrumentation import profiler
+from src.utils.logger_factory import get_module_logger
+from src.business_logic.src.read_bin_file import ParseProgress, ReadeBinFile
 from src.gui.map.map_builder import MapRouteBuilder
 
+logger = get_module_logger(__name__)
 
 
 class FileProcessor:
@@ -21,19 +29,116 @@ class FileProcessor:
         self.map_container = map_container
         self.page = page
 
+        # the parse running in the background, if any
+        self.parse_thread: Optional[threading.Thread] = None
+        self.cancel_event: Optional[threading.Event] = None
+
+        # the live feed drawing a growing log or a MAVLink stream, if any
+        self.live_feed: Optional[LiveTrackFeed] = None
+        self.live_source_name = ""
+        self.live_points = 0
+
     def on_file_picked(self, e: ft.FilePickerResultEvent) -> None:
-        """Processes the selected file and updates the UI."""
+        """Starts processing the selected files in the background so the UI stays responsive."""
         if not e.files:
             return None
 
+        # new files replace whatever is still being parsed or followed live
+        self.cancel_current_processing()
+        self.stop_live()
+        self.cancel_event = threading.Event()
+
+        if len(e.files) > 1:
+            files: list[tuple[str, str]] = [(file.path, file.name) for file in e.files]
+            self.update_status_after_selected_files(len(files), ft.Colors.BLUE)
+            self.parse_thread = threading.Thread(
+                target=self.process_files, args=(files, self.cancel_event), name="parse-files", daemon=True
+            )
+            self.parse_thread.start()
+            return None
+
         file_path: str = e.files[0].path  # TODO need typing ✅
         file_name: str = e.files[0].name
 
         self.update_status_after_selected_file(file_name, ft.Colors.BLUE)
 
+        self.parse_thread = threading.Thread(
+            target=self.process_file,
+            args=(file_path, file_name, self.cancel_event),
+            name=f"parse-{file_name}",
+            daemon=True,
+        )
+        self.parse_thread.start()
+
+    def cancel_current_processing(self) -> None:
+        """Asks the running parse (if any) to stop, its result will be ignored."""
+        if self.cancel_event is not None:
+            self.cancel_event.set()
+            logger.info("Cancelled the previous file processing")
+
+    def start_live(self, source: str) -> None:
+        """Follows a log being written or a MAVLink endpoint, the map is built by the first fixes received."""
+        self.cancel_current_processing()
+        self.stop_live()
+
+        try:
+            live_source = open_live_source(source)
+        except Exception as ex:
+            self.update_status_when_failed_to_process_file(ex, ft.Colors.RED)
+            logger.error(f"Error opening live source {source}: {ex}")
+            return
+
+        self.live_source_name = source
+        self.live_points = 0
+        self.live_feed = LiveTrackFeed(live_source, self._on_live_fixes).start()
+        self.update_status_live_waiting(source, ft.Colors.BLUE)
+        logger.info(f"Following {source} live")
+
+    def stop_live(self) -> None:
+        """Stops the live feed (if any), the flight drawn so far stays on the map."""
+        if self.live_feed is None:
+            return
+        self.live_feed.stop()
+        profiler.report(f"{self.live_source_name} (live)")
+        self.live_feed = None
+        logger.info(f"Stopped following {self.live_source_name}")
+
+    def _on_live_fixes(self, track: FlightTrack) -> None:
+        """Draws a batch of live fixes, runs on the live feed thread."""
+        try:
+            if not self.live_points:
+                # the first batch builds the map
+                self.map_container.content = self.map_builder.create_map_with_route(
+                    track, self.page, self.live_source_name
+                )
+            else:
+                self.map_builder.append_live_fixes(track)
+            self.live_points += len(track)
+            self.update_status_live(self.live_source_name, self.live_points, ft.Colors.GREEN)
+
+        except Exception as ex:
+            self.update_status_when_failed_to_process_file(ex, ft.Colors.RED)
+            logger.error(f"Error drawing live fixes: {ex}")
+
+    def process_file(self, file_path: str, file_name: str, cancel_event: threading.Event) -> None:
+        """Parses the file and builds the map, runs on a worker thread."""
+        with profiler.span("file.total"):
+            self._process_file(file_path, file_name, cancel_event)
+
+        profiler.report(f"{file_name} (cancelled)" if cancel_event.is_set() else file_name)
+
+    def _process_file(self, file_path: str, file_name: str, cancel_event: threading.Event) -> None:
+        """The parse -> build -> render steps of process_file."""
         try:
             reade_bin_file = ReadeBinFile(file_path)  # TODO the name is not clear ✅
-            processed_data = reade_bin_file.process_bin_file()
+            processed_data = reade_bin_file.read_track(
+                progress_callback=self._progress_reporter(file_name, cancel_event),
+                cancel_event=cancel_event,
+            )
+
+            # a newer file was picked while this one was parsing
+            if cancel_event.is_set():
+                return
 
             if (
                 not processed_data and len(processed_data) <= 0
@@ -42,17 +147,85 @@ class FileProcessor:
                 self.update_status_if_not_gps_found(ft.Colors.ORANGE)
             else:
 
-                self.update_status_if_gps_found(len(processed_data), ft.Colors.GREEN)
+                with profiler.span("map.create_map_with_route"):
+                    map_widget = self.map_builder.create_map_with_route(processed_data, self.page)
+                if cancel_event.is_set():
+                    return
 
-                map_widget = self.map_builder.create_map_with_route(processed_data, self.page)
                 self.map_container.content = map_widget
+                self.update_status_if_gps_found(len(processed_data), ft.Colors.GREEN)
 
         except Exception as ex:
             self.update_status_when_failed_to_process_file(ex, ft.Colors.RED)
             traceback.print_exc()
             logger.error(f"Error processing file: {ex}")
 
-        self.page.update()
+        with profiler.span("ui.page_update"):
+            self.page.update()
+
+    def process_files(self, files: list, cancel_event: threading.Event) -> None:
+        """Parses several files concurrently and adds each flight to the map as soon as it is parsed,
+        runs on a worker thread."""
+        with profiler.span("file.total"):
+            self._process_files(files, cancel_event)
+
+        profiler.report(f"{len(files)} files (cancelled)" if cancel_event.is_set() else f"{len(files)} files")
+
+    def _process_files(self, files: list, cancel_event: threading.Event) -> None:
+        """The first parsed flight builds the map, the next ones are added to its layers."""
+        flights_shown = 0
+        total_points = 0
+
+        with ProcessPoolExecutor(max_workers=max(min(MULTI_FILE_WORKERS, len(files)), 1)) as executor:
+            futures = {executor.submit(_read_track_of_file, file_path): file_name for file_path, file_name in files}
+
+            for files_done, future in enumerate(as_completed(futures), start=1):
+                # newer files were picked while these were parsing
+                if cancel_event.is_set():
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    return
+
+                file_name = futures[future]
+                try:
+                    track = future.result()
+                    if len(track):
+                        if flights_shown == 0:
+                            with profiler.span("map.create_map_with_route"):
+                                self.map_container.content = self.map_builder.create_map_with_route(
+                                    track, self.page, file_name
+                                )
+                            with profiler.span("ui.page_update"):
+                                self.page.update()
+                        else:
+                            self.map_builder.add_flight_route(track, file_name)
+                        flights_shown += 1
+                        total_points += len(track)
+
+                except Exception as ex:
+                    traceback.print_exc()
+                    logger.error(f"Error processing file {file_name}: {ex}")
+
+                self.update_status_files_progress(files_done, len(files), flights_shown, total_points, ft.Colors.BLUE)
+
+        if flights_shown:
+            self.update_status_files_progress(len(files), len(files), flights_shown, total_points, ft.Colors.GREEN)
+        else:
+            self.update_status_if_not_gps_found(ft.Colors.ORANGE)
+
+    def _progress_reporter(self, file_name: str, cancel_event: threading.Event) -> Callable[[ParseProgress], None]:
+        """Builds the progress callback, throttled so the websocket isn't flooded with updates."""
+        last_update = 0.0
+
+        def report(progress: ParseProgress) -> None:
+            nonlocal last_update
+            now = time.monotonic()
+            if cancel_event.is_set() or now - last_update < PROGRESS_UPDATE_INTERVAL_S:
+                return
+            last_update = now
+            with profiler.span("ui.progress_update"):
+                self.update_status_progress(file_name, progress, ft.Colors.BLUE)
+
+        return report
 
     def update_status_after_selected_file(self, file_name: str, color: ft.Colors) -> None:
         """Update the status text in the UI"""
@@ -60,6 +233,45 @@ class FileProcessor:
         self.status_text.color = color
         self.page.update()
 
+    def update_status_after_selected_files(self, file_count: int, color: ft.Colors) -> None:
+        """Update the status text in the UI when several files were selected."""
+        self.status_text.value = f"{file_count} files selected - processing"
+        self.status_text.color = color
+        self.page.update()
+
+    def update_status_files_progress(
+        self, files_done: int, file_count: int, flights_shown: int, num_points: int, color: ft.Colors
+    ) -> None:
+        """Update the status text in the UI with how many of the selected files are on the map."""
+        self.status_text.value = (
+            f"Processed {files_done} / {file_count} files: {flights_shown} flights, {num_points} points ✈️"
+        )
+        self.status_text.color = color
+        self.page.update()
+
+    def update_status_progress(self, file_name: str, progress: ParseProgress, color: ft.Colors) -> None:
+        """Update the status text in the UI with how far the parse got."""
+        eta = f"{progress.eta_s:.0f}s left" if progress.eta_s is not None else "estimating time left"
+        self.status_text.value = (
+            f"Processing {file_name}: {progress.fraction:.0%} "
+            f"({progress.bytes_read / 1e6:.1f} / {progress.total_bytes / 1e6:.1f} MB), "
+            f"{progress.points} points, {eta}"
+        )
+        self.status_text.color = color
+        self.page.update()
+
+    def update_status_live_waiting(self, source: str, color: ft.Colors) -> None:
+        """Update the status text in the UI while the live source has not sent any fix yet."""
+        self.status_text.value = f"Live: waiting for GPS from {source}"
+        self.status_text.color = color
+        self.page.update()
+
+    def update_status_live(self, source: str, num_points: int, color: ft.Colors) -> None:
+        """Update the status text in the UI with the fixes received live so far."""
+        self.status_text.value = f"Live: {num_points} points from {source} ✈️"
+        self.status_text.color = color
+        self.page.update()
+
     def update_status_if_not_gps_found(self, color: ft.Colors) -> None:
         """Update the status text in the UI if file don't have any GPS coordinates ."""
         self.status_text.value = "No GPS found in this file"
@@ -78,3 +290,9 @@ class FileProcessor:
         self.status_text.value = f"Error processing file: {str(ex)}"
         self.status_text.color = color
         self.page.update()
+
+
+def _read_track_of_file(file_path: str) -> FlightTrack:
+    """worker process of FileProcessor.process_files: parse one log"""
+    # the files are already spread over processes, so no nested worker pool
+    return ReadeBinFile(file_path, workers=1).read_track()
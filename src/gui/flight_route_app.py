@@ -2,9 +2,7 @@
 
 import flet as ft
 
-from src.utils.configurations import PAGE_TITLE
-from src.gui.file_handler.file_processor import FileProcessor
-from src.gui.map.map_builder import MapRouteBuilder
+from src.utils.configurations import PAGE_TITLE, URL_TEMPLATE
 
 
 class FlightRouteApp:
@@ -17,28 +15,36 @@ class FlightRouteApp:
         self.page.rtl = True
         self.page.padding = 20
 
-        self.map_builder = MapRouteBuilder()
-        self.status_text = ft.Text("Please choose file", size=16, weight=ft.FontWeight.BOLD)
-        self.file_processor = FileProcessor(
-            self.status_text,
-            self.map_builder,
-            self.map_builder.map_container,
-            self.page,
-        )
+        # the map and the parser are created by load_map_and_parser, once the window is shown
+        self.tile_server = None
+        self.map_builder = None
+        self.file_processor = None
+        self.map_area = ft.Container(expand=True)
+        self.status_text = ft.Text("Loading...", size=16, weight=ft.FontWeight.BOLD)
 
-        self.file_picker = ft.FilePicker(on_result=self.file_processor.on_file_picked)
+        self.file_picker = ft.FilePicker(on_result=self.on_file_picked)
         self.page.overlay.append(self.file_picker)
 
         self.upload_button = ft.ElevatedButton(
             "Upload File",
             icon=ft.Icons.UPLOAD_FILE,
+            disabled=True,
             on_click=lambda _: self.file_picker.pick_files(
                 dialog_title="Choose BIN file",
-                allow_multiple=False,
+                allow_multiple=True,
                 allowed_extensions=["bin"],
             ),
         )
 
+        # live mode: a MAVLink endpoint or a log being written, filled in by load_map_and_parser
+        self.live_source_field = ft.TextField(label="Live source", width=320, dense=True, disabled=True)
+        self.live_button = ft.ElevatedButton(
+            "Go live",
+            icon=ft.Icons.SENSORS,
+            disabled=True,
+            on_click=self.on_live_clicked,
+        )
+
     def build(self) -> None:
         """Builds the main UI layout."""
         self.page.add(
@@ -55,16 +61,77 @@ class FlightRouteApp:
                                     text_align=ft.TextAlign.CENTER,
                                 ),
                                 ft.Divider(),
-                                self.upload_button,
+                                ft.Row(
+                                    [self.upload_button, self.live_source_field, self.live_button],
+                                    alignment=ft.MainAxisAlignment.CENTER,
+                                ),
                                 self.status_text,
                             ],
                             horizontal_alignment=ft.CrossAxisAlignment.CENTER,
                         ),
                         padding=20,
                     ),
-                    self.map_builder.map_container,
+                    self.map_area,
                 ],
                 expand=True,
                 spacing=10,
             )
         )
+        self.load_map_and_parser()
+
+    def load_map_and_parser(self) -> None:
+        """Creates the map and the file processor, the window is already shown while their modules
+        (flet_map, numpy, the parsing stack) are imported."""
+        from src.gui.file_handler.file_processor import FileProcessor
+        from src.gui.map.map_builder import MapRouteBuilder
+        from src.gui.map.tile_cache import TileCache
+        from src.gui.map.tile_server import TileServer
+        from src.utils.configurations import LIVE_SOURCE, TILE_CACHE_ENABLED, TILE_OFFLINE
+
+        if TILE_CACHE_ENABLED:
+            tile_cache = TileCache(upstream_url=None if TILE_OFFLINE else URL_TEMPLATE)
+            self.tile_server = TileServer(tile_cache).start()
+
+        self.map_builder = MapRouteBuilder(tile_server=self.tile_server)
+        self.file_processor = FileProcessor(
+            self.status_text,
+            self.map_builder,
+            self.map_builder.map_container,
+            self.page,
+        )
+        self.map_area.content = self.map_builder.map_container
+
+        self.status_text.value = "Please choose file"
+        self.upload_button.disabled = False
+        self.live_source_field.value = LIVE_SOURCE
+        self.live_source_field.disabled = False
+        self.live_button.disabled = False
+        self.page.update()
+
+    def on_file_picked(self, e: ft.FilePickerResultEvent) -> None:
+        """Hands the picked files to the file processor, they replace the live flight if one is followed."""
+        if self.file_processor is not None:
+            self.file_processor.on_file_picked(e)
+            if self.file_processor.live_feed is None:
+                self._reset_live_button()
+
+    def on_live_clicked(self, e: ft.ControlEvent) -> None:
+        """Starts following the live source, or stops it when it is already followed."""
+        if self.file_processor is None:
+            return
+
+        if self.file_processor.live_feed is not None:
+            self.file_processor.stop_live()
+            self._reset_live_button()
+            self.status_text.value = "Live stopped"
+        else:
+            self.file_processor.start_live(self.live_source_field.value.strip())
+            if self.file_processor.live_feed is not None:
+                self.live_button.text = "Stop live"
+                self.live_button.icon = ft.Icons.STOP
+        self.page.update()
+
+    def _reset_live_button(self) -> None:
+        """Shows the live button as ready to start."""
+        self.live_button.text = "Go live"
+        self.live_button.icon = ft.Icons.SENSORS
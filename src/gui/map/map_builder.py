@@ -1,35 +1,125 @@
 # """build the map with layers and markers"""
 
 import math
+import threading
+from collections import deque
+from typing import Optional
 
 import flet as ft
 import flet_map as map_ft
-
-from src.utils.configurations import LATITUDE_FIELD, LONGITUDE_FIELD, MARKER_DISTANCE_KM, URL_TEMPLATE, LAUNCH_URL
-from src.utils.logger_factory import logger
+import numpy as np
+
+from src.business_logic.src.flight_track import FlightTrack
+from src.business_logic.src.geo_math import marker_indices
+from src.gui.map.marker_index import MarkerGrid, cluster_markers, viewport_bbox
+from src.gui.map.route_pyramid import RoutePyramid
+from src.gui.map.tile_server import TileServer
+from src.utils.configurations import (
+    LATITUDE_FIELD,
+    LIVE_BUFFER_SIZE,
+    LIVE_FOLLOW,
+    LONGITUDE_FIELD,
+    MAP_INITIAL_ZOOM,
+    MAP_VIEWPORT_PX,
+    MARKER_DISTANCE_KM,
+    MARKER_VIEWPORT_MARGIN,
+    URL_TEMPLATE,
+    LAUNCH_URL,
+)
+from src.utils.instrumentation import profiler
+from src.utils.logger_factory import get_module_logger
+
+logger = get_module_logger(__name__)
+
+# one color per flight when several flights share the map, the first one is the single flight color
+ROUTE_COLORS = [
+    ft.Colors.BLUE,
+    ft.Colors.RED,
+    ft.Colors.GREEN,
+    ft.Colors.PURPLE,
+    ft.Colors.ORANGE,
+    ft.Colors.TEAL,
+    ft.Colors.PINK,
+    ft.Colors.BROWN,
+]
+
+
+class FlightRoute:
+    """One flight drawn on the map: its route pyramid, the polylines built so far and its start/end markers."""
+
+    def __init__(self, name: str, track: FlightTrack, color: str):
+        self.name = name
+        self.color = color
+        self.route_pyramid = RoutePyramid(track)
+        self.route_polylines: dict = {}  # pyramid level -> PolylineMarker, built on first use
+        self.current_route_level = None
+        self.markers: list = []
 
 
 class MapRouteBuilder:
 
-    def __init__(self) -> None:
+    def __init__(self, tile_server: Optional[TileServer] = None) -> None:
+        self.tile_server = tile_server  # local tile cache endpoint, None loads the tiles straight from URL_TEMPLATE
         self.marker_layer_ref = ft.Ref[map_ft.MarkerLayer]()
         self.polyline_layer_ref = ft.Ref[map_ft.PolylineLayer]()
+        self.map_ref = ft.Ref[map_ft.Map]()
         self.map_container = ft.Container(expand=True)
-
-    def create_map_with_route(self, coordinates_list: list, page: ft.Page) -> map_ft.Map or ft.Text:
-        """Builds the map widget with the flight route."""
+        self.flight_routes: list[FlightRoute] = []  # the flights on the current map, in the order they were added
+        self.current_zoom: float = MAP_INITIAL_ZOOM
+        self.current_center: tuple = (0.0, 0.0)
+        self.viewport_px: tuple = MAP_VIEWPORT_PX
+        # flights are added from parse threads while zoom events swap polylines on the UI thread
+        self.layers_lock = threading.Lock()
+
+        # waypoints of every flight, only the ones in the viewport are sent to the map (clustered when dense)
+        self.waypoint_lat = np.zeros(0)
+        self.waypoint_lng = np.zeros(0)
+        self.waypoint_flight = np.zeros(0, dtype=np.int64)  # position of the waypoint's flight in flight_routes
+        self.marker_grid = MarkerGrid(self.waypoint_lat, self.waypoint_lng)
+        self.waypoint_markers: dict = {}  # waypoint index -> Marker, built on first display
+        self.marker_view_key = None  # the clusters on the map, to skip updates that change nothing
+
+        # live mode: every batch of new fixes is one short polyline after the route, oldest dropped first
+        self.live_segments: deque = deque()  # (PolylineMarker, number of fixes) in arrival order
+        self.live_points = 0
+
+    def create_map_with_route(
+        self, coordinates_list: FlightTrack or list, page: ft.Page, name: str = ""
+    ) -> map_ft.Map or ft.Text:
+        """Builds the map widget with the flight route, any flight shown before is dropped."""
         if not coordinates_list:
             return ft.Text("No data provided", color=ft.Colors.RED)
 
+        # the legacy list of dicts is still accepted
+        if not isinstance(coordinates_list, FlightTrack):
+            coordinates_list = FlightTrack.from_dict_list(coordinates_list)
+
         try:
             start_point_lat: float = self._get_map_lat_start_point(coordinates_list)
             start_point_lng: float = self._get_map_lng_start_point(coordinates_list)
 
-            markers_to_mark_on_the_map = self._create_flight_markers(coordinates_list)
-            route_polyline = self._create_route_polyline(coordinates_list)
-            map_widget = self._build_map_widget(
-                start_point_lat, start_point_lng, markers_to_mark_on_the_map, route_polyline, page
-            )
+            with self.layers_lock:
+                self.flight_routes = []
+                self._reset_waypoints()
+                self.live_segments = deque()
+                self.live_points = 0
+                self.current_zoom = MAP_INITIAL_ZOOM
+                self.current_center = (start_point_lat, start_point_lng)
+                self.viewport_px = (
+                    getattr(page, "width", None) or MAP_VIEWPORT_PX[0],
+                    getattr(page, "height", None) or MAP_VIEWPORT_PX[1],
+                )
+                flight_route = self._create_flight_route(coordinates_list, name)
+                self.flight_routes.append(flight_route)
+                self._add_waypoints(coordinates_list, 0)
+
+                route_polyline = self._get_route_polyline(flight_route, flight_route.current_route_level)
+                markers_to_mark_on_the_map = self._visible_markers()
+                with profiler.span("map.widget"):
+                    map_widget = self._build_map_widget(
+                        start_point_lat, start_point_lng, markers_to_mark_on_the_map, route_polyline, page
+                    )
+            self._prefetch_tiles(coordinates_list)
 
             logger.info(
                 f"Map built with {len(coordinates_list)} coordinates and {len(markers_to_mark_on_the_map)} markers"
@@ -40,15 +130,102 @@ class MapRouteBuilder:
             logger.error(f"Error building map: {str(e)}")
             return ft.Text(f"Error creating map: {str(e)}")
 
-    def _get_map_lat_start_point(self, coordinates_list: list) -> float:
+    def add_flight_route(self, coordinates_list: FlightTrack, name: str = "") -> None:
+        """Adds one more flight to the map built by create_map_with_route.
+        Only its polyline and markers are sent to the page, the map widget and the other flights are untouched."""
+        if self.polyline_layer_ref.current is None or self.marker_layer_ref.current is None:
+            raise RuntimeError("create_map_with_route must build the map before flights are added")
+
+        with self.layers_lock:
+            flight_route = self._create_flight_route(coordinates_list, name)
+            self.flight_routes.append(flight_route)
+
+            self._add_waypoints(coordinates_list, len(self.flight_routes) - 1)
+
+            route_polyline = self._get_route_polyline(flight_route, flight_route.current_route_level)
+            self.polyline_layer_ref.current.polylines.append(route_polyline)
+            self.marker_layer_ref.current.markers = self._visible_markers()
+
+            with profiler.span("map.layers_update"):
+                self.polyline_layer_ref.current.update()
+                self.marker_layer_ref.current.update()
+        self._prefetch_tiles(coordinates_list)
+
+        logger.info(f"Added flight {name} with {len(coordinates_list)} coordinates to the map")
+
+    def append_live_fixes(
+        self, coordinates_list: FlightTrack, follow: bool = LIVE_FOLLOW, max_points: int = LIVE_BUFFER_SIZE
+    ) -> None:
+        """Extends the last flight with the fixes received live and moves its end marker to the newest one.
+        The fixes go to a new polyline joined to the end of the route instead of growing the route polyline,
+        so an update only sends the new points, and the oldest live polylines are dropped past max_points."""
+        if self.polyline_layer_ref.current is None or self.marker_layer_ref.current is None:
+            raise RuntimeError("create_map_with_route must build the map before live fixes are added")
+        if not len(coordinates_list):
+            return
+
+        with self.layers_lock:
+            flight_route = self.flight_routes[-1]
+            end_marker = flight_route.markers[-1]
+
+            with profiler.span("map.live_segment"):
+                segment = FlightTrack(
+                    np.concatenate([[end_marker.coordinates.latitude], coordinates_list.lat]),
+                    np.concatenate([[end_marker.coordinates.longitude], coordinates_list.lng]),
+                )
+                segment_polyline = self._create_route_polyline(segment, flight_route.color)
+            self.live_segments.append((segment_polyline, len(coordinates_list)))
+            self.live_points += len(coordinates_list)
+            self.polyline_layer_ref.current.polylines.append(segment_polyline)
+
+            while self.live_points > max_points and len(self.live_segments) > 1:
+                oldest_polyline, oldest_points = self.live_segments.popleft()
+                self.live_points -= oldest_points
+                self.polyline_layer_ref.current.polylines.remove(oldest_polyline)
+
+            newest = map_ft.MapLatitudeLongitude(float(coordinates_list.lat[-1]), float(coordinates_list.lng[-1]))
+            end_marker.coordinates = newest
+
+            with profiler.span("map.layers_update"):
+                self.polyline_layer_ref.current.update()
+                self.marker_layer_ref.current.update()
+
+            # move_to needs the map on a page
+            if follow and self.map_ref.current is not None and self.map_ref.current.page is not None:
+                self.current_center = (newest.latitude, newest.longitude)
+                self.map_ref.current.move_to(destination=newest)
+
+        profiler.count("map.live_points", len(coordinates_list))
+
+    def _create_flight_route(self, coordinates_list: FlightTrack, name: str) -> FlightRoute:
+        """Builds the pyramid and the start/end markers of a flight, colored by its position on the map."""
+        color = ROUTE_COLORS[len(self.flight_routes) % len(ROUTE_COLORS)]
+        with profiler.span("map.route_pyramid"):
+            flight_route = FlightRoute(name, coordinates_list, color)
+        flight_route.current_route_level = flight_route.route_pyramid.level_for_zoom(self.current_zoom)
+        flight_route.markers = [
+            self._create_start_marker(coordinates_list[0]),
+            self._create_end_marker(coordinates_list[-1]),
+        ]
+
+        profiler.count(
+            "map.route_vertices", len(flight_route.route_pyramid.tracks[flight_route.current_route_level])
+        )
+        return flight_route
+
+    def _prefetch_tiles(self, coordinates_list: FlightTrack) -> None:
+        """Fills the tile cache with the flight's area in the background, so it can be viewed offline later."""
+        if self.tile_server is None:
+            return
+        self.tile_server.tile_cache.prefetch_in_background(coordinates_list)
+
+    def _get_map_lat_start_point(self, coordinates_list: FlightTrack) -> float:
         """Returns the center coordinates for the map (using the first point)."""
-        first_point = coordinates_list[0]
-        return first_point[LATITUDE_FIELD]
+        return float(coordinates_list.lat[0])
 
-    def _get_map_lng_start_point(self, coordinates_list: list) -> float:
+    def _get_map_lng_start_point(self, coordinates_list: FlightTrack) -> float:
         """Returns the center coordinates for the map (using the first point)."""
-        first_point = coordinates_list[0]
-        return first_point[LONGITUDE_FIELD]
+        return float(coordinates_list.lng[0])
 
     @staticmethod
     def calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
@@ -64,23 +241,91 @@ class MapRouteBuilder:
 
         return world_radius * c
 
-    def _create_flight_markers(self, coordinates_list: list) -> list[map_ft.Marker]:
-        """Creates all markers for the flight route: start, intermediate, and end markers."""
-        all_markers_to_mark_on_the_map = []
-
-        # Start marker (takeoff)
-        start_marker = self._create_start_marker(coordinates_list[0])
-        all_markers_to_mark_on_the_map.append(start_marker)
-
-        # Intermediate markers (along the route)
-        intermediate_markers = self._create_intermediate_markers(coordinates_list)
-        all_markers_to_mark_on_the_map.extend(intermediate_markers)
-
-        # End marker (landing)
-        end_marker = self._create_end_marker(coordinates_list[-1])
-        all_markers_to_mark_on_the_map.append(end_marker)
+    def _reset_waypoints(self) -> None:
+        """Forgets the waypoints of the previous map."""
+        self.waypoint_lat = np.zeros(0)
+        self.waypoint_lng = np.zeros(0)
+        self.waypoint_flight = np.zeros(0, dtype=np.int64)
+        self.marker_grid = MarkerGrid(self.waypoint_lat, self.waypoint_lng)
+        self.waypoint_markers = {}
+        self.marker_view_key = None
+
+    def _add_waypoints(self, coordinates_list: FlightTrack, flight_number: int) -> None:
+        """Adds the waypoints of a flight (every MARKER_DISTANCE_KM along the route) to the spatial grid."""
+        with profiler.span("map.markers"):
+            indices = marker_indices(coordinates_list.lat, coordinates_list.lng, MARKER_DISTANCE_KM)
+            self.waypoint_lat = np.concatenate([self.waypoint_lat, coordinates_list.lat[indices]])
+            self.waypoint_lng = np.concatenate([self.waypoint_lng, coordinates_list.lng[indices]])
+            self.waypoint_flight = np.concatenate(
+                [self.waypoint_flight, np.full(len(indices), flight_number, dtype=np.int64)]
+            )
+            self.marker_grid = MarkerGrid(self.waypoint_lat, self.waypoint_lng)
+        profiler.count("map.waypoints", len(indices))
+
+    def _visible_markers(self) -> list[map_ft.Marker]:
+        """The start/end markers of every flight plus the waypoints around the viewport, merged into cluster
+        markers where they are too dense, so at most MAX_VISIBLE_MARKERS waypoint markers are on the map."""
+        width_px, height_px = self.viewport_px
+        scale = 1 + 2 * MARKER_VIEWPORT_MARGIN
+        bbox = viewport_bbox(*self.current_center, self.current_zoom, width_px * scale, height_px * scale)
+
+        with profiler.span("map.visible_markers"):
+            clusters = cluster_markers(
+                self.waypoint_lat, self.waypoint_lng, self.marker_grid.query(*bbox), self.current_zoom
+            )
+        self.marker_view_key = (clusters.first_index.tobytes(), clusters.count.tobytes())
+
+        markers = [marker for flight_route in self.flight_routes for marker in flight_route.markers]
+        for first_index, lat, lng, count in zip(
+            clusters.first_index.tolist(), clusters.lat.tolist(), clusters.lng.tolist(), clusters.count.tolist()
+        ):
+            if count == 1:
+                markers.append(self._get_waypoint_marker(first_index))
+            else:
+                markers.append(self._create_cluster_marker(lat, lng, count))
+
+        profiler.count("map.visible_markers", len(clusters.count))
+        return markers
+
+    def _update_markers(self) -> None:
+        """Sends the markers of the current viewport to the marker layer, if they changed."""
+        previous_key = self.marker_view_key
+        markers = self._visible_markers()
+        if self.marker_view_key == previous_key:
+            return
+
+        self.marker_layer_ref.current.markers = markers
+        with profiler.span("map.layers_update"):
+            self.marker_layer_ref.current.update()
+
+    def _get_waypoint_marker(self, waypoint_index: int) -> map_ft.Marker:
+        """Returns the marker of a waypoint, building it the first time it is shown."""
+        if waypoint_index not in self.waypoint_markers:
+            flight_number = int(self.waypoint_flight[waypoint_index])
+            # the first flight keeps the black waypoints of the single flight map
+            color = ft.Colors.BLACK87 if flight_number == 0 else self.flight_routes[flight_number].color
+            self.waypoint_markers[waypoint_index] = self._create_waypoint_marker(
+                {
+                    LATITUDE_FIELD: float(self.waypoint_lat[waypoint_index]),
+                    LONGITUDE_FIELD: float(self.waypoint_lng[waypoint_index]),
+                },
+                color,
+            )
+        return self.waypoint_markers[waypoint_index]
 
-        return all_markers_to_mark_on_the_map
+    def _create_cluster_marker(self, lat: float, lng: float, count: int) -> map_ft.Marker:
+        """Creates the marker standing for `count` nearby waypoints (a dark circle with the count)."""
+        return map_ft.Marker(
+            content=ft.Container(
+                content=ft.Text(str(count), size=11, color=ft.Colors.WHITE, weight=ft.FontWeight.BOLD),
+                alignment=ft.alignment.center,
+                bgcolor=ft.Colors.with_opacity(0.8, ft.Colors.BLACK87),
+                border_radius=14,
+            ),
+            width=28,
+            height=28,
+            coordinates=map_ft.MapLatitudeLongitude(lat, lng),
+        )
 
     def _create_start_marker(self, coordinate: dict) -> map_ft.Marker:
         """Creates the takeoff marker (green plane icon)."""
@@ -102,50 +347,65 @@ class MapRouteBuilder:
             ),
         )
 
-    def _create_intermediate_markers(self, coordinates_list: list) -> list[map_ft.Marker]:
-        """Creates markers along the route at specified distance intervals."""
-        roads_marks: list = []
-        accumulated_distance: int = 0
-        marker_distance_km: int = MARKER_DISTANCE_KM
-
-        for i in range(1, len(coordinates_list)):
-            prev_point: dict = coordinates_list[i - 1]
-            current_point: dict = coordinates_list[i]
-
-            segment_distance: float = self.calculate_distance(
-                prev_point[LATITUDE_FIELD],
-                prev_point[LONGITUDE_FIELD],
-                current_point[LATITUDE_FIELD],
-                current_point[LONGITUDE_FIELD],
-            )
-
-            accumulated_distance += segment_distance
-
-            if accumulated_distance >= marker_distance_km:
-                location_mark = self._create_waypoint_marker(current_point)
-                roads_marks.append(location_mark)
-                accumulated_distance = 0
-
-        return roads_marks
-
-    def _create_waypoint_marker(self, coordinate: dict) -> map_ft.Marker:
-        """Creates a single waypoint marker (black location pin)."""
+    def _create_waypoint_marker(self, coordinate: dict, color: str = ft.Colors.BLACK87) -> map_ft.Marker:
+        """Creates a single waypoint marker (location pin, black by default)."""
         return map_ft.Marker(
-            content=ft.Icon(ft.Icons.LOCATION_ON, color=ft.Colors.BLACK87, size=15),
+            content=ft.Icon(ft.Icons.LOCATION_ON, color=color, size=15),
             coordinates=map_ft.MapLatitudeLongitude(
                 coordinate[LATITUDE_FIELD],
                 coordinate[LONGITUDE_FIELD],
             ),
         )
 
-    def _create_route_polyline(self, coordinates_list: list) -> map_ft.PolylineMarker:
+    def _get_route_polyline(self, flight_route: FlightRoute, level: int) -> map_ft.PolylineMarker:
+        """Returns the polyline of a pyramid level of a flight, building it the first time it is shown."""
+        if level not in flight_route.route_polylines:
+            with profiler.span("map.route_polyline"):
+                flight_route.route_polylines[level] = self._create_route_polyline(
+                    flight_route.route_pyramid.tracks[level], flight_route.color
+                )
+        return flight_route.route_polylines[level]
+
+    def _on_map_event(self, e: map_ft.MapEvent) -> None:
+        """Swaps the route polylines for the pyramid levels matching the new zoom,
+        and the markers for the ones around the new viewport."""
+        if not self.flight_routes or e.zoom is None or self.polyline_layer_ref.current is None:
+            return
+
+        with self.layers_lock:
+            self.current_zoom = e.zoom
+            if e.center is not None and e.center.latitude is not None and e.center.longitude is not None:
+                self.current_center = (e.center.latitude, e.center.longitude)
+            if self.marker_layer_ref.current is not None:
+                self._update_markers()
+
+            changed = False
+            for flight_route in self.flight_routes:
+                level = flight_route.route_pyramid.level_for_zoom(e.zoom)
+                if level != flight_route.current_route_level:
+                    flight_route.current_route_level = level
+                    changed = True
+
+            if not changed:
+                return
+
+            self.polyline_layer_ref.current.polylines = [
+                self._get_route_polyline(flight_route, flight_route.current_route_level)
+                for flight_route in self.flight_routes
+            ] + [segment_polyline for segment_polyline, _ in self.live_segments]
+            self.polyline_layer_ref.current.update()
+
+    def _create_route_polyline(
+        self, coordinates_list: FlightTrack, color: str = ft.Colors.BLUE
+    ) -> map_ft.PolylineMarker:
         """Creates the polyline that draws the flight path on the map."""
         return map_ft.PolylineMarker(
             border_stroke_width=5,
             border_color=ft.Colors.OUTLINE,
-            color=ft.Colors.with_opacity(0.5, ft.Colors.BLUE),
+            color=ft.Colors.with_opacity(0.5, color),
             coordinates=[
-                map_ft.MapLatitudeLongitude(coord[LATITUDE_FIELD], coord[LONGITUDE_FIELD]) for coord in coordinates_list
+                map_ft.MapLatitudeLongitude(lat, lng)
+                for lat, lng in zip(coordinates_list.lat.tolist(), coordinates_list.lng.tolist())
             ],
         )
 
@@ -164,19 +424,21 @@ class MapRouteBuilder:
         marker_layer = self._create_marker_layer(markers)
 
         return map_ft.Map(
+            ref=self.map_ref,
             expand=True,
             initial_center=map_ft.MapLatitudeLongitude(center_lat, center_lng),
-            initial_zoom=10,
+            initial_zoom=MAP_INITIAL_ZOOM,
             interaction_configuration=map_ft.MapInteractionConfiguration(flags=map_ft.MapInteractiveFlag.ALL),
-            on_init=lambda e: print("Initialized Map"),
+            on_init=lambda e: logger.debug("Initialized Map"),
+            on_event=self._on_map_event,
             layers=[tile_layer, attribution_layer, polyline_layer, marker_layer],
         )
 
     def _create_tile_layer(self) -> map_ft.TileLayer:
-        """Creates the base map tile layer (OpenStreetMap)."""
+        """Creates the base map tile layer (OpenStreetMap), served by the local tile cache when there is one."""
         return map_ft.TileLayer(
-            url_template=URL_TEMPLATE,
-            on_image_error=lambda e: print("TileLayer Error"),
+            url_template=self.tile_server.url_template if self.tile_server is not None else URL_TEMPLATE,
+            on_image_error=lambda e: logger.warning("TileLayer Error"),
         )
 
     def _create_attribution_layer(self, page: ft.Page) -> map_ft.RichAttribution:
@@ -0,0 +1,122 @@
+"""spatial index, viewport and clustering of the waypoint markers, so the map only gets what is on screen"""
+
+import math
+from typing import NamedTuple
+
+import numpy as np
+
+from src.utils.configurations import MARKER_CLUSTER_CELL_PX, MARKER_GRID_CELL_DEG, MAX_VISIBLE_MARKERS
+
+TILE_SIZE_PX = 256
+MAX_LATITUDE = 85.0511287798  # web mercator stops here
+
+
+def world_pixels(lat: np.ndarray, lng: np.ndarray, zoom: float) -> tuple:
+    """web mercator pixel coordinates of points at a zoom level"""
+    world_size = TILE_SIZE_PX * 2.0**zoom
+    lat_rad = np.radians(np.clip(lat, -MAX_LATITUDE, MAX_LATITUDE))
+    x = (np.asarray(lng) + 180.0) / 360.0 * world_size
+    y = (1.0 - np.arcsinh(np.tan(lat_rad)) / np.pi) / 2.0 * world_size
+    return x, y
+
+
+def viewport_bbox(center_lat: float, center_lng: float, zoom: float, width_px: float, height_px: float) -> tuple:
+    """(min_lat, min_lng, max_lat, max_lng) seen by a map of width_px x height_px centered on a point"""
+    world_size = TILE_SIZE_PX * 2.0**zoom
+    center_x, center_y = world_pixels(np.array([center_lat]), np.array([center_lng]), zoom)
+
+    def lat_at(y: float) -> float:
+        return math.degrees(math.atan(math.sinh(math.pi * (1.0 - 2.0 * y / world_size))))
+
+    half_width_deg = width_px / 2.0 / world_size * 360.0
+    return (
+        lat_at(min(center_y[0] + height_px / 2.0, world_size)),
+        max(center_lng - half_width_deg, -180.0),
+        lat_at(max(center_y[0] - height_px / 2.0, 0.0)),
+        min(center_lng + half_width_deg, 180.0),
+    )
+
+
+class MarkerGrid:
+    """uniform lat/lng grid over marker positions, bounding box queries only look at the rows they cover"""
+
+    def __init__(self, lat: np.ndarray, lng: np.ndarray, cell_deg: float = MARKER_GRID_CELL_DEG):
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lng = np.asarray(lng, dtype=np.float64)
+        self.cell_deg = cell_deg
+        self.columns = math.ceil(360.0 / cell_deg) + 1
+
+        # markers sorted by cell, a cell row is then one contiguous run per row of the query
+        cells = self._cell_row(self.lat) * self.columns + self._cell_column(self.lng)
+        self.order = np.argsort(cells, kind="stable")
+        self.sorted_cells = cells[self.order]
+
+    def __len__(self) -> int:
+        return len(self.lat)
+
+    def _cell_row(self, lat) -> np.ndarray:
+        return np.floor((np.asarray(lat) + 90.0) / self.cell_deg).astype(np.int64)
+
+    def _cell_column(self, lng) -> np.ndarray:
+        return np.floor((np.asarray(lng) + 180.0) / self.cell_deg).astype(np.int64)
+
+    def query(self, min_lat: float, min_lng: float, max_lat: float, max_lng: float) -> np.ndarray:
+        """indices of the markers inside the bounding box, in ascending order"""
+        if not len(self):
+            return np.zeros(0, dtype=np.int64)
+
+        first_column, last_column = int(self._cell_column(min_lng)), int(self._cell_column(max_lng))
+        runs = []
+        for row in range(int(self._cell_row(min_lat)), int(self._cell_row(max_lat)) + 1):
+            start = np.searchsorted(self.sorted_cells, row * self.columns + first_column, side="left")
+            end = np.searchsorted(self.sorted_cells, row * self.columns + last_column, side="right")
+            if end > start:
+                runs.append(self.order[start:end])
+        if not runs:
+            return np.zeros(0, dtype=np.int64)
+
+        # the edge cells stick out of the box
+        candidates = np.sort(np.concatenate(runs))
+        lat, lng = self.lat[candidates], self.lng[candidates]
+        return candidates[(lat >= min_lat) & (lat <= max_lat) & (lng >= min_lng) & (lng <= max_lng)]
+
+
+class MarkerClusters(NamedTuple):
+    """markers merged per screen cell: the first marker of each cluster, its centroid and its size"""
+
+    first_index: np.ndarray
+    lat: np.ndarray
+    lng: np.ndarray
+    count: np.ndarray
+    cell_px: float
+
+
+def cluster_markers(
+    lat: np.ndarray,
+    lng: np.ndarray,
+    indices: np.ndarray,
+    zoom: float,
+    cell_px: float = MARKER_CLUSTER_CELL_PX,
+    max_clusters: int = MAX_VISIBLE_MARKERS,
+) -> MarkerClusters:
+    """merge the markers `indices` that fall in the same cell_px x cell_px screen cell at this zoom
+    the cells grow until there are at most max_clusters clusters, so zoomed out maps stay light"""
+    indices = np.asarray(indices, dtype=np.int64)
+    x, y = world_pixels(lat[indices], lng[indices], math.floor(zoom))
+
+    while True:
+        cells = np.floor(x / cell_px).astype(np.int64) * (1 << 32) + np.floor(y / cell_px).astype(np.int64)
+        unique_cells, first, inverse, count = np.unique(
+            cells, return_index=True, return_inverse=True, return_counts=True
+        )
+        if len(unique_cells) <= max_clusters:
+            break
+        cell_px *= 2
+
+    return MarkerClusters(
+        indices[first],
+        np.bincount(inverse, weights=lat[indices]) / count,
+        np.bincount(inverse, weights=lng[indices]) / count,
+        count,
+        cell_px,
+    )
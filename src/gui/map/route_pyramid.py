@@ -0,0 +1,53 @@
+"""multi-resolution versions of a flight route, one per zoom range"""
+
+from src.business_logic.src.flight_track import FlightTrack
+from src.business_logic.src.geo_math import simplify_indices
+from src.utils.configurations import ROUTE_LOD_LEVELS, ROUTE_LOD_MAX_VERTICES
+from src.utils.logger_factory import get_module_logger
+
+logger = get_module_logger(__name__)
+
+
+class RoutePyramid:
+    """simplified copies of a track, from the finest (highest zoom) to the coarsest (lowest zoom) level
+    every level is capped at max_vertices so the drawn route stays bounded whatever the flight length"""
+
+    def __init__(
+        self, track: FlightTrack, levels: list = ROUTE_LOD_LEVELS, max_vertices: int = ROUTE_LOD_MAX_VERTICES
+    ):
+        # (min_zoom, tolerance_m) sorted from the highest zoom down
+        self.levels = sorted(levels, reverse=True)
+        self.max_vertices = max_vertices
+        self.tracks: list = []
+
+        source = track
+        for min_zoom, tolerance_m in self.levels:
+            # each level is simplified from the finer one, which is much smaller than the full track
+            source = self._simplify(source, tolerance_m)
+            self.tracks.append(source)
+
+        logger.info(
+            "Route pyramid built: "
+            + ", ".join(
+                f"zoom>={min_zoom}: {len(level_track)}" for (min_zoom, _), level_track in zip(self.levels, self.tracks)
+            )
+            + f" vertices (from {len(track)} fixes)"
+        )
+
+    def _simplify(self, track: FlightTrack, tolerance_m: float) -> FlightTrack:
+        """simplify with tolerance_m, doubling it until the level fits in max_vertices"""
+        simplified = track[simplify_indices(track.lat, track.lng, tolerance_m)]
+        while len(simplified) > self.max_vertices and tolerance_m > 0:
+            tolerance_m *= 2
+            simplified = simplified[simplify_indices(simplified.lat, simplified.lng, tolerance_m)]
+        return simplified
+
+    def level_for_zoom(self, zoom: float) -> int:
+        """index of the level to draw at this zoom"""
+        for level, (min_zoom, _) in enumerate(self.levels):
+            if zoom >= min_zoom:
+                return level
+        return len(self.levels) - 1
+
+    def track_for_zoom(self, zoom: float) -> FlightTrack:
+        return self.tracks[self.level_for_zoom(zoom)]
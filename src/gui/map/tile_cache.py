@@ -0,0 +1,226 @@
+"""on-disk cache of map tiles, filled from MBTiles files or from the tile server of URL_TEMPLATE"""
+
+import math
+import queue
+import sqlite3
+import threading
+import urllib.request
+from pathlib import Path
+from typing import Iterator, Optional
+
+from src.business_logic.src.flight_track import FlightTrack
+from src.utils import configurations
+from src.utils.configurations import (
+    TILE_CACHE_LOW_WATER,
+    TILE_CACHE_MAX_BYTES,
+    TILE_FETCH_TIMEOUT_S,
+    TILE_PREFETCH_MAX_TILES,
+    TILE_PREFETCH_ZOOM_LEVELS,
+    TILE_USER_AGENT,
+    URL_TEMPLATE,
+)
+from src.utils.disk_cache import evict_least_recently_used, mark_used, stat_entries, write_atomically
+from src.utils.logger_factory import get_module_logger
+
+logger = get_module_logger(__name__)
+
+TILE_SUFFIX = ".png"
+MAX_LATITUDE = 85.0511287798  # web mercator stops here
+
+
+def tile_for(lat: float, lng: float, zoom: int) -> tuple:
+    """(x, y) of the web mercator (slippy map) tile holding a point"""
+    tiles = 2**zoom
+    lat_rad = math.radians(min(max(lat, -MAX_LATITUDE), MAX_LATITUDE))
+    x = int((lng + 180.0) / 360.0 * tiles)
+    y = int((1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * tiles)
+    return min(max(x, 0), tiles - 1), min(max(y, 0), tiles - 1)
+
+
+def tiles_for_bbox(min_lat: float, min_lng: float, max_lat: float, max_lng: float, zoom: int) -> Iterator[tuple]:
+    """every (zoom, x, y) tile covering a bounding box, row by row"""
+    min_x, min_y = tile_for(max_lat, min_lng, zoom)
+    max_x, max_y = tile_for(min_lat, max_lng, zoom)
+    for y in range(min_y, max_y + 1):
+        for x in range(min_x, max_x + 1):
+            yield zoom, x, y
+
+
+class MBTilesSource:
+    """read-only access to the tiles of an MBTiles (sqlite) file, rows are stored bottom up (TMS)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+
+    def get(self, zoom: int, x: int, y: int) -> Optional[bytes]:
+        tms_y = 2**zoom - 1 - y
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT tile_data FROM tiles WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?",
+                (zoom, x, tms_y),
+            ).fetchone()
+        return bytes(row[0]) if row else None
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+class TileCache:
+    """tiles stored as <zoom>/<x>/<y>.png files
+    a missing tile is looked up in the MBTiles files first, then downloaded from upstream_url (None = offline).
+    Tiles are evicted least recently used first once the cache grows past max_bytes, down to low_water of it.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[Path] = None,
+        max_bytes: int = TILE_CACHE_MAX_BYTES,
+        low_water: float = TILE_CACHE_LOW_WATER,
+        upstream_url: Optional[str] = URL_TEMPLATE,
+        mbtiles_paths: Optional[list] = None,
+    ):
+        """:param cache_dir: defaults to the configured TILE_CACHE_DIR
+        :param mbtiles_paths: defaults to the configured MBTILES_PATHS"""
+        self.cache_dir = Path(cache_dir if cache_dir is not None else configurations.TILE_CACHE_DIR)
+        if mbtiles_paths is None:
+            mbtiles_paths = configurations.MBTILES_PATHS
+        self.max_bytes = max_bytes
+        self.low_water = low_water
+        self.upstream_url = upstream_url
+        self.mbtiles_sources: list = []
+        for mbtiles_path in mbtiles_paths:
+            try:
+                self.mbtiles_sources.append(MBTilesSource(mbtiles_path))
+            except sqlite3.Error as e:
+                logger.warning(f"Skipping MBTiles file {mbtiles_path}: {e}")
+
+        self._lock = threading.Lock()
+        self._size_bytes: Optional[int] = None  # measured on the first store
+        # flights queued for prefetch, fetched one after the other by a single worker
+        self._prefetch_queue: queue.Queue = queue.Queue()
+        self._prefetch_thread: Optional[threading.Thread] = None
+        self._closing = threading.Event()
+
+    def _tile_path(self, zoom: int, x: int, y: int) -> Path:
+        return self.cache_dir / str(zoom) / str(x) / f"{y}{TILE_SUFFIX}"
+
+    def get(self, zoom: int, x: int, y: int) -> Optional[bytes]:
+        """the tile image, None when no source has it"""
+        tile_path = self._tile_path(zoom, x, y)
+        try:
+            tile = tile_path.read_bytes()
+            mark_used(tile_path)
+            return tile
+        except FileNotFoundError:
+            pass
+
+        for source in self.mbtiles_sources:
+            tile = source.get(zoom, x, y)
+            if tile is not None:
+                return tile
+
+        tile = self._download(zoom, x, y)
+        if tile is not None:
+            self.store(zoom, x, y, tile)
+        return tile
+
+    def _download(self, zoom: int, x: int, y: int) -> Optional[bytes]:
+        if self.upstream_url is None:
+            return None
+
+        url = self.upstream_url.format(z=zoom, x=x, y=y)
+        request = urllib.request.Request(url, headers={"User-Agent": TILE_USER_AGENT})
+        try:
+            with urllib.request.urlopen(request, timeout=TILE_FETCH_TIMEOUT_S) as response:
+                return response.read()
+        except OSError as e:
+            logger.debug(f"Failed to download tile {url}: {e}")
+            return None
+
+    def store(self, zoom: int, x: int, y: int, tile: bytes) -> None:
+        """cache a tile, then evict old tiles if the cache is too big"""
+        tile_path = self._tile_path(zoom, x, y)
+        tile_path.parent.mkdir(parents=True, exist_ok=True)
+
+        write_atomically(tile_path, lambda tile_file: tile_file.write(tile))
+
+        with self._lock:
+            if self._size_bytes is None:
+                self._size_bytes = sum(stat.st_size for stat, _ in stat_entries(self._tile_paths()))
+            else:
+                self._size_bytes += len(tile)
+            if self._size_bytes > self.max_bytes:
+                self._size_bytes = self.evict()
+
+    def _tile_paths(self) -> Iterator[Path]:
+        return self.cache_dir.rglob(f"*{TILE_SUFFIX}")
+
+    def evict(self) -> int:
+        """delete the least recently used tiles until the cache fits in low_water of max_bytes
+        the margin lets many stores go by before the tile tree is scanned again
+        :return the size of the cache after the eviction"""
+        total_bytes, evicted = evict_least_recently_used(self._tile_paths(), int(self.max_bytes * self.low_water))
+        if evicted:
+            logger.info(f"Evicted {len(evicted)} tiles from the tile cache")
+        return total_bytes
+
+    def prefetch(
+        self,
+        track: FlightTrack,
+        zoom_levels: list = TILE_PREFETCH_ZOOM_LEVELS,
+        max_tiles: int = TILE_PREFETCH_MAX_TILES,
+    ) -> int:
+        """make the tiles of the track's bounding box available offline, coarse zoom levels first
+        stops after max_tiles tiles so a long flight doesn't download a whole country
+        :return the number of tiles now available"""
+        if not len(track):
+            return 0
+
+        bbox = (float(track.lat.min()), float(track.lng.min()), float(track.lat.max()), float(track.lng.max()))
+        available = 0
+        for zoom in sorted(zoom_levels):
+            for tile in tiles_for_bbox(*bbox, zoom):
+                if self._closing.is_set():
+                    return available
+                if available >= max_tiles:
+                    logger.info(f"Tile prefetch stopped at {max_tiles} tiles (zoom {zoom})")
+                    return available
+                if self.get(*tile) is not None:
+                    available += 1
+
+        logger.info(f"Prefetched {available} tiles of zoom levels {min(zoom_levels)}-{max(zoom_levels)}")
+        return available
+
+    def prefetch_in_background(self, track: FlightTrack) -> None:
+        """queue the prefetch of a track, a single worker fetches the queued tracks one after the other
+        so adding many flights never downloads more than one tile at a time"""
+        self._prefetch_queue.put(track)
+        with self._lock:
+            if self._prefetch_thread is None:
+                self._prefetch_thread = threading.Thread(
+                    target=self._prefetch_worker, name="tile-prefetch", daemon=True
+                )
+                self._prefetch_thread.start()
+
+    def _prefetch_worker(self) -> None:
+        while True:
+            track = self._prefetch_queue.get()
+            try:
+                if track is None or self._closing.is_set():
+                    return
+                self.prefetch(track)
+            except Exception as e:
+                logger.warning(f"Tile prefetch failed: {e}")
+            finally:
+                self._prefetch_queue.task_done()
+
+    def close(self) -> None:
+        self._closing.set()
+        if self._prefetch_thread is not None:
+            # wakes the worker when the queue is empty
+            self._prefetch_queue.put(None)
+            self._prefetch_thread.join(timeout=TILE_FETCH_TIMEOUT_S)
+        for source in self.mbtiles_sources:
+            source.close()
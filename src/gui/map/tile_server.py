@@ -0,0 +1,78 @@
+"""small local HTTP endpoint serving the tiles of a TileCache to the map's TileLayer"""
+
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from src.gui.map.tile_cache import TileCache
+from src.utils import configurations
+from src.utils.configurations import TILE_SERVER_HOST
+from src.utils.logger_factory import get_module_logger
+
+logger = get_module_logger(__name__)
+
+TILE_PATH_PATTERN = re.compile(r"^/tiles/(\d+)/(\d+)/(\d+)\.png$")
+
+
+class _TileRequestHandler(BaseHTTPRequestHandler):
+    """GET /tiles/<zoom>/<x>/<y>.png"""
+
+    tile_cache: TileCache = None  # set on the subclass made by TileServer
+
+    def do_GET(self) -> None:
+        match = TILE_PATH_PATTERN.match(self.path.split("?", 1)[0])
+        if match is None:
+            self.send_error(404)
+            return
+
+        tile = self.tile_cache.get(*(int(group) for group in match.groups()))
+        if tile is None:
+            self.send_error(404)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "image/png")
+        self.send_header("Content-Length", str(len(tile)))
+        self.send_header("Cache-Control", "max-age=86400")
+        self.end_headers()
+        self.wfile.write(tile)
+
+    def log_message(self, format: str, *args) -> None:
+        # one line per tile would flood the log
+        logger.debug(format % args)
+
+
+class TileServer:
+    """serves a TileCache on http://<host>:<port>/tiles/{z}/{x}/{y}.png from a daemon thread
+    port 0 picks a free port, read the actual one from url_template once started"""
+
+    def __init__(self, tile_cache: TileCache, host: str = TILE_SERVER_HOST, port: Optional[int] = None):
+        """:param port: defaults to the configured TILE_SERVER_PORT"""
+        self.tile_cache = tile_cache
+        self.host = host
+        self.port = port if port is not None else configurations.TILE_SERVER_PORT
+        self.http_server: Optional[ThreadingHTTPServer] = None
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def url_template(self) -> str:
+        """the url_template to give the TileLayer"""
+        return f"http://{self.host}:{self.port}/tiles/{{z}}/{{x}}/{{y}}.png"
+
+    def start(self) -> "TileServer":
+        handler = type("TileRequestHandler", (_TileRequestHandler,), {"tile_cache": self.tile_cache})
+        self.http_server = ThreadingHTTPServer((self.host, self.port), handler)
+        self.http_server.daemon_threads = True
+        self.port = self.http_server.server_address[1]
+
+        self.thread = threading.Thread(target=self.http_server.serve_forever, name="tile-server", daemon=True)
+        self.thread.start()
+        logger.info(f"Serving map tiles on {self.url_template}")
+        return self
+
+    def stop(self) -> None:
+        if self.http_server is not None:
+            self.http_server.shutdown()
+            self.http_server.server_close()
+            self.http_server = None
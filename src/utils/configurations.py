@@ -1,3 +1,4 @@
+import functools
 import json
 import logging
 from pathlib import Path
@@ -9,30 +10,132 @@ GUI_DIR = SRC_DIR / "gui"
 FILES_HANDLER_DIR = GUI_DIR / "file_handler"
 MAP_DIR = GUI_DIR / "map"
 LOGS_DIR = PROJECT_ROOT / "logs"
+CACHE_DIR = PROJECT_ROOT / "cache"
 
 
 FORMATTER = logging.Formatter("%(asctime)s - %(levelname)s - %(filename)s:%(lineno)d - %(funcName)s() - %(message)s")
 LOG_FILE = LOGS_DIR / "project_logs.txt"  # The name and location of the log file.
+PROFILING_ENABLED = True  # collect timing spans and counters of the parse -> build -> render path
 
 
 MARKER_DISTANCE_KM = 200  # Default distance between markers in kilometers
+ROUTE_SIMPLIFY_TOLERANCE_M = 10  # max deviation in meters of the drawn route from the GPS fixes, 0 draws every fix
+# route level of detail: (min map zoom, simplification tolerance in meters), the finest level uses the tolerance above
+ROUTE_LOD_LEVELS = [(0, 2000), (6, 500), (9, 100), (12, 25), (15, ROUTE_SIMPLIFY_TOLERANCE_M)]
+ROUTE_LOD_MAX_VERTICES = 20000  # upper bound of vertices drawn at any zoom
+MAP_INITIAL_ZOOM = 10
+MAP_VIEWPORT_PX = (1600, 1000)  # assumed map size in pixels when the page size is not known yet
+MARKER_VIEWPORT_MARGIN = 0.5  # markers are kept this fraction of the viewport beyond each edge, so panning shows them
+MARKER_GRID_CELL_DEG = 0.25  # cell size of the spatial grid over the waypoint markers
+MARKER_CLUSTER_CELL_PX = 60  # waypoints closer than this on screen are drawn as one cluster marker
+MAX_VISIBLE_MARKERS = 200  # upper bound of waypoint / cluster markers sent to the map at once
 MSG_NUMBER_TO_SHOW = 10000  # Default distance between massage markers in kilometers
+POINT_BATCH_SIZE = 10000  # points per batch yielded by ReadeBinFile.iter_points
+READ_TRACK_BATCH_SIZE = 1000000  # internal batch size of read_track, bounds the typed buffers being grown
+COLUMN_GATHER_BYTES = 1024 * 1024  # payload bytes gathered at once by read_telemetry, bounds its index arrays
+PROGRESS_UPDATE_INTERVAL_S = 0.5  # min seconds between two progress updates of the status text
 # names of latitude and longitude fields in the data
 LATITUDE_FIELD = "Lat"
 LONGITUDE_FIELD = "Lng"
 
+# message types that carry GPS coordinates
+GPS_MESSAGE_TYPES = ["GPS", "GPS_RAW_INT", "GLOBAL_POSITION_INT"]
+# engine used by ReadeBinFile: "dataflash" decodes only the GPS records, "pymavlink" decodes every message
+DATAFLASH_ENGINE = "dataflash"
+PYMAVLINK_ENGINE = "pymavlink"
+READER_ENGINE = DATAFLASH_ENGINE
+USE_MMAP = True  # map the log into memory instead of reading it into a bytes object
+PARSE_WORKERS = 1  # worker processes used by the dataflash engine, e.g. os.cpu_count() on analysis machines
+PARALLEL_MIN_BYTES = 64 * 1024 * 1024  # smaller logs are read in a single process
+PARALLEL_CHUNKS_PER_WORKER = 4  # more chunks than workers evens out chunks with few GPS records
+MULTI_FILE_WORKERS = 4  # worker processes parsing the logs when several are opened at once
+# keep the record offsets of every message type next to the log (<log>.idx.npz): the first read pays for a scan of
+# the whole log, later time window and telemetry reads seek with it; plain track reads don't gain from it
+MESSAGE_INDEX_ENABLED = False
+MESSAGE_INDEX_SUFFIX = ".idx.npz"
+INDEX_CHECKPOINT_BYTES = 1024 * 1024  # one (offset, TimeUS) checkpoint per block, the granularity of time seeks
+INDEX_SCAN_BLOCK_BYTES = 32 * 1024 * 1024  # bounds the temporary arrays of the index scan
+TRACK_CACHE_ENABLED = True  # keep parsed tracks on disk so a log is only parsed once
+TRACK_CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024  # least recently used tracks are evicted past this size
+TRACK_CACHE_HASH_BYTES = 1024 * 1024  # bytes hashed at the start and at the end of a log for the cache key
+
+# live mode: fixes of a growing log or of a MAVLink UDP stream are drawn as they arrive
+LIVE_BUFFER_SIZE = 100000  # newest fixes kept in memory and on the map
+LIVE_UPDATE_INTERVAL_S = 0.5  # min seconds between two map updates, new fixes are batched in between
+LIVE_POLL_INTERVAL_S = 0.1  # how often a growing log is checked for new bytes
+LIVE_READ_BYTES = 1024 * 1024  # max bytes of a growing log read per poll
+LIVE_MAVLINK_MESSAGE_TYPES = ["GLOBAL_POSITION_INT"]  # "GPS_RAW_INT" for the raw receiver position
+LIVE_REPLAY_RATE_HZ = 10  # fixes per second sent by replay_main.py
+LIVE_FOLLOW = True  # move the map with the aircraft
+
+BATCH_SUMMARY_NAME = "summary"  # file name (without extension) of the batch command line summary
+EXPORT_BATCH_SIZE = 100000  # points per batch streamed to the export writers, bounds their memory
+EXPORT_PARQUET_COMPRESSION = "zstd"
+EXPORT_ARROW_COMPRESSION = "zstd"  # "lz4" reads faster, None writes uncompressed
+
 PAGE_TITLE = " - Flight Path - "
 
 URL_TEMPLATE = "https://tile.openstreetmap.org/{z}/{x}/{y}.png"
 LAUNCH_URL = "https://openstreetmap.org/copyright"
 
 SETTINGS_FILE_PATH = CONFIG_DIR / "config.json"
-try:
-    with open(SETTINGS_FILE_PATH, "r") as f:
-        settings = json.load(f)
-except FileNotFoundError:
-    settings = {}
-    print(f"WARNING: Configuration file not found at {SETTINGS_FILE_PATH}. Using defaults.")
 
 
-BIN_FILE_PATH = settings.get("BIN_FILE_PATH", "C:\\Users\\User\\OneDrive\\Desktop\\step.0\\log_file_test_01.bin")
+@functools.lru_cache(maxsize=None)
+def get_settings() -> dict:
+    """the settings of config.json, read once on first use, {} (the defaults) when there is no such file"""
+    try:
+        with open(SETTINGS_FILE_PATH, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+# logging: "src" is the parent of every module logger, so one handler setup covers the whole project
+PROJECT_LOGGER_NAME = "src"
+LOG_QUEUE_BATCH_SIZE = 1000  # max records the background thread writes before flushing the handlers
+
+# map tiles are served to the TileLayer from a local cache, so panning doesn't wait on the network
+TILE_CACHE_MAX_BYTES = 1024 * 1024 * 1024  # least recently used tiles are evicted past this size
+TILE_CACHE_LOW_WATER = 0.9  # share of TILE_CACHE_MAX_BYTES kept by an eviction, so the next stores don't evict again
+TILE_SERVER_HOST = "127.0.0.1"
+TILE_PREFETCH_ZOOM_LEVELS = list(range(6, 14))  # zoom levels of the flight's bounding box fetched in the background
+TILE_PREFETCH_MAX_TILES = 500  # keeps the prefetch within the OpenStreetMap tile usage policy
+TILE_FETCH_TIMEOUT_S = 10
+TILE_USER_AGENT = "read_bin-flight-path-viewer"
+
+# constants config.json can override: name -> (default, conversion of the configured value)
+# they are resolved on first use by __getattr__, so importing this module reads no file
+SETTING_DEFAULTS = {
+    "LOG_LEVEL": ("INFO", None),
+    # per-module levels, e.g. {"src.business_logic.src.read_bin_file": "WARNING"} to silence the parse progress
+    "LOG_LEVELS": ({}, None),
+    # write the log records on a background thread, the logging call only puts the record on a queue
+    "ASYNC_LOGGING": (False, None),
+    # machine readable profile, one JSON line per processed file, None only logs the profile
+    "PROFILE_OUTPUT_PATH": (None, None),
+    "TRACK_CACHE_DIR": (CACHE_DIR / "tracks", Path),
+    # message types and columns read by ReadeBinFile.read_telemetry, TimeUS is always added
+    "TELEMETRY_SPEC": ({"GPS": ["Alt", "Spd"], "ATT": ["Roll", "Pitch", "Yaw"], "BAT": ["Volt", "Curr"]}, None),
+    "TILE_CACHE_ENABLED": (True, None),
+    "TILE_CACHE_DIR": (CACHE_DIR / "tiles", Path),
+    "MBTILES_PATHS": ([], None),  # pre-seeded MBTiles files, looked up before downloading
+    "TILE_OFFLINE": (False, None),  # never download, only serve cached and MBTiles tiles
+    "TILE_SERVER_PORT": (0, None),  # 0 picks a free port
+    # live mode source: a MAVLink endpoint (e.g. "udpin:0.0.0.0:14550"), or a .bin/.tlog log being written
+    "LIVE_SOURCE": ("udpin:127.0.0.1:14550", None),
+    "BIN_FILE_PATH": ("C:\\Users\\User\\OneDrive\\Desktop\\step.0\\log_file_test_01.bin", None),
+}
+
+
+def __getattr__(name: str):
+    if name not in SETTING_DEFAULTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    default, convert = SETTING_DEFAULTS[name]
+    value = get_settings().get(name, default)
+    if convert is not None:
+        value = convert(value)
+    # later lookups find the plain module attribute
+    globals()[name] = value
+    return value
@@ -0,0 +1,51 @@
+"""file helpers shared by the on-disk caches: atomic writes and least recently used eviction"""
+
+import os
+import threading
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterable
+
+
+def write_atomically(path: Path, write: Callable[[BinaryIO], None]) -> None:
+    """write a cache file through a temporary file, so a concurrent reader never sees a half written file
+    :param write: called with the open temporary file"""
+    temp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(temp_path, "wb") as temp_file:
+            write(temp_file)
+        os.replace(temp_path, path)
+    finally:
+        # left behind when the write failed, e.g. on a full disk
+        temp_path.unlink(missing_ok=True)
+
+
+def mark_used(path: Path) -> None:
+    """the modification time doubles as the last use time for the LRU eviction"""
+    os.utime(path)
+
+
+def stat_entries(paths: Iterable[Path]) -> list:
+    """(stat, path) of the cache files, skipping the ones evicted by another process in the meantime"""
+    entries = []
+    for path in paths:
+        try:
+            entries.append((path.stat(), path))
+        except FileNotFoundError:
+            continue
+    return entries
+
+
+def evict_least_recently_used(paths: Iterable[Path], target_bytes: int) -> tuple:
+    """delete the least recently used cache files until the rest fit in target_bytes
+    :return (the size of the remaining files, the deleted paths)"""
+    entries = stat_entries(paths)
+    total_bytes = sum(stat.st_size for stat, _ in entries)
+
+    evicted = []
+    for stat, path in sorted(entries, key=lambda item: item[0].st_mtime_ns):
+        if total_bytes <= target_bytes:
+            break
+        path.unlink(missing_ok=True)
+        total_bytes -= stat.st_size
+        evicted.append(path)
+    return total_bytes, evicted
@@ -0,0 +1,90 @@
+"""lightweight profiler: timing spans and counters of the parse -> build -> render path"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from src.utils import configurations
+from src.utils.configurations import PROFILING_ENABLED
+from src.utils.logger_factory import get_module_logger
+
+logger = get_module_logger(__name__)
+
+
+class Profiler:
+    """collects timing spans (calls, total and max seconds per name) and named counters
+    spans are meant for coarse steps (a whole parse, a map build), hot loops should count locally and add once"""
+
+    def __init__(self, enabled: bool = PROFILING_ENABLED):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.spans: dict = {}
+        self.counters: dict = {}
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """time the body of the with block under `name`"""
+        if not self.enabled:
+            yield
+            return
+
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start_time
+            with self._lock:
+                span = self.spans.setdefault(name, {"count": 0, "total_s": 0.0, "max_s": 0.0})
+                span["count"] += 1
+                span["total_s"] += elapsed
+                span["max_s"] = max(span["max_s"], elapsed)
+
+    def count(self, name: str, value: int = 1) -> None:
+        """add `value` to the counter `name`"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def snapshot(self) -> dict:
+        """copy of the current spans and counters"""
+        with self._lock:
+            return {
+                "spans": {name: dict(span) for name, span in self.spans.items()},
+                "counters": dict(self.counters),
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self.spans.clear()
+            self.counters.clear()
+
+    def report(self, title: str, output_path: Optional[str] = None) -> dict:
+        """log every span and counter, append them as one JSON line to output_path if set, then reset
+        :param output_path: defaults to the configured PROFILE_OUTPUT_PATH"""
+        if output_path is None:
+            output_path = configurations.PROFILE_OUTPUT_PATH
+        snapshot = self.snapshot()
+        self.reset()
+        if not self.enabled:
+            return snapshot
+
+        for name, span in sorted(snapshot["spans"].items()):
+            logger.info(
+                f"[profile] {title} {name}: {span['total_s'] * 1000:.1f} ms total, "
+                f"{span['count']} calls, {span['max_s'] * 1000:.1f} ms max"
+            )
+        for name, value in sorted(snapshot["counters"].items()):
+            logger.info(f"[profile] {title} {name}: {value}")
+
+        if output_path:
+            with open(output_path, "a", encoding="utf-8") as profile_file:
+                profile_file.write(json.dumps({"title": title, "time": time.time(), **snapshot}) + "\n")
+
+        return snapshot
+
+
+# create a global profiler instance for singleton usage
+profiler = Profiler()
@@ -1,28 +1,106 @@
 """This module defines a LoggerFactory class that creates and configures logs instances."""
 
+import atexit
 import logging
+import queue
 import sys
+import threading
 from logging import Logger
-from logging.handlers import TimedRotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
 
-from src.utils.configurations import FORMATTER, LOG_FILE
+from typing import Optional
+
+from src.utils import configurations
+from src.utils.configurations import (
+    FORMATTER,
+    LOG_FILE,
+    LOG_QUEUE_BATCH_SIZE,
+    PROJECT_LOGGER_NAME,
+    SETTINGS_FILE_PATH,
+    get_settings,
+)
 
 # Define the format for the log messages.
 # This format includes the timestamp, log level, and the message itself.
 # Timestamp format: YYYY-MM-DD, HH:MM
 
 
+class _FlushPerBatchMixin:
+    """
+    Handler mixin for the async mode: emit() no longer flushes, the listener flushes once per batch.
+    """
+
+    def flush(self) -> None:
+        pass
+
+    def flush_batch(self) -> None:
+        super().flush()
+
+
+class _BatchStreamHandler(_FlushPerBatchMixin, logging.StreamHandler):
+    pass
+
+
+class _BatchTimedRotatingFileHandler(_FlushPerBatchMixin, TimedRotatingFileHandler):
+    pass
+
+
+class BatchQueueListener(QueueListener):
+    """
+    Queue listener that handles up to batch_size queued records per wake-up and flushes the handlers once per batch.
+    """
+
+    def __init__(self, log_queue: queue.Queue, *handlers: logging.Handler, batch_size: int = LOG_QUEUE_BATCH_SIZE):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.batch_size = batch_size
+
+    def stop(self) -> None:
+        # safe to call twice, e.g. explicitly and again at exit
+        if self._thread is not None:
+            super().stop()
+
+    def _monitor(self) -> None:
+        while True:
+            batch = [self.dequeue(True)]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = False
+            for record in batch:
+                if record is self._sentinel:
+                    stop = True
+                else:
+                    self.handle(record)
+                if hasattr(self.queue, "task_done"):
+                    self.queue.task_done()
+
+            for handler in self.handlers:
+                getattr(handler, "flush_batch", handler.flush)()
+
+            if stop:
+                break
+
+
 class LoggerFactory:
     """
     A factory class to create and configure logs instances.
     """
 
+    def __init__(self, async_logging: Optional[bool] = None):
+        # the settings are read when the first logger is configured, not when this module is imported
+        self.async_logging = configurations.ASYNC_LOGGING if async_logging is None else async_logging
+        self.listener = None
+
     def get_console_handler(self) -> logging.StreamHandler:
         """
         Creates a handler to print log messages to the console (command line).
         """
         # This handler will output to standard out (the console).
-        console_handler = logging.StreamHandler(sys.stdout)
+        handler_class = _BatchStreamHandler if self.async_logging else logging.StreamHandler
+        console_handler = handler_class(sys.stdout)
         # Set the formatter for this handler.
         console_handler.setFormatter(FORMATTER)
         return console_handler
@@ -31,24 +109,51 @@ class LoggerFactory:
         """
         Creates a handler to write log messages to a file.
         """
-        file_handler = TimedRotatingFileHandler(LOG_FILE, when="midnight", backupCount=7, encoding="utf-8")
+        handler_class = _BatchTimedRotatingFileHandler if self.async_logging else TimedRotatingFileHandler
+        LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
+        # the file is only opened by the first record written to it
+        file_handler = handler_class(LOG_FILE, when="midnight", backupCount=7, encoding="utf-8", delay=True)
         file_handler.setFormatter(FORMATTER)
         return file_handler
 
+    def get_queue_handler(self, *handlers: logging.Handler) -> QueueHandler:
+        """
+        Creates a handler that only puts the records on a queue, a listener thread writes them with `handlers`.
+        """
+        log_queue: queue.Queue = queue.SimpleQueue()
+        self.listener = BatchQueueListener(log_queue, *handlers)
+        self.listener.start()
+        # write what is still queued when the program exits
+        atexit.register(self.listener.stop)
+        return QueueHandler(log_queue)
+
     def get_logger(self, logger_name: str) -> Logger:
         """
         Creates and configures a logs instance.
         """
         # Get a logs instance with the specified name.
         logger = logging.getLogger(logger_name)
+        if logger.handlers:
+            return logger
 
-        # Set the logging level. INFO means it will handle INFO, WARNING, ERROR, and CRITICAL messages.
-        logger.setLevel(logging.INFO)
+        # The level comes from the config, INFO means it will handle INFO, WARNING, ERROR, and CRITICAL messages.
+        log_levels = configurations.LOG_LEVELS
+        logger.setLevel(log_levels.get(logger_name, configurations.LOG_LEVEL))
 
         # Add the console and file handlers to the logs.
         # This logs will now log to both the console and the file.
-        logger.addHandler(self.get_console_handler())
-        logger.addHandler(self.get_file_handler())
+        handlers = [self.get_console_handler(), self.get_file_handler()]
+        if self.async_logging:
+            # the caller only pays for putting the record on the queue, the I/O runs on the listener thread
+            logger.addHandler(self.get_queue_handler(*handlers))
+        else:
+            for handler in handlers:
+                logger.addHandler(handler)
+
+        # per-module levels, e.g. {"src.business_logic.src.read_bin_file": "WARNING"}
+        for module_name, level in log_levels.items():
+            if module_name != logger_name:
+                logging.getLogger(module_name).setLevel(level)
 
         # This sent log messages to the root logs.
         logger.propagate = True
@@ -56,8 +161,63 @@ class LoggerFactory:
         return logger
 
 
-# create a global logs instance for singleton usage
-logger = LoggerFactory().get_logger(__name__)
+_project_logger_lock = threading.Lock()
+_project_logger_ready = False
+
+
+def get_project_logger() -> Logger:
+    """
+    Returns the project logger, its handlers are created by the first call.
+    Every module logger (named after the module, "src.…") is its child.
+    """
+    global _project_logger_ready
+    with _project_logger_lock:
+        project_logger = logging.getLogger(PROJECT_LOGGER_NAME)
+        if _project_logger_ready:
+            return project_logger
+
+        if not project_logger.handlers:
+            project_logger = LoggerFactory().get_logger(PROJECT_LOGGER_NAME)
+        _project_logger_ready = True
+
+    if not get_settings() and not SETTINGS_FILE_PATH.exists():
+        project_logger.warning(f"Configuration file not found at {SETTINGS_FILE_PATH}. Using defaults.")
+    return project_logger
+
+
+class _LazyModuleLogger(logging.LoggerAdapter):
+    """
+    Module logger that creates the project handlers when it first checks a level (i.e. on the first log call),
+    so importing a module reads no settings and installs no handler.
+    """
+
+    def __init__(self, module_name: str):
+        super().__init__(logging.getLogger(module_name), {})
+
+    def isEnabledFor(self, level: int) -> bool:
+        if not _project_logger_ready:
+            get_project_logger()
+        return self.logger.isEnabledFor(level)
+
+    def process(self, msg, kwargs):
+        # keep the caller's `extra`, the adapter adds nothing
+        return msg, kwargs
+
+
+def get_module_logger(module_name: str) -> logging.LoggerAdapter:
+    """
+    Returns the logger of a module, it writes through the handlers of the project logger.
+    """
+    return _LazyModuleLogger(module_name)
+
+
+def __getattr__(name: str):
+    # global logs instance kept for singleton usage, created on first use
+    if name == "logger":
+        return get_module_logger(__name__)
+    if name == "project_logger":
+        return get_project_logger()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,18 @@
+"""Shared pytest fixtures."""
+
+import pytest
+
+
+class _NoTrackCache:
+    """stands in for TrackCache so parsing tests always really parse"""
+
+    def load(self, path):
+        return None
+
+    def store(self, path, track):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def no_track_cache(monkeypatch):
+    monkeypatch.setattr("src.business_logic.src.read_bin_file.TrackCache", _NoTrackCache)
@@ -0,0 +1,141 @@
+"""helpers to write synthetic DataFlash (.bin) logs for the tests and the benchmarks"""
+
+import math
+import random
+import struct
+
+from src.business_logic.src.dataflash_reader import FMT_MSG_ID, FMT_STRUCT, FORMAT_TO_STRUCT, HEADER
+
+FMT_FORMAT = ("FMT", "BBnNZ", "Type,Length,Name,Format,Columns")
+GPS_FORMAT = ("GPS", "QBBIHBcLLeffffB", "TimeUS,I,Status,GMS,GWk,NSats,HDop,Lat,Lng,Alt,Spd,GCrs,VZ,Yaw,U")
+IMU_FORMAT = ("IMU", "QBffffff", "TimeUS,I,GyrX,GyrY,GyrZ,AccX,AccY,AccZ")
+ATT_FORMAT = ("ATT", "QccccCCCCB", "TimeUS,DesRoll,Roll,DesPitch,Pitch,DesYaw,Yaw,ErrRP,ErrYaw,AEKF")
+BAT_FORMAT = ("BAT", "QBfffffcfB", "TimeUS,Inst,Volt,VoltR,Curr,CurrTot,EnrgTot,Temp,Res,RemPct")
+
+GPS_MSG_ID = 130
+IMU_MSG_ID = 131
+ATT_MSG_ID = 132
+BAT_MSG_ID = 133
+
+
+def _payload_struct(format_chars: str) -> struct.Struct:
+    return struct.Struct("<" + "".join(FORMAT_TO_STRUCT[char][0] for char in format_chars))
+
+
+def fmt_record(msg_id: int, name: str, format_chars: str, columns: str) -> bytes:
+    """build the FMT record describing `msg_id`"""
+    length = 3 + _payload_struct(format_chars).size
+    return (
+        HEADER
+        + bytes([FMT_MSG_ID])
+        + FMT_STRUCT.pack(msg_id, length, name.encode(), format_chars.encode(), columns.encode())
+    )
+
+
+def gps_record(time_us: int, lat: float, lng: float, instance: int = 1, alt: float = 100.0) -> bytes:
+    """build a GPS record, lat/lng in degrees"""
+    payload = _payload_struct(GPS_FORMAT[1]).pack(
+        time_us, instance, 3, 0, 0, 10, 90, round(lat * 1e7), round(lng * 1e7), round(alt * 100), 20.0, 0.0, 0.0, 0.0, 1
+    )
+    return HEADER + bytes([GPS_MSG_ID]) + payload
+
+
+def imu_record(time_us: int) -> bytes:
+    """build an IMU record used as noise between the GPS records"""
+    payload = _payload_struct(IMU_FORMAT[1]).pack(time_us, 0, 0.1, 0.2, 0.3, 0.0, 0.0, -9.8)
+    return HEADER + bytes([IMU_MSG_ID]) + payload
+
+
+def write_log(path: str, points: list, imu_per_gps: int = 3) -> None:
+    """write a log with one GPS record per (lat, lng) point and some IMU records in between"""
+    with open(path, "wb") as bin_file:
+        bin_file.write(fmt_record(FMT_MSG_ID, *FMT_FORMAT))
+        bin_file.write(fmt_record(GPS_MSG_ID, *GPS_FORMAT))
+        bin_file.write(fmt_record(IMU_MSG_ID, *IMU_FORMAT))
+
+        time_us = 0
+        for lat, lng in points:
+            for _ in range(imu_per_gps):
+                time_us += 1000
+                bin_file.write(imu_record(time_us))
+            time_us += 1000
+            bin_file.write(gps_record(time_us, lat, lng))
+
+
+def att_record(time_us: int, roll: float, pitch: float, yaw: float) -> bytes:
+    """build an ATT record, angles in degrees"""
+    payload = _payload_struct(ATT_FORMAT[1]).pack(
+        time_us, 0, round(roll * 100), 0, round(pitch * 100), 0, round(yaw * 100) % 36000, 0, 0, 1
+    )
+    return HEADER + bytes([ATT_MSG_ID]) + payload
+
+
+def bat_record(time_us: int, volt: float) -> bytes:
+    """build a BAT record"""
+    payload = _payload_struct(BAT_FORMAT[1]).pack(time_us, 0, volt, volt, 12.0, 100.0, 10.0, 2500, 0.01, 80)
+    return HEADER + bytes([BAT_MSG_ID]) + payload
+
+
+def _noise_record(noise: int, time_us: int, point: int, heading: float) -> bytes:
+    """the noise-th non GPS record between two fixes: mostly IMU and ATT, every tenth one BAT"""
+    if noise % 10 == 9:
+        return bat_record(time_us, 16.8 - point * 1e-5)
+    if noise % 2:
+        return att_record(time_us, 5.0, 2.0, math.degrees(heading))
+    return imu_record(time_us)
+
+
+def generate_log(
+    path: str,
+    gps_points: int,
+    gps_rate_hz: float = 5.0,
+    noise_per_gps: int = 20,
+    corrupt_blocks: int = 0,
+    seed: int = 0,
+) -> None:
+    """write a realistic-ish log: a wandering flight path with GPS at gps_rate_hz,
+    noise_per_gps IMU/ATT/BAT records between two GPS fixes, and corrupt_blocks runs of random garbage bytes"""
+    rng = random.Random(seed)
+    gps_interval_us = int(1e6 / gps_rate_hz)
+    noise_interval_us = max(gps_interval_us // (noise_per_gps + 1), 1)
+    corrupt_at = set(rng.sample(range(gps_points), min(corrupt_blocks, gps_points)))
+
+    lat, lng, heading = 32.0, 34.8, 0.0
+    step_deg = 25.0 / gps_rate_hz / 111000  # ~25 m/s ground speed
+
+    with open(path, "wb") as bin_file:
+        for msg_id, log_format in (
+            (FMT_MSG_ID, FMT_FORMAT),
+            (GPS_MSG_ID, GPS_FORMAT),
+            (IMU_MSG_ID, IMU_FORMAT),
+            (ATT_MSG_ID, ATT_FORMAT),
+            (BAT_MSG_ID, BAT_FORMAT),
+        ):
+            bin_file.write(fmt_record(msg_id, *log_format))
+
+        records: list = []
+        for point in range(gps_points):
+            time_us = point * gps_interval_us
+            for noise in range(noise_per_gps):
+                records.append(_noise_record(noise, time_us + (noise + 1) * noise_interval_us, point, heading))
+
+            heading += rng.gauss(0, 0.05)
+            lat += step_deg * math.cos(heading)
+            lng += step_deg * math.sin(heading)
+            records.append(gps_record(time_us + gps_interval_us, lat, lng, alt=100 + 50 * math.sin(point / 500)))
+
+            if point in corrupt_at:
+                records.append(bytes(rng.getrandbits(8) for _ in range(rng.randint(1, 64))))
+
+            if len(records) >= 10000:
+                bin_file.write(b"".join(records))
+                records = []
+
+        bin_file.write(b"".join(records))
+
+
+def gps_points_for_size(target_bytes: int, noise_per_gps: int = 20) -> int:
+    """number of GPS points generate_log needs to write roughly target_bytes"""
+    noise_bytes = sum(len(_noise_record(noise, 0, 0, 0)) for noise in range(noise_per_gps))
+    bytes_per_point = len(gps_record(0, 0, 0)) + noise_bytes
+    return max(target_bytes // bytes_per_point, 1)
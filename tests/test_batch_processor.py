@@ -0,0 +1,80 @@
+"""Tests for the headless batch processing of many logs."""
+
+import json
+
+from batch_main import main
+from src.business_logic.src.batch_processor import collect_log_paths, process_logs
+from src.business_logic.src.flight_track import FlightTrack
+from tests.synthetic_log import write_log
+
+
+def _write_logs(directory) -> list:
+    (directory / "day_1").mkdir()
+    (directory / "day_2").mkdir()
+    paths = [str(directory / "day_1" / "sortie.bin"), str(directory / "day_2" / "sortie.bin")]
+    write_log(paths[0], [(32.0, 34.8), (32.1, 34.8)])
+    write_log(paths[1], [(32.0, 34.8), (32.0, 34.9), (32.0, 35.0)])
+    return paths
+
+
+def test_collect_log_paths_from_directories_and_globs(tmp_path):
+    paths = _write_logs(tmp_path)
+    (tmp_path / "notes.txt").write_text("not a log")
+
+    assert collect_log_paths([str(tmp_path)]) == sorted(paths)
+    assert collect_log_paths([str(tmp_path / "day_*" / "*.bin")]) == sorted(paths)
+
+
+def test_process_logs_in_parallel(tmp_path):
+    paths = _write_logs(tmp_path)
+
+    summaries = process_logs(paths, str(tmp_path / "out"), workers=2)
+
+    assert [summary["points"] for summary in summaries] == [2, 3]
+    assert [summary["error"] for summary in summaries] == [None, None]
+    assert summaries[0]["output"] != summaries[1]["output"]
+    assert abs(summaries[0]["distance_km"] - 11.12) < 0.01
+    assert summaries[1]["duration_s"] == 0.008
+    assert len(FlightTrack.load(summaries[1]["output"])) == 3
+
+
+def test_main_writes_summary(tmp_path):
+    _write_logs(tmp_path)
+    output_dir = tmp_path / "out"
+
+    assert main([str(tmp_path), "--output", str(output_dir), "--workers", "1"]) == 0
+
+    summary = json.loads((output_dir / "summary.json").read_text())
+    assert len(summary) == 2
+    assert (output_dir / "summary.csv").exists()
+
+
+def test_unreadable_log_is_reported_as_an_error(tmp_path, monkeypatch):
+    paths = _write_logs(tmp_path)
+
+    def broken_reader(*args, **kwargs):
+        raise OSError("device not ready")
+
+    monkeypatch.setattr("src.business_logic.src.read_bin_file.DataFlashReader", broken_reader)
+    summaries = process_logs(paths[:1] + [str(tmp_path / "missing.bin")], str(tmp_path / "out"), workers=1)
+
+    assert summaries[0]["error"] == "device not ready" and summaries[0]["points"] is None
+    assert summaries[1]["error"] is not None
+    assert main([str(tmp_path), "--output", str(tmp_path / "out"), "--workers", "1"]) == 1
+
+
+def test_main_reports_missing_and_broken_logs(tmp_path, monkeypatch):
+    paths = _write_logs(tmp_path)
+    (tmp_path / "broken.bin").symlink_to(tmp_path / "nowhere.bin")
+    assert collect_log_paths([str(tmp_path)]) == sorted(paths)
+
+    # a log deleted between the collection and its processing
+    missing_path = str(tmp_path / "deleted.bin")
+    monkeypatch.setattr("batch_main.collect_log_paths", lambda inputs: paths + [missing_path])
+    output_dir = tmp_path / "out"
+
+    assert main([str(tmp_path), "--output", str(output_dir), "--workers", "1"]) == 1
+
+    summary = json.loads((output_dir / "summary.json").read_text())
+    assert [entry["error"] is None for entry in summary] == [True, True, False]
+    assert summary[2]["size_mb"] is None
@@ -0,0 +1,41 @@
+"""Smoke test of the benchmark suite on a tiny synthetic log."""
+
+import json
+
+from benchmarks.run_benchmarks import main
+from src.business_logic.src.read_bin_file import ReadeBinFile
+from tests.synthetic_log import generate_log
+
+
+def test_generated_log_is_parsed_by_both_engines(tmp_path):
+    log_path = str(tmp_path / "synthetic.bin")
+    generate_log(log_path, 300, noise_per_gps=10)
+
+    native = ReadeBinFile(log_path, engine="dataflash").process_bin_file()
+    reference = ReadeBinFile(log_path, engine="pymavlink").process_bin_file()
+
+    assert len(native) == 300
+    assert native == reference
+
+
+def test_benchmarks_write_results(tmp_path):
+    output_path = tmp_path / "results.json"
+    args = ["--sizes-mb", "0.1", "--repeat", "1", "--output", str(output_path)]
+
+    main(args)
+    main(args + ["--compare", str(output_path)])
+
+    results = json.loads(output_path.read_text())
+    names = [row["name"] for row in results["results"]]
+    assert names == [
+        "startup[library]",
+        "startup[batch]",
+        "startup[gui]",
+        "process_bin_file[dataflash]",
+        "read_track",
+        "MessageIndex.build",
+        "_add_waypoints",
+        "_visible_markers",
+        "_create_route_polyline",
+    ]
+    assert all(row["points"] > 0 for row in results["results"] if not row["name"].startswith("startup"))
@@ -0,0 +1,40 @@
+"""Tests for the columnar FlightTrack type."""
+
+import numpy as np
+
+from src.business_logic.src.flight_track import FlightTrack, FlightTrackBuilder
+from src.business_logic.src.read_bin_file import ReadeBinFile
+from tests.synthetic_log import write_log
+
+
+def test_dict_list_round_trip():
+    points = [{"Lat": 32.1, "Lng": 34.8}, {"Lat": 32.2, "Lng": 34.9}]
+    track = FlightTrack.from_dict_list(points)
+
+    assert len(track) == 2
+    assert track[0] == points[0]
+    assert track[-1] == points[-1]
+    assert track.to_dict_list() == points
+    assert track.lat.dtype == np.float64
+
+
+def test_builder_drops_incomplete_optional_columns():
+    builder = FlightTrackBuilder()
+    builder.append(32.1, 34.8, time_us=1000, alt=10.0)
+    builder.append(32.2, 34.9, time_us=2000)
+    track = builder.build()
+
+    assert track.time_us.tolist() == [1000, 2000]
+    assert track.alt is None
+    assert track[1:].lat.tolist() == [32.2]
+
+
+def test_read_track_keeps_time_and_altitude(tmp_path):
+    log_path = str(tmp_path / "flight.bin")
+    write_log(log_path, [(32.0, 34.8), (32.1, 34.9)])
+
+    track = ReadeBinFile(log_path).read_track()
+
+    assert track.to_dict_list() == [{"Lat": 32.0, "Lng": 34.8}, {"Lat": 32.1, "Lng": 34.9}]
+    assert track.time_us.tolist() == [4000, 8000]
+    assert track.alt.tolist() == [100.0, 100.0]
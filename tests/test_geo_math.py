@@ -0,0 +1,72 @@
+"""Tests for the vectorized geometry helpers."""
+
+import numpy as np
+
+from src.business_logic.src.geo_math import (
+    _project_to_meters,
+    _segment_distances,
+    haversine_distances,
+    marker_indices,
+    simplify_indices,
+)
+from src.gui.map.map_builder import MapRouteBuilder
+
+
+def _loop_marker_indices(lats: list, lngs: list, marker_distance_km: float) -> list:
+    """the original per-segment loop of MapRouteBuilder._create_intermediate_markers"""
+    indices = []
+    accumulated_distance = 0
+    for i in range(1, len(lats)):
+        accumulated_distance += MapRouteBuilder.calculate_distance(lats[i - 1], lngs[i - 1], lats[i], lngs[i])
+        if accumulated_distance >= marker_distance_km:
+            indices.append(i)
+            accumulated_distance = 0
+    return indices
+
+
+def test_haversine_distances_match_scalar_formula():
+    rng = np.random.default_rng(1)
+    lat = rng.uniform(-60, 60, 100)
+    lng = rng.uniform(-170, 170, 100)
+
+    expected = [MapRouteBuilder.calculate_distance(lat[i], lng[i], lat[i + 1], lng[i + 1]) for i in range(99)]
+
+    np.testing.assert_allclose(haversine_distances(lat, lng), expected, rtol=1e-12)
+
+
+def test_marker_indices_match_loop():
+    rng = np.random.default_rng(2)
+    lat = 32 + np.cumsum(rng.normal(0, 0.01, 20000))
+    lng = 34 + np.cumsum(rng.normal(0, 0.01, 20000))
+
+    for marker_distance_km in (0.5, 5, 200):
+        expected = _loop_marker_indices(lat.tolist(), lng.tolist(), marker_distance_km)
+        assert marker_indices(lat, lng, marker_distance_km).tolist() == expected
+
+
+def test_marker_indices_short_tracks():
+    assert marker_indices(np.array([32.0]), np.array([34.0]), 1).tolist() == []
+    assert marker_indices(np.array([32.0, 32.0]), np.array([34.0, 34.0]), 1).tolist() == []
+
+
+def test_simplify_keeps_endpoints_and_corners():
+    # straight line east, then straight line north: only the corner matters
+    lat = np.concatenate([np.full(1000, 32.0), np.linspace(32.0, 32.5, 1000)[1:]])
+    lng = np.concatenate([np.linspace(34.0, 34.5, 1000), np.full(999, 34.5)])
+
+    assert simplify_indices(lat, lng, 10).tolist() == [0, 999, 1998]
+
+
+def test_simplify_stays_within_tolerance():
+    rng = np.random.default_rng(3)
+    lat = 32 + np.cumsum(rng.normal(0, 0.0005, 20000))
+    lng = 34 + np.cumsum(rng.normal(0, 0.0005, 20000))
+
+    kept = simplify_indices(lat, lng, 25)
+
+    assert kept[0] == 0 and kept[-1] == len(lat) - 1
+    assert len(kept) < len(lat)
+    # every dropped point lies within the tolerance of the kept segment around it
+    x, y = _project_to_meters(lat, lng)
+    for start, end in zip(kept[:-1:97], kept[1::97]):
+        assert np.all(_segment_distances(x, y, start, end) <= 25)
@@ -0,0 +1,118 @@
+"""Tests for the map building helpers of the GUI."""
+
+import threading
+from types import SimpleNamespace
+
+import flet as ft
+import flet_map as map_ft
+import numpy as np
+
+from src.business_logic.src.flight_track import FlightTrack
+from src.gui.file_handler.file_processor import FileProcessor
+from src.gui.map.map_builder import MapRouteBuilder
+from src.gui.map.route_pyramid import RoutePyramid
+from src.utils.configurations import MAX_VISIBLE_MARKERS
+from tests.synthetic_log import write_log
+
+
+def _wavy_track(point_count: int) -> FlightTrack:
+    t = np.linspace(0, 40, point_count)
+    return FlightTrack(32 + 0.5 * np.sin(t), 34 + 0.5 * np.cos(1.3 * t))
+
+
+def test_route_pyramid_levels_get_coarser_with_lower_zoom():
+    pyramid = RoutePyramid(_wavy_track(100000), levels=[(0, 2000), (8, 100), (14, 5)])
+
+    sizes = [len(track) for track in pyramid.tracks]
+    assert sizes == sorted(sizes, reverse=True)
+    assert pyramid.track_for_zoom(16) is pyramid.tracks[0]
+    assert pyramid.track_for_zoom(9.5) is pyramid.tracks[1]
+    assert pyramid.track_for_zoom(3) is pyramid.tracks[2]
+
+
+def test_route_pyramid_caps_vertices():
+    pyramid = RoutePyramid(_wavy_track(20000), levels=[(0, 1)], max_vertices=500)
+
+    assert len(pyramid.tracks[0]) <= 500
+
+
+class _FakePage:
+    def __init__(self):
+        self.updates = 0
+
+    def update(self):
+        self.updates += 1
+
+
+def _skip_layer_updates(map_builder) -> None:
+    """the layers are not on a real page in the tests"""
+    map_builder.polyline_layer_ref.current.update = lambda: None
+    map_builder.marker_layer_ref.current.update = lambda: None
+
+
+def test_flights_are_added_to_the_existing_layers():
+    map_builder = MapRouteBuilder()
+    map_widget = map_builder.create_map_with_route(_wavy_track(2000), _FakePage(), "first")
+    _skip_layer_updates(map_builder)
+    first_markers = len(map_builder.marker_layer_ref.current.markers)
+
+    second = FlightTrack(_wavy_track(500).lat + 1, _wavy_track(500).lng)
+    map_builder.add_flight_route(second, "second")
+
+    assert map_widget.layers[2] is map_builder.polyline_layer_ref.current
+    assert len(map_builder.polyline_layer_ref.current.polylines) == 2
+    assert len(map_builder.marker_layer_ref.current.markers) > first_markers
+    assert map_builder.flight_routes[0].color != map_builder.flight_routes[1].color
+
+
+def test_markers_are_culled_to_the_viewport_and_clustered():
+    map_builder = MapRouteBuilder()
+    # a long flight, so it has more waypoints (every MARKER_DISTANCE_KM) than MAX_VISIBLE_MARKERS
+    t = np.linspace(0, 400, 100000)
+    track = FlightTrack(32 + 3 * np.sin(t), 34 + 3 * np.cos(1.3 * t))
+    map_builder.create_map_with_route(track, _FakePage(), "flight")
+    _skip_layer_updates(map_builder)
+    waypoint_count = len(map_builder.waypoint_lat)
+    assert waypoint_count > MAX_VISIBLE_MARKERS
+
+    def move_map(lat: float, lng: float, zoom: float) -> list:
+        map_builder._on_map_event(SimpleNamespace(center=map_ft.MapLatitudeLongitude(lat, lng), zoom=zoom))
+        return map_builder.marker_layer_ref.current.markers
+
+    # zoomed out the whole flight is in view, its waypoints merged into a few clusters (+ start and end)
+    zoomed_out = move_map(32.0, 34.0, 4)
+    assert 2 < len(zoomed_out) < waypoint_count
+
+    # zoomed in on the start only the nearby waypoints are sent
+    zoomed_in = move_map(float(track.lat[0]), float(track.lng[0]), 10)
+    assert 2 < len(zoomed_in) <= MAX_VISIBLE_MARKERS + 2
+    assert len(zoomed_in) < waypoint_count
+
+    # far from the flight only the start and end markers are left
+    assert len(move_map(10.0, 10.0, 16)) == 2
+
+
+def test_process_files_shows_every_flight_on_one_map(tmp_path):
+    files = []
+    for index in range(3):
+        log_path = str(tmp_path / f"flight_{index}.bin")
+        write_log(log_path, [(32.0 + index, 34.8 + i * 0.01) for i in range(30)])
+        files.append((log_path, f"flight_{index}.bin"))
+
+    map_builder = MapRouteBuilder()
+    original_create_map = map_builder.create_map_with_route
+
+    def create_map_with_route(track, page, name=""):
+        map_widget = original_create_map(track, page, name)
+        _skip_layer_updates(map_builder)
+        return map_widget
+
+    map_builder.create_map_with_route = create_map_with_route
+    status_text = ft.Text()
+    file_processor = FileProcessor(status_text, map_builder, map_builder.map_container, _FakePage())
+
+    file_processor.process_files(files, threading.Event())
+
+    assert sorted(flight_route.name for flight_route in map_builder.flight_routes) == [name for _, name in files]
+    assert len(map_builder.polyline_layer_ref.current.polylines) == 3
+    assert status_text.value.startswith("Processed 3 / 3 files: 3 flights, 90 points")
@@ -0,0 +1,50 @@
+"""Tests of the profiler spans and of the counters ReadeBinFile reports."""
+
+import json
+
+import pytest
+
+from src.business_logic.src.read_bin_file import ReadeBinFile
+from src.utils.configurations import DATAFLASH_ENGINE, PYMAVLINK_ENGINE
+from src.utils.instrumentation import Profiler, profiler
+from tests.synthetic_log import gps_record, write_log
+
+POINTS = [(32.0 + i * 0.001, 34.8 + i * 0.002) for i in range(20)]
+
+
+def test_profiler_spans_counters_and_profile_file(tmp_path):
+    test_profiler = Profiler(enabled=True)
+    for _ in range(3):
+        with test_profiler.span("step"):
+            pass
+    test_profiler.count("items", 2)
+    test_profiler.count("items")
+
+    profile_path = tmp_path / "profile.jsonl"
+    snapshot = test_profiler.report("run", output_path=str(profile_path))
+
+    assert snapshot["spans"]["step"]["count"] == 3
+    assert snapshot["counters"] == {"items": 3}
+    assert json.loads(profile_path.read_text())["counters"] == {"items": 3}
+    # report starts a fresh profile
+    assert test_profiler.snapshot() == {"spans": {}, "counters": {}}
+
+
+@pytest.mark.parametrize("engine", [DATAFLASH_ENGINE, PYMAVLINK_ENGINE])
+def test_read_track_counts_scanned_skipped_and_duplicate_messages(tmp_path, engine):
+    log_path = str(tmp_path / "flight.bin")
+    write_log(log_path, POINTS + [POINTS[-1], POINTS[-1]])
+    with open(log_path, "ab") as bin_file:
+        bin_file.write(gps_record(10**9, 10.0, 10.0, instance=0))
+
+    profiler.reset()
+    track = ReadeBinFile(log_path, engine=engine).read_track()
+    counters = profiler.snapshot()["counters"]
+
+    assert len(track) == len(POINTS)
+    assert counters["messages_scanned.GPS"] == len(POINTS) + 3
+    assert counters["messages_skipped.gps_instance"] == 1
+    assert counters["points_kept"] == len(POINTS)
+    assert counters["duplicates_dropped"] == 2
+    assert counters["parse.bytes"] > 0
+    assert "parse.read_track" in profiler.snapshot()["spans"]
@@ -0,0 +1,138 @@
+"""Tests for the live mode: streamed DataFlash parsing, the fix ring buffer, the sources and the map deltas."""
+
+import socket
+import time
+
+import numpy as np
+import pytest
+
+from src.business_logic.src.dataflash_reader import DataFlashReader, DataFlashStreamParser
+from src.business_logic.src.flight_track import FlightTrack
+from src.business_logic.src.live_feed import (
+    DataFlashTailSource,
+    FixRingBuffer,
+    LiveTrackFeed,
+    MavlinkSource,
+    replay_track,
+)
+from src.gui.map.map_builder import MapRouteBuilder
+from tests.synthetic_log import generate_log
+from tests.test_gui import _FakePage, _skip_layer_updates, _wavy_track
+
+
+def _track(start: int, count: int) -> FlightTrack:
+    values = np.arange(start, start + count, dtype=np.float64)
+    return FlightTrack(values, values + 0.5, values.astype(np.int64), values * 2)
+
+
+def _free_udp_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as udp_socket:
+        udp_socket.bind(("127.0.0.1", 0))
+        return udp_socket.getsockname()[1]
+
+
+def _wait_for(condition, timeout_s: float = 10.0) -> bool:
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_ring_buffer_keeps_the_newest_fixes_in_order():
+    buffer = FixRingBuffer(capacity=10)
+    buffer.extend(_track(0, 4))
+    assert len(buffer) == 4
+    np.testing.assert_array_equal(buffer.track().lat, np.arange(4))
+
+    buffer.extend(_track(4, 9))
+    buffer.extend(_track(13, 25))
+
+    track = buffer.track()
+    assert len(buffer) == 10 and buffer.total == 38
+    np.testing.assert_array_equal(track.lat, np.arange(28, 38))
+    np.testing.assert_array_equal(track.time_us, np.arange(28, 38))
+    np.testing.assert_array_equal(track.alt, np.arange(28, 38) * 2)
+
+
+@pytest.mark.parametrize("chunk_bytes", [1, 7, 4096])
+def test_stream_parser_matches_the_file_reader(tmp_path, chunk_bytes):
+    log_path = str(tmp_path / "flight.bin")
+    generate_log(log_path, gps_points=50 if chunk_bytes == 1 else 300, corrupt_blocks=5)
+    with DataFlashReader(log_path) as reader:
+        reader.read_formats()
+        expected = list(reader.iter_gps_fixes())
+    with open(log_path, "rb") as bin_file:
+        data = bin_file.read()
+
+    parser = DataFlashStreamParser()
+    fixes = []
+    for start in range(0, len(data), chunk_bytes):
+        fixes.extend(parser.feed(data[start : start + chunk_bytes]))
+
+    # the last record waits for the header of the next one
+    assert fixes == expected[: len(fixes)]
+    assert len(fixes) >= len(expected) - 1
+
+
+def test_tail_source_reads_a_growing_log(tmp_path):
+    log_path = str(tmp_path / "flight.bin")
+    generate_log(log_path, gps_points=200)
+    with open(log_path, "rb") as bin_file:
+        data = bin_file.read()
+
+    growing_path = tmp_path / "growing.bin"
+    growing_path.write_bytes(data[: len(data) // 2])
+    source = DataFlashTailSource(str(growing_path), poll_interval_s=0.01)
+    try:
+        first_half = source.read_new_fixes()
+        assert source.read_new_fixes() == []
+
+        with open(growing_path, "ab") as bin_file:
+            bin_file.write(data[len(data) // 2 :])
+        second_half = source.read_new_fixes()
+    finally:
+        source.close()
+
+    assert 0 < len(first_half) < 200
+    assert len(first_half) + len(second_half) >= 199
+
+
+def test_live_feed_batches_a_replayed_udp_stream():
+    port = _free_udp_port()
+    track = _wavy_track(40)
+    batches = []
+    feed = LiveTrackFeed(MavlinkSource(f"udpin:127.0.0.1:{port}"), batches.append, update_interval_s=0.05).start()
+    try:
+        sent = replay_track(track, f"udpout:127.0.0.1:{port}", rate_hz=400)
+        assert _wait_for(lambda: feed.buffer.total == sent)
+    finally:
+        feed.stop()
+
+    assert sent == len(track)
+    assert 1 <= len(batches) < len(track)
+    received = FlightTrack.concatenate(batches)
+    np.testing.assert_allclose(received.lat, track.lat, atol=1e-7)
+    np.testing.assert_allclose(received.lng, track.lng, atol=1e-7)
+    np.testing.assert_allclose(feed.buffer.track().lng, track.lng, atol=1e-7)
+
+
+def test_live_fixes_are_appended_as_new_polylines():
+    map_builder = MapRouteBuilder()
+    map_builder.create_map_with_route(_wavy_track(100), _FakePage(), "live")
+    _skip_layer_updates(map_builder)
+    route_polyline = map_builder.polyline_layer_ref.current.polylines[0]
+    end_marker = map_builder.flight_routes[0].markers[-1]
+
+    for batch in range(5):
+        map_builder.append_live_fixes(FlightTrack(np.full(10, 33.0 + batch), np.full(10, 35.0)), max_points=30)
+
+    polylines = map_builder.polyline_layer_ref.current.polylines
+    # the route polyline is untouched, only the 3 newest live batches are kept
+    assert polylines[0] is route_polyline
+    assert len(polylines) == 4 and map_builder.live_points == 30
+    assert polylines[1].coordinates[-1].latitude == 33.0 + 2
+    assert (end_marker.coordinates.latitude, end_marker.coordinates.longitude) == (37.0, 35.0)
+    # each live polyline starts where the previous batch ended
+    assert polylines[2].coordinates[0].latitude == polylines[1].coordinates[-1].latitude
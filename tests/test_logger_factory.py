@@ -0,0 +1,58 @@
+"""Tests of the asynchronous (queue based) logging and of the per-module log levels."""
+
+import logging
+import queue
+
+from src.utils import configurations, logger_factory
+from src.utils.logger_factory import BatchQueueListener, LoggerFactory
+
+
+class RecordingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages: list = []
+        self.flushes = 0
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.messages.append(record.getMessage())
+
+    def flush(self) -> None:
+        self.flushes += 1
+
+
+def test_batch_queue_listener_writes_every_record_in_order():
+    log_queue: queue.Queue = queue.SimpleQueue()
+    handler = RecordingHandler()
+    listener = BatchQueueListener(log_queue, handler, batch_size=100)
+
+    test_logger = logging.getLogger("test_batch_queue_listener")
+    test_logger.propagate = False
+    test_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    for index in range(1000):
+        test_logger.warning(f"message {index}")
+
+    listener.start()
+    listener.stop()
+
+    assert handler.messages == [f"message {index}" for index in range(1000)]
+    # the queue was full before the listener started, so it flushed per batch and not per record
+    assert handler.flushes <= 11
+
+
+def test_get_logger_applies_per_module_levels(tmp_path, monkeypatch):
+    monkeypatch.setattr(logger_factory, "LOG_FILE", tmp_path / "log.txt")
+    monkeypatch.setattr(configurations, "LOG_LEVELS", {"test_levels.noisy": "ERROR"})
+
+    factory = LoggerFactory(async_logging=True)
+    project_logger = factory.get_logger("test_levels")
+    try:
+        assert project_logger.getEffectiveLevel() == logging.INFO
+        assert logging.getLogger("test_levels.noisy").getEffectiveLevel() == logging.ERROR
+        assert logging.getLogger("test_levels.quiet").getEffectiveLevel() == logging.INFO
+        assert isinstance(project_logger.handlers[0], logging.handlers.QueueHandler)
+    finally:
+        factory.listener.stop()
+        for handler in factory.listener.handlers:
+            handler.close()
+        for handler in project_logger.handlers[:]:
+            project_logger.removeHandler(handler)
@@ -0,0 +1,45 @@
+"""Tests for the spatial index and clustering of the waypoint markers."""
+
+import numpy as np
+
+from src.gui.map.marker_index import MarkerGrid, cluster_markers, viewport_bbox
+
+
+def test_marker_grid_query_matches_brute_force():
+    rng = np.random.default_rng(3)
+    lat = rng.uniform(31, 33, 20000)
+    lng = rng.uniform(34, 36, 20000)
+    grid = MarkerGrid(lat, lng, cell_deg=0.1)
+
+    for min_lat, min_lng, max_lat, max_lng in [(31.5, 34.2, 31.9, 35.05), (30, 30, 40, 40), (32.33, 35.5, 32.34, 35.51)]:
+        expected = np.flatnonzero((lat >= min_lat) & (lat <= max_lat) & (lng >= min_lng) & (lng <= max_lng))
+        np.testing.assert_array_equal(grid.query(min_lat, min_lng, max_lat, max_lng), expected)
+
+    assert len(MarkerGrid(np.zeros(0), np.zeros(0)).query(0, 0, 1, 1)) == 0
+
+
+def test_viewport_bbox_shrinks_with_zoom():
+    wide = viewport_bbox(32.0, 35.0, 8, 1600, 1000)
+    narrow = viewport_bbox(32.0, 35.0, 12, 1600, 1000)
+
+    assert wide[0] < narrow[0] < 32.0 < narrow[2] < wide[2]
+    assert wide[1] < narrow[1] < 35.0 < narrow[3] < wide[3]
+
+
+def test_clusters_are_bounded_and_keep_every_marker():
+    rng = np.random.default_rng(4)
+    lat = rng.uniform(31, 33, 5000)
+    lng = rng.uniform(34, 36, 5000)
+    indices = np.arange(5000)
+
+    clusters = cluster_markers(lat, lng, indices, zoom=8, cell_px=10, max_clusters=50)
+
+    assert len(clusters.count) <= 50
+    assert clusters.count.sum() == 5000
+    assert clusters.cell_px > 10
+    assert np.all((clusters.lat >= 31) & (clusters.lat <= 33))
+
+    # zoomed in far enough every marker is on its own
+    single = cluster_markers(lat, lng, indices[:20], zoom=18, max_clusters=50)
+    np.testing.assert_array_equal(np.sort(single.first_index), indices[:20])
+    assert np.all(single.count == 1)
@@ -0,0 +1,106 @@
+"""Tests for the message index sidecar of DataFlash logs."""
+
+import os
+
+import numpy as np
+
+from src.business_logic.src.dataflash_reader import DataFlashReader
+from src.business_logic.src.message_index import MessageIndex, index_path_for
+from src.business_logic.src.read_bin_file import ReadeBinFile
+from tests.synthetic_log import (
+    ATT_MSG_ID,
+    FMT_FORMAT,
+    FMT_MSG_ID,
+    GPS_FORMAT,
+    GPS_MSG_ID,
+    fmt_record,
+    generate_log,
+    gps_record,
+)
+
+
+def test_index_finds_the_same_records_as_the_search(tmp_path):
+    log_path = str(tmp_path / "flight.bin")
+    generate_log(log_path, 300, noise_per_gps=10, corrupt_blocks=5)
+
+    with DataFlashReader(log_path) as reader:
+        formats = reader.read_formats()
+        searched = {
+            msg_id: [offset for offset, _ in reader._iter_record_offsets(fmt)] for msg_id, fmt in formats.items()
+        }
+        index = MessageIndex.build(reader)
+        # records cut by the scan blocks must still be found
+        small_blocks = MessageIndex.build(reader, block_bytes=4096)
+
+    index.save(log_path)
+    loaded = MessageIndex.load(log_path)
+    for msg_id in (GPS_MSG_ID, ATT_MSG_ID):
+        assert index.offsets[msg_id].tolist() == searched[msg_id]
+        assert small_blocks.offsets[msg_id].tolist() == searched[msg_id]
+        assert loaded.offsets[msg_id].tolist() == searched[msg_id]
+        assert index.offsets_for(msg_id, 1000, 5000).tolist() == [o for o in searched[msg_id] if 1000 <= o < 5000]
+
+
+def test_index_is_saved_next_to_the_log_and_rebuilt_when_the_log_changes(tmp_path):
+    log_path = str(tmp_path / "flight.bin")
+    generate_log(log_path, 200)
+
+    first = ReadeBinFile(log_path, use_index=True).read_track()
+    assert index_path_for(log_path).exists()
+    assert MessageIndex.load(log_path).count(GPS_MSG_ID) == 200
+
+    # the second read seeks with the saved index and finds the same points
+    assert ReadeBinFile(log_path, use_index=True).read_track().to_dict_list() == first.to_dict_list()
+
+    generate_log(log_path, 50)
+    os.utime(log_path, ns=(0, 0))
+    assert MessageIndex.load(log_path) is None
+    assert len(ReadeBinFile(log_path, use_index=True).read_track()) == 50
+
+
+def test_byte_range_for_time_holds_the_time_window(tmp_path):
+    log_path = str(tmp_path / "flight.bin")
+    # 5 Hz GPS for 20000 fixes: 4000 s, a few MB so there are several checkpoints
+    generate_log(log_path, 20000, noise_per_gps=5)
+
+    with DataFlashReader(log_path) as reader:
+        index = MessageIndex.build(reader)
+        fmt = reader.formats[GPS_MSG_ID]
+        start, end = index.byte_range_for_time(1000 * 10**6, 1200 * 10**6)
+        times = np.array([fmt.struct.unpack_from(reader.view, offset + 3)[0] for offset in index.offsets[GPS_MSG_ID]])
+
+    assert len(index.checkpoint_offsets) > 2
+    # 2 bytes per record in the sidecar
+    index.save(log_path)
+    records = sum(len(type_offsets) for type_offsets in index.offsets.values())
+    assert index_path_for(log_path).stat().st_size < 3 * records
+    in_window = index.offsets[GPS_MSG_ID][(times >= 1000 * 10**6) & (times <= 1200 * 10**6)]
+    assert start <= in_window[0] and in_window[-1] < end
+    assert end - start < os.path.getsize(log_path) / 2
+
+
+def test_time_window_starting_on_a_checkpoint_keeps_the_records_before_it(tmp_path, monkeypatch):
+    log_path = str(tmp_path / "flight.bin")
+    # two GPS instances log every fix with the same TimeUS, so a checkpoint can fall between the pair
+    with open(log_path, "wb") as bin_file:
+        bin_file.write(fmt_record(FMT_MSG_ID, *FMT_FORMAT) + fmt_record(GPS_MSG_ID, *GPS_FORMAT))
+        for point in range(2000):
+            for instance in (1, 2):
+                bin_file.write(gps_record(point * 200_000, 32.0, 34.8, instance=instance))
+    monkeypatch.setattr("src.business_logic.src.message_index.INDEX_CHECKPOINT_BYTES", 4096)
+
+    with DataFlashReader(log_path) as reader:
+        index = MessageIndex.build(reader)
+        fmt = reader.formats[GPS_MSG_ID]
+        offsets = index.offsets[GPS_MSG_ID]
+        times = np.array([fmt.struct.unpack_from(reader.view, offset + 3)[0] for offset in offsets])
+
+    split_checkpoints = [
+        time_us
+        for offset, time_us in zip(index.checkpoint_offsets, index.checkpoint_time_us)
+        if offset > offsets[0] and times[np.searchsorted(offsets, offset) - 1] == time_us
+    ]
+    assert split_checkpoints
+    for time_us in split_checkpoints:
+        start, _ = index.byte_range_for_time(int(time_us))
+        assert start <= offsets[np.argmax(times >= time_us)]
@@ -0,0 +1,135 @@
+"""Tests comparing the DataFlash engine of ReadeBinFile with the pymavlink engine."""
+
+import os
+import threading
+
+import numpy as np
+
+from src.business_logic.src.flight_track import FlightTrack
+from src.business_logic.src.read_bin_file import ReadeBinFile
+from src.utils.configurations import DATAFLASH_ENGINE, PYMAVLINK_ENGINE
+from src.utils.instrumentation import profiler
+from tests.synthetic_log import generate_log, gps_record, write_log
+
+POINTS = [(32.0 + i * 0.001, 34.8 + i * 0.002) for i in range(50)]
+
+
+def test_dataflash_engine_matches_pymavlink(tmp_path):
+    log_path = str(tmp_path / "flight.bin")
+    # repeat a point to exercise the duplicate check
+    write_log(log_path, POINTS[:10] + [POINTS[9]] + POINTS[10:])
+
+    native = ReadeBinFile(log_path, engine=DATAFLASH_ENGINE).process_bin_file()
+    reference = ReadeBinFile(log_path, engine=PYMAVLINK_ENGINE).process_bin_file()
+
+    assert len(native) == len(POINTS)
+    assert native == reference
+
+
+def test_dataflash_engine_skips_other_gps_instances(tmp_path):
+    log_path = str(tmp_path / "flight.bin")
+    write_log(log_path, POINTS)
+
+    with open(log_path, "ab") as bin_file:
+        bin_file.write(gps_record(10**9, 10.0, 10.0, instance=0))
+
+    points = ReadeBinFile(log_path, engine=DATAFLASH_ENGINE).process_bin_file()
+
+    assert {"Lat": 10.0, "Lng": 10.0} not in points
+    assert len(points) == len(POINTS)
+
+
+def test_dataflash_engine_mmap_matches_in_memory_read(tmp_path):
+    log_path = str(tmp_path / "flight.bin")
+    write_log(log_path, POINTS)
+    # a truncated record at the end of the log must be ignored
+    with open(log_path, "ab") as bin_file:
+        bin_file.write(gps_record(10**9, 10.0, 10.0)[:20])
+
+    mapped = ReadeBinFile(log_path, engine=DATAFLASH_ENGINE, use_mmap=True).process_bin_file()
+    in_memory = ReadeBinFile(log_path, engine=DATAFLASH_ENGINE, use_mmap=False).process_bin_file()
+
+    assert len(mapped) == len(POINTS)
+    assert mapped == in_memory
+
+
+def test_read_track_reports_progress_and_can_be_cancelled(tmp_path):
+    log_path = str(tmp_path / "flight.bin")
+    write_log(log_path, POINTS)
+
+    reports = []
+    track = ReadeBinFile(log_path).read_track(msg_number_to_show=10, progress_callback=reports.append)
+
+    assert len(track) == len(POINTS)
+    assert [report.points for report in reports] == [9, 19, 29, 39, 49, 50]
+    assert reports[-1].fraction == 1.0
+    assert all(earlier.bytes_read <= later.bytes_read for earlier, later in zip(reports, reports[1:]))
+
+    cancel_event = threading.Event()
+    cancel_event.set()
+    assert len(ReadeBinFile(log_path).read_track(msg_number_to_show=10, cancel_event=cancel_event)) == 0
+
+
+def test_parallel_parsing_matches_serial(tmp_path, monkeypatch):
+    log_path = str(tmp_path / "flight.bin")
+    # runs of repeated points so duplicates straddle chunk boundaries
+    points = [point for point in POINTS for _ in range(7)] * 20
+    write_log(log_path, points)
+    monkeypatch.setattr("src.business_logic.src.read_bin_file.PARALLEL_MIN_BYTES", 0)
+
+    serial = ReadeBinFile(log_path, workers=1).read_track()
+    parallel = ReadeBinFile(log_path, workers=3).read_track()
+    indexed = ReadeBinFile(log_path, workers=3, use_index=True).read_track()
+
+    assert len(parallel) == len(serial) == 20 * len(POINTS)
+    assert parallel.to_dict_list() == serial.to_dict_list()
+    assert indexed.to_dict_list() == serial.to_dict_list()
+    assert parallel.time_us.tolist() == serial.time_us.tolist()
+
+
+def test_iter_points_batches_join_to_read_track(tmp_path):
+    log_path = str(tmp_path / "flight.bin")
+    write_log(log_path, POINTS[:10] + [POINTS[9]] + POINTS[10:])
+
+    batches = list(ReadeBinFile(log_path).iter_points(batch_size=16))
+
+    assert [len(batch) for batch in batches] == [16, 16, 16, 2]
+    assert FlightTrack.concatenate(batches).to_dict_list() == ReadeBinFile(log_path).process_bin_file()
+
+
+def test_time_window_and_bbox_match_between_engines_and_the_cached_track(tmp_path):
+    log_path = str(tmp_path / "flight.bin")
+    # 20000 fixes at 5 Hz over a few MB, so the index has checkpoints to seek with
+    generate_log(log_path, 20000, noise_per_gps=5)
+    time_range = (1000 * 10**6, 1200 * 10**6)
+    full_track = ReadeBinFile(log_path).read_track()
+    # a box around part of the time window
+    window_lat = full_track.window(time_range).lat
+    bbox = (float(window_lat.min()), -180.0, float(np.median(window_lat)), 180.0)
+
+    profiler.reset()
+    native = ReadeBinFile(log_path, engine=DATAFLASH_ENGINE, use_index=True).read_track(
+        time_range=time_range, bbox=bbox
+    )
+    assert profiler.snapshot()["counters"]["window.bytes_skipped"] > os.path.getsize(log_path) / 2
+    reference = ReadeBinFile(log_path, engine=PYMAVLINK_ENGINE).read_track(time_range=time_range, bbox=bbox)
+
+    assert 0 < len(native) < len(window_lat)
+    assert native.to_dict_list() == reference.to_dict_list()
+    assert native.time_us.min() >= time_range[0] and native.time_us.max() <= time_range[1]
+    assert full_track.window(time_range, bbox).to_dict_list() == native.to_dict_list()
+
+
+def test_reader_can_be_read_again_after_a_read(tmp_path):
+    log_path = str(tmp_path / "flight.bin")
+    write_log(log_path, POINTS)
+
+    for engine in (DATAFLASH_ENGINE, PYMAVLINK_ENGINE):
+        with ReadeBinFile(log_path, engine=engine) as reader:
+            first = reader.read_track()
+            second = reader.read_track()
+            telemetry = reader.read_telemetry({"GPS": ["Alt"]})
+
+        assert len(first) == len(POINTS), engine
+        assert second.to_dict_list() == first.to_dict_list(), engine
+        assert len(telemetry["GPS.Alt"]) == len(POINTS), engine
@@ -0,0 +1,50 @@
+"""Startup guards: the entry points import fast and leave the heavy dependencies to their first use."""
+
+import subprocess
+import sys
+
+from benchmarks.run_benchmarks import REPO_DIR, measure_import
+
+
+def test_library_imports_without_pymavlink_in_under_a_second():
+    seconds, loaded = measure_import("src.business_logic.src.read_bin_file")
+
+    assert "pymavlink" not in loaded
+    assert "flet_map" not in loaded
+    assert seconds < 1.0
+
+
+def test_gui_shows_before_the_map_and_parser_are_imported():
+    _, loaded = measure_import("src.gui.flight_route_app")
+
+    assert loaded == []
+
+
+def test_configurations_import_reads_and_prints_nothing():
+    code = (
+        "import src.utils.configurations as configurations\n"
+        "assert configurations.get_settings.cache_info().currsize == 0\n"
+        "assert configurations.LOG_LEVEL\n"
+        "assert configurations.get_settings.cache_info().currsize == 1\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=REPO_DIR)
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout == ""
+
+
+def test_library_import_reads_no_settings_and_installs_no_handlers():
+    code = (
+        "import logging\n"
+        "import src.business_logic.src.read_bin_file\n"
+        "import src.utils.configurations as configurations\n"
+        "assert configurations.get_settings.cache_info().currsize == 0\n"
+        "assert logging.getLogger(configurations.PROJECT_LOGGER_NAME).handlers == []\n"
+        "from src.utils.logger_factory import logger\n"
+        "logger.error('first record')\n"
+        "assert len(logging.getLogger(configurations.PROJECT_LOGGER_NAME).handlers) == 2\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=REPO_DIR)
+
+    assert result.returncode == 0, result.stderr
+    assert "first record" in result.stdout
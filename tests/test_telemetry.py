@@ -0,0 +1,68 @@
+"""Tests for the multi-field telemetry extraction of ReadeBinFile."""
+
+import numpy as np
+import pytest
+
+from src.business_logic.src.read_bin_file import ReadeBinFile
+from src.business_logic.src.telemetry import Telemetry, parse_telemetry_spec
+from src.utils.configurations import DATAFLASH_ENGINE, PYMAVLINK_ENGINE
+from tests.synthetic_log import generate_log
+
+SPEC = {"GPS": ["Lat", "Alt", "Spd"], "ATT": ["Roll", "Yaw"], "BAT": ["Volt"]}
+
+
+def test_parse_telemetry_spec_accepts_dicts_and_dotted_names():
+    expected = {"GPS": ["TimeUS", "Alt", "Spd"], "ATT": ["TimeUS", "Roll"]}
+
+    assert parse_telemetry_spec({"GPS": ["Alt", "Spd"], "ATT": ["Roll"]}) == expected
+    assert parse_telemetry_spec(["GPS.Alt", "GPS.Spd", "ATT.Roll", "GPS.Alt"]) == expected
+    with pytest.raises(ValueError):
+        parse_telemetry_spec(["Alt"])
+
+
+@pytest.mark.parametrize("use_index", [True, False])
+def test_dataflash_engine_telemetry_matches_pymavlink(tmp_path, use_index):
+    log_path = str(tmp_path / "flight.bin")
+    generate_log(log_path, gps_points=200)
+
+    native = ReadeBinFile(log_path, engine=DATAFLASH_ENGINE, use_index=use_index).read_telemetry(SPEC)
+    reference = ReadeBinFile(log_path, engine=PYMAVLINK_ENGINE).read_telemetry(SPEC)
+
+    assert sorted(native.keys()) == sorted(reference.keys())
+    assert len(native["GPS.Alt"]) == 200
+    for key in reference.keys():
+        np.testing.assert_array_equal(native[key], reference[key].astype(native[key].dtype), err_msg=key)
+
+
+def test_telemetry_time_window_and_alignment(tmp_path):
+    log_path = str(tmp_path / "flight.bin")
+    generate_log(log_path, gps_points=2000)
+
+    telemetry = ReadeBinFile(log_path).read_telemetry(SPEC)
+    time_us = telemetry["GPS.TimeUS"]
+    start_us, end_us = int(time_us[500]), int(time_us[800])
+    window = ReadeBinFile(log_path).read_telemetry(SPEC, time_range=(start_us, end_us))
+
+    for msg_type in SPEC:
+        window_time_us = window[f"{msg_type}.TimeUS"]
+        assert len(window_time_us) and window_time_us.min() >= start_us and window_time_us.max() <= end_us
+    assert len(window["GPS.Alt"]) == 301
+
+    aligned = telemetry.align(time_us[500:510], ["ATT.Roll", "BAT.Volt", "GPS.Alt"])
+    np.testing.assert_array_equal(aligned["GPS.Alt"], telemetry["GPS.Alt"][500:510])
+    assert not np.isnan(aligned["BAT.Volt"]).any()
+    assert np.isnan(Telemetry(telemetry.columns).align(np.array([-1]), ["ATT.Roll"])["ATT.Roll"]).all()
+
+
+def test_columns_gathered_in_small_chunks_match(tmp_path, monkeypatch):
+    log_path = str(tmp_path / "flight.bin")
+    generate_log(log_path, gps_points=300)
+    whole = ReadeBinFile(log_path, engine=DATAFLASH_ENGINE).read_telemetry(SPEC)
+
+    # a few records per chunk, with a last chunk shorter than the others
+    monkeypatch.setattr("src.business_logic.src.dataflash_reader.COLUMN_GATHER_BYTES", 100)
+    chunked = ReadeBinFile(log_path, engine=DATAFLASH_ENGINE).read_telemetry(SPEC)
+
+    assert sorted(chunked.keys()) == sorted(whole.keys())
+    for key in whole.keys():
+        np.testing.assert_array_equal(chunked[key], whole[key], err_msg=key)
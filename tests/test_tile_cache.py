@@ -0,0 +1,100 @@
+"""Tests for the map tile cache and the local tile server."""
+
+import os
+import sqlite3
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from src.business_logic.src.flight_track import FlightTrack
+from src.gui.map.tile_cache import TileCache, tile_for, tiles_for_bbox
+from src.gui.map.tile_server import TileServer
+
+
+def _write_mbtiles(path: str, tiles: dict) -> None:
+    """tiles: (zoom, x, y) in slippy map (XYZ) numbering -> image bytes"""
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE tiles (zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER, tile_data BLOB)")
+    for (zoom, x, y), tile in tiles.items():
+        connection.execute("INSERT INTO tiles VALUES (?, ?, ?, ?)", (zoom, x, 2**zoom - 1 - y, tile))
+    connection.commit()
+    connection.close()
+
+
+def test_tiles_for_bbox_covers_the_corners():
+    assert tile_for(0.0, 0.0, 1) == (1, 1)
+    tiles = list(tiles_for_bbox(32.0, 34.8, 32.5, 35.3, 10))
+
+    assert tile_for(32.0, 34.8, 10) in {(x, y) for _, x, y in tiles}
+    assert tile_for(32.5, 35.3, 10) in {(x, y) for _, x, y in tiles}
+
+
+def test_offline_server_serves_mbtiles_and_downloads_through_the_cache(tmp_path):
+    mbtiles_path = str(tmp_path / "seed.mbtiles")
+    _write_mbtiles(mbtiles_path, {(3, 4, 2): b"seeded tile"})
+    upstream = TileServer(TileCache(tmp_path / "upstream", upstream_url=None, mbtiles_paths=[mbtiles_path])).start()
+
+    cache = TileCache(tmp_path / "cache", upstream_url=upstream.url_template)
+    server = TileServer(cache).start()
+    try:
+        url = server.url_template.format(z=3, x=4, y=2)
+        assert urllib.request.urlopen(url).read() == b"seeded tile"
+        assert (tmp_path / "cache" / "3" / "4" / "2.png").read_bytes() == b"seeded tile"
+
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(server.url_template.format(z=3, x=0, y=0))
+    finally:
+        server.stop()
+        upstream.stop()
+
+
+def test_least_recently_used_tiles_are_evicted(tmp_path):
+    cache = TileCache(tmp_path / "cache", max_bytes=350, upstream_url=None, mbtiles_paths=[])
+    for x in range(3):
+        cache.store(5, x, 0, bytes(100))
+        os.utime(cache._tile_path(5, x, 0), ns=(x * 10**9, x * 10**9))
+
+    cache.store(5, 3, 0, bytes(100))
+
+    assert cache.get(5, 0, 0) is None
+    assert cache.get(5, 1, 0) is not None
+    assert cache.get(5, 3, 0) is not None
+
+
+def test_eviction_leaves_room_below_max_bytes(tmp_path, monkeypatch):
+    cache = TileCache(tmp_path / "cache", max_bytes=1000, low_water=0.8, upstream_url=None, mbtiles_paths=[])
+    for x in range(11):
+        cache.store(5, x, 0, bytes(100))
+    assert cache._size_bytes == 800
+
+    evictions = []
+    monkeypatch.setattr(cache, "evict", lambda: evictions.append(1) or 0)
+    cache.store(5, 11, 0, bytes(100))
+    cache.store(5, 12, 0, bytes(100))
+
+    assert evictions == []
+
+
+def test_background_prefetches_share_one_worker(tmp_path, monkeypatch):
+    cache = TileCache(tmp_path / "cache", upstream_url=None, mbtiles_paths=[])
+    prefetch_threads = []
+    monkeypatch.setattr(cache, "prefetch", lambda track: prefetch_threads.append(threading.current_thread()))
+
+    for i in range(5):
+        cache.prefetch_in_background(FlightTrack([32.0 + i], [34.8]))
+    cache._prefetch_queue.join()
+    cache.close()
+
+    assert len(prefetch_threads) == 5 and len(set(prefetch_threads)) == 1
+    assert not prefetch_threads[0].is_alive()
+
+
+def test_prefetch_stops_at_max_tiles(tmp_path):
+    mbtiles_path = str(tmp_path / "seed.mbtiles")
+    track = FlightTrack([32.0, 32.5], [34.8, 35.3])
+    _write_mbtiles(mbtiles_path, {tile: b"tile" for tile in tiles_for_bbox(32.0, 34.8, 32.5, 35.3, 12)})
+    cache = TileCache(tmp_path / "cache", upstream_url=None, mbtiles_paths=[mbtiles_path])
+
+    assert cache.prefetch(track, zoom_levels=[12], max_tiles=5) == 5
@@ -0,0 +1,69 @@
+"""Tests for the on-disk track cache."""
+
+import os
+
+from src.business_logic.src.read_bin_file import ReadeBinFile
+from src.business_logic.src.track_cache import TrackCache
+from tests.synthetic_log import write_log
+
+
+def test_second_read_comes_from_the_cache(tmp_path, monkeypatch):
+    log_path = str(tmp_path / "flight.bin")
+    write_log(log_path, [(32.0, 34.8), (32.1, 34.9)])
+    cache = TrackCache(tmp_path / "cache")
+    monkeypatch.setattr("src.business_logic.src.read_bin_file.TrackCache", lambda: cache)
+
+    first = ReadeBinFile(log_path).read_track()
+    assert cache.load(log_path) is not None
+
+    # a cache hit must not need the parser at all
+    monkeypatch.setattr(ReadeBinFile, "_read_track_serial", None)
+    second = ReadeBinFile(log_path).read_track()
+
+    assert second.to_dict_list() == first.to_dict_list()
+    assert second.time_us.tolist() == first.time_us.tolist()
+
+
+def test_changed_log_gets_a_new_key(tmp_path):
+    log_path = str(tmp_path / "flight.bin")
+    write_log(log_path, [(32.0, 34.8)])
+    cache = TrackCache(tmp_path / "cache")
+    key = cache.key_for(log_path)
+
+    write_log(log_path, [(32.0, 34.8), (32.1, 34.9)])
+
+    assert cache.key_for(log_path) != key
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = TrackCache(tmp_path / "cache")
+    logs = []
+    for i in range(3):
+        log_path = str(tmp_path / f"flight_{i}.bin")
+        write_log(log_path, [(32.0 + i, 34.8), (32.1 + i, 34.9)])
+        logs.append(log_path)
+        cache.store(log_path, ReadeBinFile(log_path).read_track())
+
+    entries = [cache._entry_path(cache.key_for(log_path)) for log_path in logs]
+    for age, entry in enumerate(entries):
+        os.utime(entry, ns=(age * 10**9, age * 10**9))
+
+    # touch the oldest entry so the second one becomes the least recently used
+    assert cache.load(logs[0]) is not None
+    cache.max_bytes = 2 * entries[0].stat().st_size
+    cache.evict()
+
+    assert cache.load(logs[1]) is None
+    assert cache.load(logs[0]) is not None
+    assert cache.load(logs[2]) is not None
+
+
+def test_unwritable_cache_does_not_lose_the_parsed_track(tmp_path, monkeypatch):
+    log_path = str(tmp_path / "flight.bin")
+    write_log(log_path, [(32.0 + i * 0.001, 34.8) for i in range(50)])
+    # /proc can't hold directories, so every store fails
+    cache = TrackCache("/proc/no_track_cache")
+    monkeypatch.setattr("src.business_logic.src.read_bin_file.TrackCache", lambda: cache)
+
+    assert len(ReadeBinFile(log_path).read_track()) == 50
+    assert sum(len(batch) for batch in ReadeBinFile(log_path).iter_points(batch_size=16)) == 50
@@ -0,0 +1,129 @@
+"""Tests for the streaming track export formats."""
+
+import importlib.util
+import json
+import xml.etree.ElementTree as ElementTree
+
+import numpy as np
+import pytest
+
+from src.business_logic.src.batch_processor import process_logs
+from src.business_logic.src.flight_track import FlightTrack
+from src.business_logic.src.read_bin_file import ReadeBinFile
+from src.business_logic.src.track_export import ParquetTrackWriter, export_bin_file, export_track
+from tests.synthetic_log import generate_log
+
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+
+@pytest.fixture
+def log_path(tmp_path) -> str:
+    path = str(tmp_path / "flight.bin")
+    generate_log(path, gps_points=1000)
+    return path
+
+
+def test_geojson_export_streams_the_whole_track(tmp_path, log_path):
+    output_path = str(tmp_path / "flight.geojson")
+
+    # small batches, the document is written piece by piece
+    assert export_bin_file(log_path, output_path, "geojson", batch_size=77, use_cache=False) == 1000
+
+    track = ReadeBinFile(log_path, use_cache=False).read_track()
+    feature = json.loads(open(output_path, encoding="utf-8").read())["features"][0]
+    coordinates = np.array(feature["geometry"]["coordinates"])
+    assert feature["properties"]["name"] == "flight.bin"
+    np.testing.assert_array_equal(coordinates[:, 0], track.lng)
+    np.testing.assert_array_equal(coordinates[:, 1], track.lat)
+    np.testing.assert_array_equal(coordinates[:, 2], track.alt)
+
+
+def test_kml_export_matches_track(tmp_path, log_path):
+    output_path = str(tmp_path / "flight.kml")
+    track = ReadeBinFile(log_path, use_cache=False).read_track()
+
+    export_track((track[start : start + 300] for start in range(0, len(track), 300)), output_path, "kml", "a & b")
+
+    root = ElementTree.parse(output_path).getroot()
+    namespace = {"kml": "http://www.opengis.net/kml/2.2"}
+    assert root.find("kml:Document/kml:name", namespace).text == "a & b"
+    text = root.find(".//kml:coordinates", namespace).text
+    coordinates = np.array([[float(value) for value in line.split(",")] for line in text.split()])
+    np.testing.assert_array_equal(coordinates[:, 0], track.lng)
+    np.testing.assert_array_equal(coordinates[:, 1], track.lat)
+
+
+def test_empty_track_gives_a_valid_document(tmp_path):
+    output_path = str(tmp_path / "empty.geojson")
+
+    assert export_track(FlightTrack.empty(), output_path, "geojson") == 0
+
+    assert json.loads(open(output_path, encoding="utf-8").read())["features"][0]["geometry"]["coordinates"] == []
+    with pytest.raises(ValueError):
+        export_track(FlightTrack.empty(), output_path, "shapefile")
+
+
+@pytest.mark.skipif(not HAS_PYARROW, reason="pyarrow is not installed")
+def test_parquet_and_arrow_exports_match_track(tmp_path, log_path):
+    import pyarrow.feather
+    import pyarrow.parquet
+
+    track = ReadeBinFile(log_path, use_cache=False).read_track()
+    export_bin_file(log_path, str(tmp_path / "flight.parquet"), "parquet", batch_size=100, use_cache=False)
+    export_bin_file(log_path, str(tmp_path / "flight.arrow"), "arrow", batch_size=100, use_cache=False)
+
+    for table in (
+        pyarrow.parquet.read_table(tmp_path / "flight.parquet"),
+        pyarrow.feather.read_table(tmp_path / "flight.arrow"),
+    ):
+        np.testing.assert_array_equal(table["lat"].to_numpy(), track.lat)
+        np.testing.assert_array_equal(table["time_us"].to_numpy(), track.time_us)
+
+
+@pytest.mark.skipif(HAS_PYARROW, reason="pyarrow is installed")
+def test_parquet_export_without_pyarrow_explains_what_is_missing(tmp_path):
+    with pytest.raises(ImportError, match="pip install pyarrow"):
+        ParquetTrackWriter(str(tmp_path / "flight.parquet"))
+
+
+def test_batch_export_summary_matches_npz(tmp_path, log_path):
+    npz_summary = process_logs([log_path], str(tmp_path / "npz"))[0]
+    geojson_summary = process_logs([log_path], str(tmp_path / "geojson"), output_format="geojson")[0]
+
+    assert geojson_summary["output"].endswith("flight.geojson")
+    assert geojson_summary["error"] is None
+    for field in ("points", "distance_km", "duration_s"):
+        assert geojson_summary[field] == npz_summary[field]
+
+
+@pytest.mark.parametrize("output_format", ["geojson", "kml"])
+def test_failed_stream_leaves_no_export(tmp_path, output_format):
+    output_path = tmp_path / f"flight.{output_format}"
+
+    def batches():
+        yield FlightTrack([32.0, 32.1], [34.8, 34.9])
+        raise OSError("log truncated")
+
+    with pytest.raises(OSError):
+        export_track(batches(), str(output_path), output_format)
+
+    assert not output_path.exists()
+
+
+def test_positions_keep_the_dimension_of_the_first_batch(tmp_path):
+    output_path = str(tmp_path / "flight.geojson")
+    batches = [
+        FlightTrack([32.0, 32.1], [34.8, 34.9], alt=[100.0, 110.0]),
+        FlightTrack([32.2, 32.3], [35.0, 35.1]),
+        FlightTrack([32.4, 32.5], [35.2, 35.3], alt=[np.nan, 130.0]),
+    ]
+
+    export_track(batches, output_path, "geojson")
+
+    coordinates = json.loads(open(output_path, encoding="utf-8").read())["features"][0]["geometry"]["coordinates"]
+    assert [position[2] for position in coordinates] == [100.0, 110.0, 110.0, 110.0, 110.0, 130.0]
+
+    export_track(batches[1:], output_path, "geojson")
+
+    coordinates = json.loads(open(output_path, encoding="utf-8").read())["features"][0]["geometry"]["coordinates"]
+    assert {len(position) for position in coordinates} == {2}